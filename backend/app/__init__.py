@@ -21,6 +21,10 @@ from flask_login import LoginManager
 from flask_mail import Mail
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from app.caching import ResponseCache, ReportCache
+from app.jsonprovider import provider_class
+from app.ticket_numbers import TicketNumberService
+from app.audit import AuditLogWriter
 import logging
 from logging.handlers import SMTPHandler, RotatingFileHandler
 import sqlalchemy as sa
@@ -31,6 +35,10 @@ migrate = Migrate()
 login = LoginManager()
 mail = Mail()
 jwt = JWTManager()
+cache = ResponseCache()
+report_cache = ReportCache()
+ticket_numbers = TicketNumberService()
+audit = AuditLogWriter()
 
 def create_app(config_class=Config):
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
@@ -42,6 +50,7 @@ def create_app(config_class=Config):
     )
     
     app.config.from_object(config_class)
+    app.json = provider_class()(app)
 
     # Initialize extensions
     db.init_app(app)
@@ -49,6 +58,10 @@ def create_app(config_class=Config):
     login.init_app(app)
     mail.init_app(app)
     jwt.init_app(app)
+    cache.init_app(app)
+    report_cache.init_app(app)
+    ticket_numbers.init_app(app)
+    audit.init_app(app)
 
     # JWT Blacklist configuration
     @jwt.token_in_blocklist_loader
@@ -78,6 +91,9 @@ def create_app(config_class=Config):
     from app.errors import bp as errors_bp
     app.register_blueprint(errors_bp)
 
+    from app.cli import bp as cli_bp
+    app.register_blueprint(cli_bp)
+
     # Email & file logging
     if not app.debug:
         if app.config['MAIL_SERVER']:
@@ -110,7 +126,7 @@ def create_app(config_class=Config):
         app.logger.setLevel(logging.INFO)
         app.logger.info('OMNIDESK startup')
 
-    # Import models to register them
-    from app import models
+    # Import models to register them (fulltext hooks its DDL onto create_all)
+    from app import models, fulltext
 
     return app
@@ -2,4 +2,4 @@ from flask import Blueprint
 
 bp = Blueprint('api', __name__)
 
-from app.api import auth, tickets, users, client, comments, categories, reports
+from app.api import auth, tickets, users, client, comments, categories, reports, imports, metrics, queues, report_jobs
@@ -1,9 +1,10 @@
 from flask import request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.api import bp
-from app.models import User, TicketCategory, Ticket, AuditLog
-from app import db
-from app.utils import sanitize_html, get_client_ip, get_user_agent
+from app.models import User, TicketCategory, Ticket
+from app import db, audit, cache
+from app.caching import invalidate_all_ticket_lists
+from app.utils import sanitize_html
 import sqlalchemy as sa
 from datetime import datetime
 import re
@@ -138,14 +139,11 @@ def create_category():
         db.session.add(category)
         
         # Create audit log
-        audit_log = AuditLog(
+        audit.record(
             action='CREATED',
             details=f"Created category: {name}",
-            user_id=current_user_id,
-            ip_address=get_client_ip(),
-            user_agent=get_user_agent()
+            user_id=current_user_id
         )
-        db.session.add(audit_log)
         
         db.session.commit()
         
@@ -318,16 +316,15 @@ def update_category(category_id):
             category.is_active = bool(data['is_active'])
         
         # Create audit log
-        audit_log = AuditLog(
+        audit.record(
             action='UPDATED',
             details=f"Updated category: {category.name}",
-            user_id=current_user_id,
-            ip_address=get_client_ip(),
-            user_agent=get_user_agent()
+            user_id=current_user_id
         )
-        db.session.add(audit_log)
         
         db.session.commit()
+        # Ticket list bodies embed the category's name and color
+        invalidate_all_ticket_lists(cache)
         
         return jsonify({
             'message': 'Category updated successfully',
@@ -372,16 +369,14 @@ def delete_category(category_id):
         category.is_active = False
         
         # Create audit log
-        audit_log = AuditLog(
+        audit.record(
             action='DELETED',
             details=f"Deactivated category: {category.name}",
-            user_id=current_user_id,
-            ip_address=get_client_ip(),
-            user_agent=get_user_agent()
+            user_id=current_user_id
         )
-        db.session.add(audit_log)
         
         db.session.commit()
+        invalidate_all_ticket_lists(cache)
         
         return jsonify({'message': 'Category deactivated successfully'}), 200
         
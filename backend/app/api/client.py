@@ -2,8 +2,9 @@ import os
 from flask import request, jsonify, current_app
 from werkzeug.utils import secure_filename
 from app.api import bp
-from app.models import ClientTicket, Ticket, User
-from app import db
+from app.models import ClientTicket, Ticket, User, ArchivedClientTicket, add_ticket
+from app import db, cache
+from app.caching import invalidate_ticket_lists
 import sqlalchemy as sa
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'doc', 'docx'}
@@ -48,20 +49,7 @@ def submit_client_ticket():
                     file.save(file_path)
                     uploaded_files.append(filename)
         
-        # Create client ticket
-        client_ticket = ClientTicket(
-            name=data['name'],
-            surname=data['surname'],
-            phone=data['phone'],
-            email=data['email'],
-            description=data['description'],
-            images=','.join(uploaded_files) if uploaded_files else None
-        )
-        
-        db.session.add(client_ticket)
-        db.session.flush()  # Get the ID
-        
-        # Create associated internal ticket
+        # Create associated internal ticket (inserted first, so a taken number can be retried)
         ticket_title = f"Client Ticket from {data['name']} {data['surname']}"
         ticket = Ticket(
             title=ticket_title,
@@ -74,12 +62,21 @@ def submit_client_ticket():
             created_by_id=None  # Client submissions have no user
         )
         
-        db.session.add(ticket)
-        db.session.flush()
+        add_ticket(ticket)
         
-        # Link them
-        client_ticket.ticket_id = ticket.id
+        # Create client ticket, linked to it
+        client_ticket = ClientTicket(
+            name=data['name'],
+            surname=data['surname'],
+            phone=data['phone'],
+            email=data['email'],
+            description=data['description'],
+            images=','.join(uploaded_files) if uploaded_files else None,
+            ticket_id=ticket.id
+        )
+        db.session.add(client_ticket)
         db.session.commit()
+        invalidate_ticket_lists(cache)
         
         return jsonify({
             'message': 'Ticket submitted successfully',
@@ -105,7 +102,9 @@ def get_client_ticket_status(reference_number):
         except ValueError:
             return jsonify({'message': 'Invalid reference number format'}), 400
         
-        client_ticket = db.session.get(ClientTicket, client_ticket_id)
+        # Submissions of archived tickets live in the archive tables
+        client_ticket = db.session.get(ClientTicket, client_ticket_id) or \
+            db.session.get(ArchivedClientTicket, client_ticket_id)
         if not client_ticket:
             return jsonify({'message': 'Ticket not found'}), 404
         
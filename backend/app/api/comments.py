@@ -1,9 +1,10 @@
 from flask import request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.api import bp
-from app.models import User, Ticket, TicketComment, AuditLog
-from app import db
-from app.utils import sanitize_html, get_client_ip, get_user_agent
+from app.models import User, Ticket, TicketComment
+from app import db, cache, audit
+from app.caching import invalidate_ticket_lists
+from app.utils import sanitize_html, paginate_query, parse_count_param, ValidationError
 import sqlalchemy as sa
 from datetime import datetime
 
@@ -39,7 +40,19 @@ def get_ticket_comments(ticket_id):
         if not user.is_admin and ticket.assigned_to_id != user.id:
             query = query.where(TicketComment.is_internal == False)
         
-        comments = db.session.scalars(query).all()
+        # Paginate only when asked, so existing clients still get the full thread
+        pagination_info = None
+        if 'page' in request.args or 'per_page' in request.args:
+            pagination_info = paginate_query(
+                query,
+                request.args.get('page', 1, type=int),
+                request.args.get('per_page', 50, type=int),
+                max_per_page=200,
+                count=parse_count_param(request.args.get('count'))
+            )
+            comments = pagination_info['items']
+        else:
+            comments = db.session.scalars(query).all()
         
         comments_data = []
         for comment in comments:
@@ -49,11 +62,20 @@ def get_ticket_comments(ticket_id):
             comment_data['time_ago'] = format_time_ago(comment.created_at)
             comments_data.append(comment_data)
         
+        if pagination_info is None:
+            return jsonify({
+                'comments': comments_data,
+                'total': len(comments_data)
+            }), 200
+        
         return jsonify({
             'comments': comments_data,
-            'total': len(comments_data)
+            'total': pagination_info['total'],
+            'pagination': {key: value for key, value in pagination_info.items() if key != 'items'}
         }), 200
         
+    except ValidationError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Error getting comments for ticket {ticket_id}: {str(e)}")
         return jsonify({'message': 'Internal server error'}), 500
@@ -106,6 +128,7 @@ def create_comment(ticket_id):
         )
         
         db.session.add(comment)
+        ticket.adjust_comment_count(1)
         
         # Update ticket's updated_at timestamp
         ticket.updated_at = datetime.utcnow()
@@ -123,17 +146,15 @@ def create_comment(ticket_id):
                 ticket.sla_response_breached = True
         
         # Create audit log
-        audit_log = AuditLog(
+        audit.record(
             action='COMMENTED',
             details=f"Added comment: {content[:100]}{'...' if len(content) > 100 else ''}",
             user_id=current_user_id,
-            ticket_id=ticket_id,
-            ip_address=get_client_ip(),
-            user_agent=get_user_agent()
+            ticket_id=ticket_id
         )
-        db.session.add(audit_log)
         
         db.session.commit()
+        invalidate_ticket_lists(cache, ticket.created_by_id, ticket.assigned_to_id)
         
         # Return the created comment
         comment_data = comment.to_dict()
@@ -192,17 +213,15 @@ def update_comment(comment_id):
             comment.is_internal = data['is_internal']
         
         # Create audit log
-        audit_log = AuditLog(
+        audit.record(
             action='UPDATED',
             details=f"Updated comment {comment_id}",
             user_id=current_user_id,
-            ticket_id=comment.ticket_id,
-            ip_address=get_client_ip(),
-            user_agent=get_user_agent()
+            ticket_id=comment.ticket_id
         )
-        db.session.add(audit_log)
         
         db.session.commit()
+        invalidate_ticket_lists(cache, comment.ticket.created_by_id, comment.ticket.assigned_to_id)
         
         comment_data = comment.to_dict()
         from app.utils import format_time_ago
@@ -238,21 +257,21 @@ def delete_comment(comment_id):
             return jsonify({'message': 'Access denied'}), 403
         
         # Soft delete the comment
+        if not comment.is_deleted:
+            comment.ticket.adjust_comment_count(-1)
         comment.is_deleted = True
         comment.updated_at = datetime.utcnow()
         
         # Create audit log
-        audit_log = AuditLog(
+        audit.record(
             action='DELETED',
             details=f"Deleted comment {comment_id}",
             user_id=current_user_id,
-            ticket_id=comment.ticket_id,
-            ip_address=get_client_ip(),
-            user_agent=get_user_agent()
+            ticket_id=comment.ticket_id
         )
-        db.session.add(audit_log)
         
         db.session.commit()
+        invalidate_ticket_lists(cache, comment.ticket.created_by_id, comment.ticket.assigned_to_id)
         
         return jsonify({'message': 'Comment deleted successfully'}), 200
         
@@ -277,21 +296,21 @@ def restore_comment(comment_id):
             return jsonify({'message': 'Comment not found'}), 404
         
         # Restore the comment
+        if comment.is_deleted:
+            comment.ticket.adjust_comment_count(1)
         comment.is_deleted = False
         comment.updated_at = datetime.utcnow()
         
         # Create audit log
-        audit_log = AuditLog(
+        audit.record(
             action='UPDATED',
             details=f"Restored comment {comment_id}",
             user_id=current_user_id,
-            ticket_id=comment.ticket_id,
-            ip_address=get_client_ip(),
-            user_agent=get_user_agent()
+            ticket_id=comment.ticket_id
         )
-        db.session.add(audit_log)
         
         db.session.commit()
+        invalidate_ticket_lists(cache, comment.ticket.created_by_id, comment.ticket.assigned_to_id)
         
         return jsonify({'message': 'Comment restored successfully'}), 200
         
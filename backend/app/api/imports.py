@@ -0,0 +1,59 @@
+from flask import request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.api import bp
+from app.models import User, ImportJob
+from app import db
+from app.importer import TicketImporter, TicketImportError, detect_format, open_text, iter_records
+
+@bp.route('/tickets/import', methods=['POST'])
+@jwt_required()
+def import_tickets():
+    """Stream-import tickets from an uploaded CSV or NDJSON file, optionally gzipped (admin only)"""
+    current_user_id = get_jwt_identity()
+    user = db.session.get(User, current_user_id)
+    
+    if not user or not user.is_admin:
+        return jsonify({'message': 'Admin access required'}), 403
+    
+    # Multipart upload under 'file', or the raw request body
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    filename = upload.filename if upload else request.args.get('filename')
+    
+    try:
+        fmt = detect_format(filename, request.args.get('format'))
+        importer = TicketImporter.start(
+            fmt, source=filename, job_id=request.args.get('job_id'), user_id=user.id
+        )
+    except TicketImportError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    try:
+        job = importer.run(iter_records(open_text(stream), fmt))
+    except Exception as e:
+        current_app.logger.error(f"Ticket import {importer.job.id} failed: {str(e)}")
+        return jsonify({
+            'message': 'Import failed; resend the file with this job_id to resume',
+            'job': importer.job.to_dict()
+        }), 500
+    
+    return jsonify({
+        'message': f'Imported {job.imported} tickets ({job.failed} rows rejected)',
+        'job': job.to_dict()
+    }), 200
+
+@bp.route('/tickets/import/<job_id>', methods=['GET'])
+@jwt_required()
+def get_import_job(job_id):
+    """Progress, checkpoint and row errors of an import job (admin only)"""
+    current_user_id = get_jwt_identity()
+    user = db.session.get(User, current_user_id)
+    
+    if not user or not user.is_admin:
+        return jsonify({'message': 'Admin access required'}), 403
+    
+    job = db.session.get(ImportJob, job_id)
+    if not job:
+        return jsonify({'message': 'Import job not found'}), 404
+    
+    return jsonify({'job': job.to_dict()}), 200
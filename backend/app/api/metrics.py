@@ -0,0 +1,19 @@
+from flask import jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.api import bp
+from app.models import User
+from app import db, audit
+
+@bp.route('/metrics', methods=['GET'])
+@jwt_required()
+def get_metrics():
+    """Internal pipeline metrics for this worker (admin only)"""
+    current_user_id = get_jwt_identity()
+    user = db.session.get(User, current_user_id)
+    
+    if not user or not user.is_admin:
+        return jsonify({'message': 'Admin access required'}), 403
+    
+    return jsonify({
+        'audit': audit.metrics()
+    }), 200
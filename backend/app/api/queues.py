@@ -0,0 +1,96 @@
+from flask import request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.api import bp
+from app.api.tickets import parse_fields_param, ticket_projection_query, project_ticket_row
+from app.models import User, Ticket, TicketCategory, TicketQueueEntry, SLA_WARNING_HOURS
+from app import db
+from app.utils import keyset_paginate, ValidationError
+from datetime import datetime, timedelta
+
+QUEUE_NAMES = ('my-open', 'unassigned', 'breaching-soon')
+QUEUE_SORT = 'queue'
+DEFAULT_QUEUE_FIELDS = 'ticket_number,title,status,priority,created_at,assigned_to,category,sla_status'
+
+def _queue_page(kind, key, due_before=None):
+    """One page of a queue head in SLA due order, seeking through ix_ticket_queue_entry_head"""
+    fields = parse_fields_param(request.args.get('fields', '').strip() or DEFAULT_QUEUE_FIELDS)
+    query = ticket_projection_query(
+        fields, [TicketQueueEntry.due_at, TicketQueueEntry.ticket_id]
+    ).join(
+        TicketQueueEntry, TicketQueueEntry.ticket_id == Ticket.id
+    ).where(
+        TicketQueueEntry.kind == kind,
+        TicketQueueEntry.key == key
+    )
+    if due_before is not None:
+        query = query.where(TicketQueueEntry.due_at <= due_before)
+
+    page = keyset_paginate(
+        query, [(TicketQueueEntry.due_at, False)], TicketQueueEntry.ticket_id, QUEUE_SORT,
+        cursor=request.args.get('cursor', '').strip() or None,
+        per_page=request.args.get('per_page', 20, type=int),
+        rows=True
+    )
+    return {
+        'tickets': [project_ticket_row(row, fields) for row in page['items']],
+        'pagination': {
+            'per_page': page['per_page'],
+            'has_next': page['has_next'],
+            'next_cursor': page['next_cursor']
+        }
+    }
+
+@bp.route('/queues/<name>', methods=['GET'])
+@jwt_required()
+def get_queue(name):
+    """Work queue head: my-open, unassigned (admin) or breaching-soon (all tickets for admins)"""
+    try:
+        current_user_id = get_jwt_identity()
+        user = db.session.get(User, current_user_id)
+
+        if not user:
+            return jsonify({'message': 'User not found'}), 404
+
+        if name not in QUEUE_NAMES:
+            return jsonify({'message': f"Unknown queue. Available: {', '.join(QUEUE_NAMES)}, category/<id>"}), 404
+
+        if name == 'my-open':
+            data = _queue_page('assignee', user.id)
+        elif name == 'unassigned':
+            if not user.is_admin:
+                return jsonify({'message': 'Admin access required'}), 403
+            data = _queue_page('assignee', 0)
+        else:
+            # Already breached or due within the warning window, most urgent first
+            due_before = datetime.utcnow() + timedelta(hours=SLA_WARNING_HOURS)
+            data = _queue_page('open', 0, due_before) if user.is_admin else _queue_page('assignee', user.id, due_before)
+
+        return jsonify({'queue': name, **data}), 200
+
+    except ValidationError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error fetching queue {name}: {str(e)}")
+        return jsonify({'message': 'Internal server error'}), 500
+
+@bp.route('/queues/category/<int:category_id>', methods=['GET'])
+@jwt_required()
+def get_category_queue(category_id):
+    """Open tickets in a category, most urgent first (admin only)"""
+    try:
+        current_user_id = get_jwt_identity()
+        user = db.session.get(User, current_user_id)
+
+        if not user or not user.is_admin:
+            return jsonify({'message': 'Admin access required'}), 403
+
+        if not db.session.get(TicketCategory, category_id):
+            return jsonify({'message': 'Category not found'}), 404
+
+        return jsonify({'queue': f'category/{category_id}', **_queue_page('category', category_id)}), 200
+
+    except ValidationError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error fetching category queue {category_id}: {str(e)}")
+        return jsonify({'message': 'Internal server error'}), 500
@@ -0,0 +1,89 @@
+import os
+from flask import request, jsonify, current_app, Response, send_file, url_for
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.api import bp
+from app.models import User, ReportJob
+from app import db, report_jobs
+from app.exports import EXPORT_FORMATS
+from app.report_jobs import REPORT_JOB_TYPES, ReportJobError
+
+@bp.route('/reports/jobs', methods=['POST'])
+@jwt_required()
+def create_report_job():
+    """Queue a report to run in the background; poll the returned job for progress"""
+    try:
+        current_user_id = get_jwt_identity()
+        user = db.session.get(User, current_user_id)
+        
+        if not user:
+            return jsonify({'message': 'User not found'}), 404
+        
+        data = request.get_json(silent=True) or {}
+        report = data.get('report')
+        if report in REPORT_JOB_TYPES and REPORT_JOB_TYPES[report][1] and not user.is_admin:
+            return jsonify({'message': 'Admin access required'}), 403
+        
+        try:
+            job = report_jobs.create_job(
+                user, report, fmt=data.get('format'), start_date=data.get('start_date'),
+                end_date=data.get('end_date'), days=data.get('days')
+            )
+        except ReportJobError as e:
+            return jsonify({'message': str(e)}), 400
+        db.session.commit()
+        
+        report_jobs.submit(job)
+        report_jobs.resume()
+        
+        response = jsonify({'message': 'Report job queued', 'job': job.to_dict()})
+        response.status_code = 202
+        response.headers['Location'] = url_for('api.get_report_job', job_id=job.id)
+        return response
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error queueing report job: {str(e)}")
+        return jsonify({'message': 'Internal server error'}), 500
+
+@bp.route('/reports/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_report_job(job_id):
+    """Progress of a report job; with download=1, stream its finished result"""
+    try:
+        current_user_id = get_jwt_identity()
+        user = db.session.get(User, current_user_id)
+        
+        if not user:
+            return jsonify({'message': 'User not found'}), 404
+        
+        report_jobs.resume()
+        
+        job = db.session.get(ReportJob, job_id)
+        if not job or (job.created_by_id != user.id and not user.is_admin):
+            return jsonify({'message': 'Report job not found'}), 404
+        
+        if request.args.get('download', '').lower() not in ('1', 'true'):
+            return jsonify({'job': job.to_dict()}), 200
+        
+        if job.status != 'done':
+            return jsonify({'message': f'Report job is {job.status}', 'job': job.to_dict()}), 409
+        path = report_jobs.result_path(job)
+        if not os.path.exists(path):
+            # Results live on the disk of the host that ran the job
+            return jsonify({'message': 'Report result not found on this server'}), 404
+        
+        filename = f'{job.report}-{job.id}.{job.format}'
+        mimetype = EXPORT_FORMATS[job.format]
+        # Clients accepting gzip get the stored file as is
+        if 'gzip' in request.accept_encodings:
+            response = send_file(path, mimetype=mimetype, as_attachment=True, download_name=filename)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = Response(report_jobs.iter_result(path, decompress=True), mimetype=mimetype)
+            response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response.vary.add('Accept-Encoding')
+        return response
+        
+    except Exception as e:
+        current_app.logger.error(f"Error fetching report job {job_id}: {str(e)}")
+        return jsonify({'message': 'Internal server error'}), 500
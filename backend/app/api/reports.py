@@ -1,14 +1,140 @@
-from flask import request, jsonify, current_app
+from flask import request, jsonify, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.api import bp
-from app.models import User, Ticket, TicketCategory, TicketComment, AuditLog, ClientTicket
-from app import db
+from app.models import (
+    User, Ticket, TicketCategory, TicketComment, ClientTicket, TicketDailyStats, TicketDurationSketch,
+    SLA_WARNING_HOURS
+)
+from app import db, report_cache
 from app.utils import paginate_query
+from app.exports import EXPORT_FORMATS, EXPORT_REPORTS, export_rows, encode, gzip_chunks
+from app.sketches import DDSketch
 import sqlalchemy as sa
 from datetime import datetime, timedelta
 from collections import defaultdict
 import calendar
 
+def _tally(condition):
+    """SUM(CASE WHEN condition THEN 1 ELSE 0 END), 0 over no rows"""
+    return sa.func.coalesce(sa.func.sum(sa.case((condition, 1), else_=0)), 0)
+
+def _cached_report(name, build, days):
+    """Serve build(days) through the report cache, with its age in seconds in the Age header"""
+    app = current_app._get_current_object()
+    body, age, state = report_cache.get_or_compute(name, {'days': days}, lambda: app.json.dumps(build(days)))
+    response = current_app.response_class(body, status=200, mimetype='application/json')
+    response.headers['Age'] = str(int(age))
+    response.headers['X-Cache'] = state
+    return response
+
+def dashboard_report(days):
+    """Dashboard statistics and metrics over the last `days` days"""
+    now = datetime.utcnow()
+    start_date = now - timedelta(days=days)
+    warning = now + timedelta(hours=SLA_WARNING_HOURS)
+
+    # Every ticket-side number in one pass over the live tickets, grouped
+    # by (category, priority) so both distributions come out of it too
+    ticket_groups = db.session.execute(
+        sa.select(
+            Ticket.category_id,
+            Ticket.priority,
+            sa.func.count(Ticket.id).label('total'),
+            _tally(Ticket.status == 'Open').label('open'),
+            _tally(Ticket.status == 'In Progress').label('in_progress'),
+            _tally(Ticket.status.in_(['Resolved', 'Closed'])).label('resolved'),
+            _tally(Ticket.created_at >= start_date).label('recent'),
+            _tally(sa.or_(
+                Ticket.sla_response_breached == True,
+                Ticket.sla_resolution_breached == True
+            )).label('sla_breached'),
+            _tally(sa.and_(
+                Ticket.status.in_(['Open', 'In Progress']),
+                sa.or_(Ticket.sla_response_due <= warning, Ticket.sla_resolution_due <= warning)
+            )).label('approaching_sla')
+        ).where(
+            Ticket.is_deleted == False
+        ).group_by(Ticket.category_id, Ticket.priority)
+    ).all()
+
+    totals = defaultdict(int)
+    category_counts = defaultdict(int)
+    priority_counts = defaultdict(int)
+    for group in ticket_groups:
+        for key in ('total', 'open', 'in_progress', 'resolved', 'recent', 'sla_breached', 'approaching_sla'):
+            totals[key] += getattr(group, key)
+        category_counts[group.category_id] += group.total
+        priority_counts[group.priority] += group.total
+    total_tickets = totals['total']
+    resolved_tickets = totals['resolved']
+    sla_breached = totals['sla_breached']
+
+    # Active categories, including those without tickets
+    categories = db.session.execute(
+        sa.select(TicketCategory.id, TicketCategory.name, TicketCategory.color).where(
+            TicketCategory.is_active == True
+        ).order_by(TicketCategory.id)
+    ).all()
+
+    # User and comment counts in one round-trip
+    activity = db.session.execute(sa.select(
+        sa.select(sa.func.count(User.id)).where(User.is_active == True)
+        .scalar_subquery().label('total_users'),
+        sa.select(sa.func.count(User.id)).where(User.is_active == True, User.last_seen >= start_date)
+        .scalar_subquery().label('active_users'),
+        sa.select(sa.func.count(TicketComment.id)).where(
+            TicketComment.is_deleted == False,
+            TicketComment.created_at >= start_date
+        ).scalar_subquery().label('recent_comments')
+    )).one()
+    total_users = activity.total_users
+    active_users = activity.active_users
+
+    # Compile dashboard data
+    dashboard_data = {
+        'overview': {
+            'total_tickets': total_tickets,
+            'open_tickets': totals['open'],
+            'in_progress_tickets': totals['in_progress'],
+            'resolved_tickets': resolved_tickets,
+            'recent_tickets': totals['recent'],
+            'resolution_rate': round((resolved_tickets / total_tickets * 100) if total_tickets > 0 else 0, 1)
+        },
+        'sla_metrics': {
+            'breached': sla_breached,
+            'approaching': totals['approaching_sla'],
+            'compliance_rate': round(((total_tickets - sla_breached) / total_tickets * 100) if total_tickets > 0 else 100, 1)
+        },
+        'user_metrics': {
+            'total_users': total_users,
+            'active_users': active_users,
+            'activity_rate': round((active_users / total_users * 100) if total_users > 0 else 0, 1)
+        },
+        'category_distribution': [
+            {
+                'name': category.name,
+                'color': category.color,
+                'count': category_counts[category.id],
+                'percentage': round((category_counts[category.id] / total_tickets * 100) if total_tickets > 0 else 0, 1)
+            }
+            for category in categories
+        ],
+        'priority_distribution': [
+            {
+                'priority': priority,
+                'count': count,
+                'percentage': round((count / total_tickets * 100) if total_tickets > 0 else 0, 1)
+            }
+            for priority, count in sorted(priority_counts.items(), key=lambda item: item[0] or '')
+        ],
+        'activity': {
+            'recent_comments': activity.recent_comments,
+            'date_range_days': days
+        }
+    }
+
+    return dashboard_data
+
 @bp.route('/reports/dashboard', methods=['GET'])
 @jwt_required()
 def get_dashboard_stats():
@@ -20,163 +146,102 @@ def get_dashboard_stats():
         if not user:
             return jsonify({'message': 'User not found'}), 404
         
-        # Date range filter (default to last 30 days)
+        # Date range (default to last 30 days)
         days = request.args.get('days', 30, type=int)
-        start_date = datetime.utcnow() - timedelta(days=days)
-        
-        # Basic ticket counts
-        total_tickets = db.session.scalar(
-            sa.select(sa.func.count(Ticket.id)).where(Ticket.is_deleted == False)
-        )
-        
-        open_tickets = db.session.scalar(
-            sa.select(sa.func.count(Ticket.id)).where(
-                Ticket.is_deleted == False,
-                Ticket.status == 'Open'
-            )
-        )
-        
-        in_progress_tickets = db.session.scalar(
-            sa.select(sa.func.count(Ticket.id)).where(
-                Ticket.is_deleted == False,
-                Ticket.status == 'In Progress'
-            )
-        )
-        
-        resolved_tickets = db.session.scalar(
-            sa.select(sa.func.count(Ticket.id)).where(
-                Ticket.is_deleted == False,
-                Ticket.status.in_(['Resolved', 'Closed'])
-            )
-        )
-        
-        # Recent activity (tickets created in date range)
-        recent_tickets = db.session.scalar(
-            sa.select(sa.func.count(Ticket.id)).where(
-                Ticket.is_deleted == False,
-                Ticket.created_at >= start_date
-            )
-        )
-        
-        # SLA metrics
-        sla_breached = db.session.scalar(
-            sa.select(sa.func.count(Ticket.id)).where(
-                Ticket.is_deleted == False,
-                sa.or_(
-                    Ticket.sla_response_breached == True,
-                    Ticket.sla_resolution_breached == True
-                )
-            )
-        )
-        
-        approaching_sla = db.session.scalar(
-            sa.select(sa.func.count(Ticket.id)).where(
-                Ticket.is_deleted == False,
-                Ticket.status.in_(['Open', 'In Progress']),
-                sa.or_(
-                    Ticket.sla_response_due <= datetime.utcnow() + timedelta(hours=4),
-                    Ticket.sla_resolution_due <= datetime.utcnow() + timedelta(hours=4)
-                )
-            )
-        )
-        
-        # User metrics
-        total_users = db.session.scalar(
-            sa.select(sa.func.count(User.id)).where(User.is_active == True)
-        )
-        
-        active_users = db.session.scalar(
-            sa.select(sa.func.count(User.id)).where(
-                User.is_active == True,
-                User.last_seen >= start_date
-            )
-        )
-        
-        # Category distribution
-        category_stats = db.session.execute(
-            sa.select(
-                TicketCategory.name,
-                TicketCategory.color,
-                sa.func.count(Ticket.id).label('count')
-            ).select_from(
-                TicketCategory
-            ).outerjoin(
-                Ticket, sa.and_(
-                    Ticket.category_id == TicketCategory.id,
-                    Ticket.is_deleted == False
-                )
-            ).where(
-                TicketCategory.is_active == True
-            ).group_by(TicketCategory.id, TicketCategory.name, TicketCategory.color)
-        ).all()
-        
-        # Priority distribution
-        priority_stats = db.session.execute(
-            sa.select(
-                Ticket.priority,
-                sa.func.count(Ticket.id).label('count')
-            ).where(
-                Ticket.is_deleted == False
-            ).group_by(Ticket.priority)
-        ).all()
-        
-        # Recent comments count
-        recent_comments = db.session.scalar(
-            sa.select(sa.func.count(TicketComment.id)).where(
-                TicketComment.is_deleted == False,
-                TicketComment.created_at >= start_date
-            )
-        )
-        
-        # Compile dashboard data
-        dashboard_data = {
-            'overview': {
-                'total_tickets': total_tickets,
-                'open_tickets': open_tickets,
-                'in_progress_tickets': in_progress_tickets,
-                'resolved_tickets': resolved_tickets,
-                'recent_tickets': recent_tickets,
-                'resolution_rate': round((resolved_tickets / total_tickets * 100) if total_tickets > 0 else 0, 1)
-            },
-            'sla_metrics': {
-                'breached': sla_breached,
-                'approaching': approaching_sla,
-                'compliance_rate': round(((total_tickets - sla_breached) / total_tickets * 100) if total_tickets > 0 else 100, 1)
-            },
-            'user_metrics': {
-                'total_users': total_users,
-                'active_users': active_users,
-                'activity_rate': round((active_users / total_users * 100) if total_users > 0 else 0, 1)
-            },
-            'category_distribution': [
-                {
-                    'name': stat.name,
-                    'color': stat.color,
-                    'count': stat.count,
-                    'percentage': round((stat.count / total_tickets * 100) if total_tickets > 0 else 0, 1)
-                }
-                for stat in category_stats
-            ],
-            'priority_distribution': [
-                {
-                    'priority': stat.priority,
-                    'count': stat.count,
-                    'percentage': round((stat.count / total_tickets * 100) if total_tickets > 0 else 0, 1)
-                }
-                for stat in priority_stats
-            ],
-            'activity': {
-                'recent_comments': recent_comments,
-                'date_range_days': days
-            }
-        }
-        
-        return jsonify(dashboard_data), 200
+        return _cached_report('dashboard', dashboard_report, days)
         
     except Exception as e:
         current_app.logger.error(f"Error generating dashboard stats: {str(e)}")
         return jsonify({'message': 'Internal server error'}), 500
 
+PERCENTILES = (('p50', 0.5), ('p90', 0.9), ('p99', 0.99))
+
+def _rollup_window(days, model=TicketDailyStats):
+    """Criteria selecting the rollup rows (ticket_daily_stats by default) of the last `days` days"""
+    return [model.day >= (datetime.utcnow() - timedelta(days=days)).date()]
+
+def _hours(seconds, count):
+    return round(seconds / count / 3600, 2) if count else 0
+
+def _duration_sketches(days, dimension=None):
+    """{(dimension value, metric): DDSketch} merging the window's daily duration sketches in SQL"""
+    dimensions = [dimension] if dimension is not None else []
+    rows = db.session.execute(
+        sa.select(
+            *dimensions,
+            TicketDurationSketch.metric,
+            TicketDurationSketch.bucket,
+            sa.func.sum(TicketDurationSketch.count).label('count')
+        ).where(
+            *_rollup_window(days, TicketDurationSketch)
+        ).group_by(*dimensions, TicketDurationSketch.metric, TicketDurationSketch.bucket)
+    ).all()
+    sketches = defaultdict(DDSketch)
+    for row in rows:
+        sketches[(row[0] if dimensions else None, row.metric)].add_bucket(row.bucket, row.count)
+    return sketches
+
+def _percentile_hours(sketch):
+    """p50/p90/p99 of a duration sketch in hours, 0 when it is empty like the averages"""
+    if sketch is None or sketch.count <= 0:
+        return {name: 0 for name, _ in PERCENTILES}
+    return {name: round(sketch.quantile(q) / 3600, 2) for name, q in PERCENTILES}
+
+def trends_report(days):
+    """Trend data for charts, one ticket_daily_stats aggregate per day in the range"""
+    daily = db.session.execute(
+        sa.select(
+            TicketDailyStats.day,
+            sa.func.sum(TicketDailyStats.created).label('created'),
+            sa.func.sum(TicketDailyStats.resolved).label('resolved'),
+            sa.func.sum(TicketDailyStats.closed).label('closed'),
+            sa.func.sum(TicketDailyStats.responded).label('responded'),
+            sa.func.sum(TicketDailyStats.response_seconds).label('response_seconds'),
+            sa.func.sum(TicketDailyStats.resolution_seconds).label('resolution_seconds')
+        ).where(
+            *_rollup_window(days)
+        ).group_by(TicketDailyStats.day)
+        .order_by(TicketDailyStats.day)
+    ).all()
+    daily_sketches = _duration_sketches(days, TicketDurationSketch.day)
+
+    # Status trends count the tickets entering each state per day. Only Open, Resolved and
+    # Closed have an entry timestamp to count by (the pre-rollup report grouped every status
+    # by last-update day instead), so In Progress and Pending have no series
+    status_trends = {}
+    for status, column in (('Open', 'created'), ('Resolved', 'resolved'), ('Closed', 'closed')):
+        points = [{'date': row.day, 'count': getattr(row, column)} for row in daily if getattr(row, column)]
+        if points:
+            status_trends[status] = points
+
+    trends_data = {
+        'daily_tickets': [
+            {'date': row.day, 'count': row.created} for row in daily if row.created
+        ],
+        'daily_resolutions': [
+            {'date': row.day, 'count': row.resolved} for row in daily if row.resolved
+        ],
+        'status_trends': status_trends,
+        'response_times': [
+            {
+                'date': row.day,
+                'avg_hours': _hours(row.response_seconds, row.responded),
+                'percentile_hours': _percentile_hours(daily_sketches.get((row.day, 'response')))
+            }
+            for row in daily if row.responded
+        ],
+        'resolution_times': [
+            {
+                'date': row.day,
+                'avg_hours': _hours(row.resolution_seconds, row.resolved),
+                'percentile_hours': _percentile_hours(daily_sketches.get((row.day, 'resolution')))
+            }
+            for row in daily if row.resolved
+        ]
+    }
+
+    return trends_data
+
 @bp.route('/reports/trends', methods=['GET'])
 @jwt_required()
 def get_trends():
@@ -190,104 +255,109 @@ def get_trends():
         
         # Date range (default to last 30 days)
         days = request.args.get('days', 30, type=int)
-        start_date = datetime.utcnow() - timedelta(days=days)
-        
-        # Daily ticket creation trend
-        daily_tickets = db.session.execute(
-            sa.select(
-                sa.func.date(Ticket.created_at).label('date'),
-                sa.func.count(Ticket.id).label('count')
-            ).where(
-                Ticket.is_deleted == False,
-                Ticket.created_at >= start_date
-            ).group_by(sa.func.date(Ticket.created_at))
-            .order_by(sa.func.date(Ticket.created_at))
-        ).all()
-        
-        # Daily resolution trend
-        daily_resolutions = db.session.execute(
-            sa.select(
-                sa.func.date(Ticket.resolved_at).label('date'),
-                sa.func.count(Ticket.id).label('count')
-            ).where(
-                Ticket.is_deleted == False,
-                Ticket.resolved_at >= start_date,
-                Ticket.resolved_at.is_not(None)
-            ).group_by(sa.func.date(Ticket.resolved_at))
-            .order_by(sa.func.date(Ticket.resolved_at))
-        ).all()
-        
-        # Status changes over time
-        status_trends = db.session.execute(
-            sa.select(
-                sa.func.date(Ticket.updated_at).label('date'),
-                Ticket.status,
-                sa.func.count(Ticket.id).label('count')
-            ).where(
-                Ticket.is_deleted == False,
-                Ticket.updated_at >= start_date
-            ).group_by(sa.func.date(Ticket.updated_at), Ticket.status)
-            .order_by(sa.func.date(Ticket.updated_at))
-        ).all()
-        
-        # Response time trends (average first response time by day)
-        response_times = db.session.execute(
-            sa.select(
-                sa.func.date(Ticket.created_at).label('date'),
-                sa.func.avg(
-                    sa.extract('epoch', Ticket.first_response_at - Ticket.created_at) / 3600
-                ).label('avg_response_hours')
-            ).where(
-                Ticket.is_deleted == False,
-                Ticket.created_at >= start_date,
-                Ticket.first_response_at.is_not(None)
-            ).group_by(sa.func.date(Ticket.created_at))
-            .order_by(sa.func.date(Ticket.created_at))
-        ).all()
-        
-        # Format trend data
-        trends_data = {
-            'daily_tickets': [
-                {
-                    'date': row.date.isoformat(),
-                    'count': row.count
-                }
-                for row in daily_tickets
-            ],
-            'daily_resolutions': [
-                {
-                    'date': row.date.isoformat(),
-                    'count': row.count
-                }
-                for row in daily_resolutions
-            ],
-            'status_trends': {},
-            'response_times': [
-                {
-                    'date': row.date.isoformat(),
-                    'avg_hours': round(float(row.avg_response_hours), 2) if row.avg_response_hours else 0
-                }
-                for row in response_times
-            ]
-        }
-        
-        # Group status trends by status
-        for row in status_trends:
-            status = row.status
-            if status not in trends_data['status_trends']:
-                trends_data['status_trends'][status] = []
-            
-            trends_data['status_trends'][status].append({
-                'date': row.date.isoformat(),
-                'count': row.count
-            })
-        
-        return jsonify(trends_data), 200
+        return _cached_report('trends', trends_report, days)
         
     except Exception as e:
         current_app.logger.error(f"Error generating trends: {str(e)}")
         return jsonify({'message': 'Internal server error'}), 500
 
+def performance_report(days):
+    """Performance metrics and KPIs from the ticket_daily_stats rollup"""
+    window = _rollup_window(days)
+
+    # Per category (0 = uncategorized); the overall figures are their sum
+    by_category = db.session.execute(
+        sa.select(
+            TicketDailyStats.category_id,
+            TicketCategory.name,
+            sa.func.sum(TicketDailyStats.created).label('created'),
+            sa.func.sum(TicketDailyStats.resolved).label('resolved'),
+            sa.func.sum(TicketDailyStats.resolution_seconds).label('resolution_seconds'),
+            sa.func.sum(TicketDailyStats.responded).label('responded'),
+            sa.func.sum(TicketDailyStats.response_seconds).label('response_seconds'),
+            sa.func.sum(TicketDailyStats.response_breached).label('response_breached'),
+            sa.func.sum(TicketDailyStats.resolution_breached).label('resolution_breached')
+        ).outerjoin(
+            TicketCategory, TicketCategory.id == TicketDailyStats.category_id
+        ).where(
+            *window
+        ).group_by(TicketDailyStats.category_id, TicketCategory.name)
+        .order_by(TicketDailyStats.category_id)
+    ).all()
+
+    # Agent performance (tickets resolved per agent)
+    agent_performance = db.session.execute(
+        sa.select(
+            User.id,
+            User.username,
+            sa.func.sum(TicketDailyStats.resolved).label('resolved_tickets'),
+            sa.func.sum(TicketDailyStats.resolution_seconds).label('resolution_seconds')
+        ).join(
+            User, User.id == TicketDailyStats.assignee_id
+        ).where(
+            *window
+        ).group_by(User.id, User.username)
+        .having(sa.func.sum(TicketDailyStats.resolved) > 0)
+        .order_by(sa.func.sum(TicketDailyStats.resolved).desc())
+    ).all()
+
+    totals = defaultdict(int)
+    for row in by_category:
+        for key in ('resolved', 'resolution_seconds', 'responded', 'response_seconds'):
+            totals[key] += getattr(row, key)
+    categories = [row for row in by_category if row.name is not None and row.created]
+
+    # Long-tail percentiles from the duration sketches; the overall ones merge the categories'
+    category_sketches = _duration_sketches(days, TicketDurationSketch.category_id)
+    agent_sketches = _duration_sketches(days, TicketDurationSketch.assignee_id)
+    overall_sketches = defaultdict(DDSketch)
+    for (_, metric), sketch in category_sketches.items():
+        overall_sketches[metric].merge(sketch)
+
+    performance_data = {
+        'overall_metrics': {
+            'avg_resolution_hours': _hours(totals['resolution_seconds'], totals['resolved']),
+            'avg_response_hours': _hours(totals['response_seconds'], totals['responded']),
+            'resolution_percentile_hours': _percentile_hours(overall_sketches.get('resolution')),
+            'response_percentile_hours': _percentile_hours(overall_sketches.get('response')),
+            'date_range_days': days
+        },
+        'agent_performance': [
+            {
+                'username': row.username,
+                'resolved_tickets': row.resolved_tickets,
+                'avg_resolution_hours': _hours(row.resolution_seconds, row.resolved_tickets),
+                'resolution_percentile_hours': _percentile_hours(agent_sketches.get((row.id, 'resolution'))),
+                'response_percentile_hours': _percentile_hours(agent_sketches.get((row.id, 'response')))
+            }
+            for row in agent_performance
+        ],
+        'category_performance': [
+            {
+                'category': row.name,
+                'total_tickets': row.created,
+                'resolved_tickets': row.resolved,
+                # Resolved in the window against created in it, so a backlog being cleared can exceed its intake
+                'resolution_rate': round(min(100, row.resolved / row.created * 100), 1),
+                'avg_resolution_hours': _hours(row.resolution_seconds, row.resolved),
+                'resolution_percentile_hours': _percentile_hours(category_sketches.get((row.category_id, 'resolution'))),
+                'response_percentile_hours': _percentile_hours(category_sketches.get((row.category_id, 'response')))
+            }
+            for row in categories
+        ],
+        'sla_compliance': [
+            {
+                'category': row.name,
+                'total_tickets': row.created,
+                'response_compliance': round((row.created - row.response_breached) / row.created * 100, 1),
+                'resolution_compliance': round((row.created - row.resolution_breached) / row.created * 100, 1)
+            }
+            for row in categories
+        ]
+    }
+
+    return performance_data
+
 @bp.route('/reports/performance', methods=['GET'])
 @jwt_required()
 def get_performance_metrics():
@@ -299,128 +369,9 @@ def get_performance_metrics():
         if not user:
             return jsonify({'message': 'User not found'}), 404
         
-        # Date range
+        # Date range (default to last 30 days)
         days = request.args.get('days', 30, type=int)
-        start_date = datetime.utcnow() - timedelta(days=days)
-        
-        # Average resolution time
-        avg_resolution_time = db.session.scalar(
-            sa.select(
-                sa.func.avg(
-                    sa.extract('epoch', Ticket.resolved_at - Ticket.created_at) / 3600
-                )
-            ).where(
-                Ticket.is_deleted == False,
-                Ticket.resolved_at.is_not(None),
-                Ticket.created_at >= start_date
-            )
-        )
-        
-        # Average first response time
-        avg_response_time = db.session.scalar(
-            sa.select(
-                sa.func.avg(
-                    sa.extract('epoch', Ticket.first_response_at - Ticket.created_at) / 3600
-                )
-            ).where(
-                Ticket.is_deleted == False,
-                Ticket.first_response_at.is_not(None),
-                Ticket.created_at >= start_date
-            )
-        )
-        
-        # Agent performance (tickets resolved per agent)
-        agent_performance = db.session.execute(
-            sa.select(
-                User.username,
-                sa.func.count(Ticket.id).label('resolved_tickets'),
-                sa.func.avg(
-                    sa.extract('epoch', Ticket.resolved_at - Ticket.created_at) / 3600
-                ).label('avg_resolution_hours')
-            ).select_from(User).join(
-                Ticket, Ticket.assigned_to_id == User.id
-            ).where(
-                Ticket.is_deleted == False,
-                Ticket.resolved_at.is_not(None),
-                Ticket.resolved_at >= start_date
-            ).group_by(User.id, User.username)
-            .order_by(sa.func.count(Ticket.id).desc())
-        ).all()
-        
-        # Category performance
-        category_performance = db.session.execute(
-            sa.select(
-                TicketCategory.name,
-                sa.func.count(Ticket.id).label('total_tickets'),
-                sa.func.sum(
-                    sa.case((Ticket.status.in_(['Resolved', 'Closed']), 1), else_=0)
-                ).label('resolved_tickets'),
-                sa.func.avg(
-                    sa.extract('epoch', Ticket.resolved_at - Ticket.created_at) / 3600
-                ).label('avg_resolution_hours')
-            ).select_from(TicketCategory).join(
-                Ticket, Ticket.category_id == TicketCategory.id
-            ).where(
-                Ticket.is_deleted == False,
-                Ticket.created_at >= start_date
-            ).group_by(TicketCategory.id, TicketCategory.name)
-        ).all()
-        
-        # SLA compliance by category
-        sla_compliance = db.session.execute(
-            sa.select(
-                TicketCategory.name,
-                sa.func.count(Ticket.id).label('total_tickets'),
-                sa.func.sum(
-                    sa.case((Ticket.sla_response_breached == False, 1), else_=0)
-                ).label('response_within_sla'),
-                sa.func.sum(
-                    sa.case((Ticket.sla_resolution_breached == False, 1), else_=0)
-                ).label('resolution_within_sla')
-            ).select_from(TicketCategory).join(
-                Ticket, Ticket.category_id == TicketCategory.id
-            ).where(
-                Ticket.is_deleted == False,
-                Ticket.created_at >= start_date
-            ).group_by(TicketCategory.id, TicketCategory.name)
-        ).all()
-        
-        performance_data = {
-            'overall_metrics': {
-                'avg_resolution_hours': round(float(avg_resolution_time), 2) if avg_resolution_time else 0,
-                'avg_response_hours': round(float(avg_response_time), 2) if avg_response_time else 0,
-                'date_range_days': days
-            },
-            'agent_performance': [
-                {
-                    'username': row.username,
-                    'resolved_tickets': row.resolved_tickets,
-                    'avg_resolution_hours': round(float(row.avg_resolution_hours), 2) if row.avg_resolution_hours else 0
-                }
-                for row in agent_performance
-            ],
-            'category_performance': [
-                {
-                    'category': row.name,
-                    'total_tickets': row.total_tickets,
-                    'resolved_tickets': row.resolved_tickets,
-                    'resolution_rate': round((row.resolved_tickets / row.total_tickets * 100) if row.total_tickets > 0 else 0, 1),
-                    'avg_resolution_hours': round(float(row.avg_resolution_hours), 2) if row.avg_resolution_hours else 0
-                }
-                for row in category_performance
-            ],
-            'sla_compliance': [
-                {
-                    'category': row.name,
-                    'total_tickets': row.total_tickets,
-                    'response_compliance': round((row.response_within_sla / row.total_tickets * 100) if row.total_tickets > 0 else 0, 1),
-                    'resolution_compliance': round((row.resolution_within_sla / row.total_tickets * 100) if row.total_tickets > 0 else 0, 1)
-                }
-                for row in sla_compliance
-            ]
-        }
-        
-        return jsonify(performance_data), 200
+        return _cached_report('performance', performance_report, days)
         
     except Exception as e:
         current_app.logger.error(f"Error generating performance metrics: {str(e)}")
@@ -429,7 +380,7 @@ def get_performance_metrics():
 @bp.route('/reports/export', methods=['GET'])
 @jwt_required()
 def export_report():
-    """Export report data (admin only)"""
+    """Stream report data as JSON, NDJSON or CSV, optionally gzipped (admin only)"""
     try:
         current_user_id = get_jwt_identity()
         user = db.session.get(User, current_user_id)
@@ -438,6 +389,8 @@ def export_report():
             return jsonify({'message': 'Admin access required'}), 403
         
         report_type = request.args.get('type', 'tickets')
+        fmt = request.args.get('format', 'json').lower()
+        compress = request.args.get('compress', '').lower()
         start_date_str = request.args.get('start_date')
         end_date_str = request.args.get('end_date')
         
@@ -448,71 +401,39 @@ def export_report():
         except ValueError:
             return jsonify({'message': 'Invalid date format. Use ISO format (YYYY-MM-DD)'}), 400
         
-        if report_type == 'tickets':
-            # Export ticket data
-            tickets = db.session.scalars(
-                sa.select(Ticket).where(
-                    Ticket.is_deleted == False,
-                    Ticket.created_at >= start_date,
-                    Ticket.created_at <= end_date
-                ).options(
-                    sa.orm.joinedload(Ticket.created_by),
-                    sa.orm.joinedload(Ticket.assigned_to),
-                    sa.orm.joinedload(Ticket.category)
-                ).order_by(Ticket.created_at.desc())
-            ).all()
-            
-            export_data = [
-                {
-                    'id': ticket.id,
-                    'ticket_number': getattr(ticket, 'ticket_number', f'TKT-{ticket.id}'),
-                    'title': ticket.title,
-                    'status': ticket.status,
-                    'priority': ticket.priority,
-                    'category': ticket.category.name if ticket.category else 'Uncategorized',
-                    'created_by': ticket.created_by.username if ticket.created_by else 'Client',
-                    'assigned_to': ticket.assigned_to.username if ticket.assigned_to else 'Unassigned',
-                    'created_at': ticket.created_at.isoformat(),
-                    'resolved_at': ticket.resolved_at.isoformat() if getattr(ticket, 'resolved_at', None) else None,
-                    'sla_breached': getattr(ticket, 'sla_resolution_breached', False)
-                }
-                for ticket in tickets
-            ]
-            
-        elif report_type == 'audit':
-            # Export audit log data
-            audit_logs = db.session.scalars(
-                sa.select(AuditLog).where(
-                    AuditLog.created_at >= start_date,
-                    AuditLog.created_at <= end_date
-                ).options(
-                    sa.orm.joinedload(AuditLog.user)
-                ).order_by(AuditLog.created_at.desc())
-            ).all()
-            
-            export_data = [
-                {
-                    'id': log.id,
-                    'action': log.action,
-                    'details': log.details,
-                    'user': log.user.username if log.user else 'System',
-                    'ticket_id': log.ticket_id,
-                    'ip_address': log.ip_address,
-                    'created_at': log.created_at.isoformat()
-                }
-                for log in audit_logs
-            ]
-            
-        else:
+        if report_type not in EXPORT_REPORTS:
             return jsonify({'message': 'Invalid report type'}), 400
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'message': f"Invalid format. Use one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        if compress not in ('', 'gzip'):
+            return jsonify({'message': "Invalid compress value. Use 'gzip'"}), 400
         
-        return jsonify({
+        _, fields = EXPORT_REPORTS[report_type]
+        envelope = {
             'report_type': report_type,
-            'start_date': start_date.isoformat(),
-            'end_date': end_date.isoformat(),
-            'total_records': len(export_data),
-            'data': export_data
-        }), 200
+            'start_date': start_date,
+            'end_date': end_date
+        }
+        records = export_rows(db.session, report_type, start_date, end_date)
+        chunks = encode(records, fmt, fields, envelope)
+        
+        def generate():
+            # Headers are already sent: re-raise so the server aborts the connection and the
+            # client sees a broken transfer rather than a complete-looking truncated file
+            try:
+                yield from (gzip_chunks(chunks) if compress else chunks)
+            except Exception as e:
+                current_app.logger.error(f"Error streaming {report_type} export: {str(e)}")
+                raise
+        
+        response = Response(stream_with_context(generate()), mimetype=EXPORT_FORMATS[fmt])
+        if compress:
+            response.headers['Content-Encoding'] = 'gzip'
+            response.vary.add('Accept-Encoding')
+        if fmt != 'json':
+            filename = f"{report_type}-{start_date:%Y%m%d}-{end_date:%Y%m%d}.{fmt}"
+            response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
         
     except Exception as e:
         current_app.logger.error(f"Error exporting report: {str(e)}")
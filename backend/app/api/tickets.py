@@ -2,12 +2,197 @@ import json
 from flask import request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.api import bp
-from app.models import User, Ticket, ClientTicket, TicketCategory, AuditLog
-from app import db, mail
-from app.utils import validate_ticket_data, sanitize_html, get_client_ip, get_user_agent, paginate_query
+from app.models import (
+    User, Ticket, ClientTicket, TicketCategory, TicketComment, AuditLog, ArchivedTicket, ARCHIVED_MODELS,
+    TicketStatus, PRIORITY_RANK, refresh_ticket_queues, refresh_ticket_durations, add_ticket
+)
+from app import db, mail, cache, fulltext, audit, rollups
+from app.archive import unarchive_tickets
+from app.caching import TICKET_LIST_NAMESPACE, ticket_list_scopes, ticket_list_params, invalidate_ticket_lists
+from app.utils import (
+    validate_ticket_data, sanitize_html, paginate_query,
+    parse_sort_param, format_sort_param, encode_cursor, decode_cursor, keyset_columns, keyset_order_by,
+    keyset_cursor, keyset_paginate, parse_count_param, make_etag, etag_matches, not_modified,
+    format_time_ago, ValidationError
+)
 import sqlalchemy as sa
-from datetime import datetime
+from datetime import datetime, timedelta
 from flask_mail import Message
+import operator
+
+# Sortable columns for the ticket list; each has a composite (column, id) index
+TICKET_SORT_COLUMNS = {
+    'created_at': Ticket.created_at,
+    'updated_at': Ticket.updated_at,
+    'priority': Ticket.priority_rank,
+    'sla_resolution_due': Ticket.sla_resolution_due
+}
+DEFAULT_TICKET_SORT = '-created_at'
+RELEVANCE_SORT = 'relevance'
+
+# Fields selectable with ?fields= on the ticket list; relationship fields add their join only when requested
+TICKET_LIST_FIELDS = (
+    'id', 'ticket_number', 'title', 'description', 'status', 'priority', 'created_at', 'updated_at',
+    'created_by', 'assigned_to', 'category', 'client_info', 'sla_status', 'comment_count',
+    'attachment_count', 'search_snippet'
+)
+_TICKET_FIELD_COLUMNS = {
+    'ticket_number': [Ticket.ticket_number],
+    'title': [Ticket.title],
+    'description': [Ticket.description],
+    'status': [Ticket.status],
+    'priority': [Ticket.priority],
+    'created_at': [Ticket.created_at],
+    'updated_at': [Ticket.updated_at],
+    'sla_status': [Ticket.sla_resolution_due, Ticket.sla_resolution_breached],
+    'comment_count': [Ticket.comment_count],
+    'attachment_count': [Ticket.attachment_count]
+}
+_CLIENT_INFO_COLUMNS = ('id', 'name', 'surname', 'email', 'phone', 'company', 'reference_number', 'images')
+
+def parse_fields_param(fields):
+    """Parse ?fields=a,b into a set of ticket list fields ('id' is always included)"""
+    requested = {f.strip() for f in fields.split(',') if f.strip()}
+    unknown = requested.difference(TICKET_LIST_FIELDS)
+    if unknown:
+        raise ValidationError(
+            f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(TICKET_LIST_FIELDS)}"
+        )
+    return requested | {'id'}
+
+def ticket_projection_query(fields, extra_columns=()):
+    """Column-only select for a sparse fieldset, joining only the relations the fields need"""
+    columns = [Ticket.id]
+    for field in TICKET_LIST_FIELDS:
+        if field in fields:
+            columns.extend(_TICKET_FIELD_COLUMNS.get(field, []))
+    columns.extend(extra_columns)
+    
+    # Deduplicate while keeping attribute keys so rows expose ticket attributes by name
+    seen = set()
+    columns = [c for c in columns if not (c.key in seen or seen.add(c.key))]
+    
+    joins = []
+    for field in ('created_by', 'assigned_to'):
+        if field in fields:
+            person = sa.orm.aliased(User)
+            columns += [person.id.label(f'{field}__id'), person.username.label(f'{field}__username')]
+            joins.append((person, person.id == getattr(Ticket, f'{field}_id')))
+    if 'category' in fields:
+        columns += [
+            TicketCategory.id.label('category__id'),
+            TicketCategory.name.label('category__name'),
+            TicketCategory.color.label('category__color')
+        ]
+        joins.append((TicketCategory, TicketCategory.id == Ticket.category_id))
+    if 'client_info' in fields:
+        columns += [
+            getattr(ClientTicket, name).label(f'client__{name}') for name in _CLIENT_INFO_COLUMNS
+        ]
+        joins.append((ClientTicket, ClientTicket.ticket_id == Ticket.id))
+    
+    query = sa.select(*columns)
+    for target, onclause in joins:
+        query = query.outerjoin(target, onclause)
+    return query
+
+def _parse_client_images(images, ticket_id):
+    try:
+        return json.loads(images) if images else []
+    except (json.JSONDecodeError, TypeError) as e:
+        current_app.logger.warning(f"Failed to parse images for ticket {ticket_id}: {e}")
+        return []
+
+def project_ticket_row(row, fields):
+    """Serialize a ticket_projection_query row into the requested fields only"""
+    m = row._mapping
+    data = {}
+    for field in TICKET_LIST_FIELDS:
+        if field not in fields or field == 'search_snippet':
+            continue
+        if field in ('created_by', 'assigned_to'):
+            data[field] = {
+                'id': m[f'{field}__id'], 'username': m[f'{field}__username']
+            } if m[f'{field}__id'] is not None else None
+        elif field == 'category':
+            data[field] = {
+                'id': m['category__id'], 'name': m['category__name'], 'color': m['category__color']
+            } if m['category__id'] is not None else None
+        elif field == 'client_info':
+            data[field] = {
+                'name': m['client__name'],
+                'surname': m['client__surname'],
+                'email': m['client__email'],
+                'phone': m['client__phone'],
+                'company': m['client__company'] or '',
+                'reference_number': m['client__reference_number'] or f"CT{m['client__id']:06d}",
+                'images': _parse_client_images(m['client__images'], m['id'])
+            } if m['client__id'] is not None else None
+        elif field == 'sla_status':
+            data[field] = Ticket.sla_status_for(m['sla_resolution_due'], m['sla_resolution_breached']).value
+        elif field in ('comment_count', 'attachment_count'):
+            data[field] = m[field] or 0
+        else:
+            data[field] = m[field]
+    return data
+
+def ticket_related_version(ticket):
+    """Values a ticket's representation takes from its (already loaded) to-one relationships.
+    
+    Renaming a category or user, or editing the client submission, leaves the
+    ticket's own row and updated_at untouched, so these are versioned by value.
+    """
+    created_by, assigned_to, category, client = (
+        ticket.created_by, ticket.assigned_to, ticket.category, ticket.client_ticket
+    )
+    return [
+        created_by.username if created_by else None,
+        assigned_to.username if assigned_to else None,
+        [category.id, category.name, category.color] if category else None,
+        [getattr(client, name) for name in _CLIENT_INFO_COLUMNS] if client else None
+    ]
+
+def ticket_list_etag(cache_key, pagination_info, rows):
+    """ETag and Last-Modified for the ticket list page being served, before it is serialized.
+    
+    The page's rows and paging state are versioned under cache_key, which embeds
+    the list scope's invalidation generation; nothing beyond the page query is read.
+    Each ticket's computed sla_status is part of its version because it changes
+    with the clock even though its row (and updated_at) did not, and so are the
+    joined user, category and client values the body embeds.
+    """
+    versions = []
+    modified = []
+    for item in pagination_info['items']:
+        if rows:
+            # The projected values are the representation
+            values = item._mapping
+            version = list(item)
+            if 'sla_resolution_due' in values:
+                version.append(Ticket.sla_status_for(
+                    values['sla_resolution_due'], values.get('sla_resolution_breached')
+                ).value)
+            updated_at = values.get('updated_at')
+        else:
+            version = [
+                item.id, item.updated_at, item.get_sla_status().value, item.status, item.priority,
+                item.assigned_to_id, item.category_id, item.comment_count, item.attachment_count,
+                ticket_related_version(item)
+            ]
+            updated_at = item.updated_at
+        versions.append(version)
+        if updated_at is not None:
+            modified.append(updated_at)
+    paging = [pagination_info.get(key) for key in ('total', 'has_next', 'next_cursor')]
+    return make_etag(cache_key, versions, paging), max(modified, default=None)
+
+def ticket_etag(ticket):
+    """ETag for a single ticket's detail representation; archiving moves the row without touching updated_at"""
+    archived_at = getattr(ticket, 'archived_at', None)
+    return make_etag(
+        ticket.id, ticket.updated_at, ticket.get_sla_status().value, archived_at is not None, archived_at,
+        ticket_related_version(ticket)
+    )
 
 @bp.route('/tickets', methods=['GET'])
 @jwt_required()
@@ -20,9 +205,23 @@ def get_tickets():
             current_app.logger.error(f"User not found for ID: {current_user_id}")
             return jsonify({'message': 'User not found'}), 404
         
+        # Repeated polls with the same parameters are served from the response cache
+        params = ticket_list_params(request.args)
+        cache_key = cache.make_key(TICKET_LIST_NAMESPACE, ticket_list_scopes(user), params)
+        cached = cache.get(cache_key)
+        cached_etag = cache.get(f'{cache_key}:etag') if cached is not None else None
+        if cached_etag is not None:
+            if etag_matches(cached_etag):
+                return not_modified(cached_etag)
+            response = current_app.response_class(cached, mimetype='application/json', headers={'X-Cache': 'HIT'})
+            response.set_etag(cached_etag)
+            return response
+        
         # Get pagination parameters
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        cursor = request.args.get('cursor', '').strip()
+        count = parse_count_param(request.args.get('count'))
         
         # Get filter parameters
         status_filter = request.args.get('status')
@@ -30,16 +229,43 @@ def get_tickets():
         category_filter = request.args.get('category', type=int)
         assigned_to_filter = request.args.get('assigned_to', type=int)
         search = request.args.get('search', '').strip()
+        use_fulltext = bool(search) and fulltext.is_enabled()
         
-        # Build base query with proper eager loading
-        query = sa.select(Ticket).where(
-            Ticket.is_deleted == False
-        ).options(
-            sa.orm.joinedload(Ticket.created_by),
-            sa.orm.joinedload(Ticket.assigned_to),
-            sa.orm.joinedload(Ticket.category),
-            sa.orm.joinedload(Ticket.client_ticket)
-        )
+        # Sparse fieldset: a column-only select with no ORM hydration
+        fields = request.args.get('fields', '').strip()
+        fields = parse_fields_param(fields) if fields else None
+        
+        # Sorting; a cursor carries the sort it was issued for. Full-text
+        # searches rank by relevance unless an explicit sort is requested.
+        sort = request.args.get('sort', '').strip()
+        if cursor and not sort:
+            sort = decode_cursor(cursor)[0]
+        by_relevance = use_fulltext and sort in ('', RELEVANCE_SORT)
+        if by_relevance:
+            if cursor:
+                raise ValidationError("Relevance-ranked results are paged with page, not cursor")
+            sort = RELEVANCE_SORT
+        else:
+            sort_keys = parse_sort_param(sort or DEFAULT_TICKET_SORT, TICKET_SORT_COLUMNS)
+            sort = format_sort_param(sort_keys)
+            order = [(TICKET_SORT_COLUMNS[key], descending) for key, descending in sort_keys]
+        
+        if fields is not None:
+            # Sort columns ride along so the keyset cursor can be built from the row
+            query = ticket_projection_query(
+                fields, [] if by_relevance else [column for column, _ in order]
+            ).where(Ticket.is_deleted == False)
+        else:
+            # Build base query with proper eager loading
+            query = sa.select(Ticket).where(
+                Ticket.is_deleted == False
+            ).options(
+                sa.orm.joinedload(Ticket.created_by),
+                sa.orm.joinedload(Ticket.assigned_to),
+                sa.orm.joinedload(Ticket.category),
+                sa.orm.joinedload(Ticket.client_ticket)
+            )
+        rows = fields is not None
         
         # Apply filters
         if status_filter:
@@ -55,7 +281,10 @@ def get_tickets():
             query = query.where(Ticket.assigned_to_id == assigned_to_filter)
         
         # Apply search
-        if search:
+        if use_fulltext:
+            matches = fulltext.match_subquery(search)
+            query = query.join(matches, matches.c.ticket_id == Ticket.id)
+        elif search:
             search_term = f"%{search}%"
             query = query.where(
                 sa.or_(
@@ -74,112 +303,154 @@ def get_tickets():
                 )
             )
         
-        # Order by creation date (newest first)
-        query = query.order_by(Ticket.created_at.desc())
-        
-        # Execute query and get results
-        tickets_query = db.session.scalars(query)
-        
-        # Paginate results
-        pagination_info = paginate_query(tickets_query, page, per_page)
+        if by_relevance:
+            pagination_info = paginate_query(
+                query.order_by(matches.c.rank, Ticket.id), page, per_page, rows=rows, count=count
+            )
+            pagination_info['next_cursor'] = None
+        elif cursor:
+            # Keyset pagination: seek past the cursor, no OFFSET and no COUNT
+            pagination_info = keyset_paginate(query, order, Ticket.id, sort, cursor, per_page, rows=rows)
+        else:
+            columns = keyset_columns(order, Ticket.id)
+            pagination_info = paginate_query(
+                query.order_by(*keyset_order_by(columns)), page, per_page, rows=rows, count=count
+            )
+            pagination_info['next_cursor'] = (
+                keyset_cursor(pagination_info['items'][-1], sort, columns)
+                if pagination_info['has_next'] else None
+            )
         tickets = pagination_info['items']
         
+        # Conditional GET: an unchanged page costs the page query only, no serialization
+        etag, last_modified = ticket_list_etag(cache_key, pagination_info, rows)
+        if etag_matches(etag):
+            return not_modified(etag, last_modified)
+        
         current_app.logger.info(f"Found {len(tickets)} tickets for user {user.username}")
         
+        want_snippets = use_fulltext and (fields is None or 'search_snippet' in fields)
+        search_snippets = fulltext.snippets(search, [t.id for t in tickets]) if want_snippets else {}
+        
         tickets_data = []
-        for ticket in tickets:
-            try:
-                ticket_data = {
-                    'id': ticket.id,
-                    'ticket_number': getattr(ticket, 'ticket_number', f'TKT-{ticket.id}'),
-                    'title': ticket.title,
-                    'description': ticket.description,
-                    'status': ticket.status,
-                    'priority': ticket.priority,
-                    'created_at': ticket.created_at.isoformat() if ticket.created_at else None,
-                    'updated_at': ticket.updated_at.isoformat() if ticket.updated_at else None,
-                    'created_by': None,
-                    'assigned_to': None,
-                    'category': None,
-                    'client_info': None,
-                    'sla_status': None,
-                    'comment_count': 0,
-                    'attachment_count': 0
-                }
-                
-                # Safely handle created_by relationship
-                if ticket.created_by:
-                    ticket_data['created_by'] = {
-                        'id': ticket.created_by.id,
-                        'username': ticket.created_by.username
-                    }
-                
-                # Safely handle assigned_to relationship
-                if ticket.assigned_to:
-                    ticket_data['assigned_to'] = {
-                        'id': ticket.assigned_to.id,
-                        'username': ticket.assigned_to.username
-                    }
-                
-                # Safely handle category relationship
-                if hasattr(ticket, 'category') and ticket.category:
-                    ticket_data['category'] = {
-                        'id': ticket.category.id,
-                        'name': ticket.category.name,
-                        'color': ticket.category.color
+        if fields is not None:
+            for row in tickets:
+                ticket_data = project_ticket_row(row, fields)
+                if want_snippets:
+                    ticket_data['search_snippet'] = search_snippets.get(row.id)
+                tickets_data.append(ticket_data)
+        else:
+            for ticket in tickets:
+                try:
+                    ticket_data = {
+                        'id': ticket.id,
+                        'ticket_number': getattr(ticket, 'ticket_number', f'TKT-{ticket.id}'),
+                        'title': ticket.title,
+                        'description': ticket.description,
+                        'status': ticket.status,
+                        'priority': ticket.priority,
+                        'created_at': ticket.created_at,
+                        'updated_at': ticket.updated_at,
+                        'created_by': None,
+                        'assigned_to': None,
+                        'category': None,
+                        'client_info': None,
+                        'sla_status': None,
+                        'comment_count': 0,
+                        'attachment_count': 0
                     }
-                
-                # Safely handle client_ticket relationship
-                if ticket.client_ticket:
-                    try:
-                        images = json.loads(ticket.client_ticket.images) if ticket.client_ticket.images else []
-                    except (json.JSONDecodeError, TypeError) as e:
-                        current_app.logger.warning(f"Failed to parse images for ticket {ticket.id}: {e}")
-                        images = []
                     
-                    ticket_data['client_info'] = {
-                        'name': ticket.client_ticket.name,
-                        'surname': ticket.client_ticket.surname,
-                        'email': ticket.client_ticket.email,
-                        'phone': ticket.client_ticket.phone,
-                        'company': getattr(ticket.client_ticket, 'company', ''),
-                        'reference_number': getattr(ticket.client_ticket, 'reference_number', f'CT{ticket.client_ticket.id:06d}'),
-                        'images': images
-                    }
-                
-                # Add SLA status if available
-                if hasattr(ticket, 'get_sla_status'):
-                    ticket_data['sla_status'] = ticket.get_sla_status().value
-                
-                # Add counts if available
-                if hasattr(ticket, 'comments'):
-                    ticket_data['comment_count'] = len([c for c in ticket.comments if not c.is_deleted])
-                
-                if hasattr(ticket, 'attachments'):
-                    ticket_data['attachment_count'] = len(ticket.attachments)
-                
-                tickets_data.append(ticket_data)
-                
-            except Exception as e:
-                current_app.logger.error(f"Error processing ticket {ticket.id}: {str(e)}")
-                continue
+                    # Safely handle created_by relationship
+                    if ticket.created_by:
+                        ticket_data['created_by'] = {
+                            'id': ticket.created_by.id,
+                            'username': ticket.created_by.username
+                        }
+                    
+                    # Safely handle assigned_to relationship
+                    if ticket.assigned_to:
+                        ticket_data['assigned_to'] = {
+                            'id': ticket.assigned_to.id,
+                            'username': ticket.assigned_to.username
+                        }
+                    
+                    # Safely handle category relationship
+                    if hasattr(ticket, 'category') and ticket.category:
+                        ticket_data['category'] = {
+                            'id': ticket.category.id,
+                            'name': ticket.category.name,
+                            'color': ticket.category.color
+                        }
+                    
+                    # Safely handle client_ticket relationship
+                    if ticket.client_ticket:
+                        images = _parse_client_images(ticket.client_ticket.images, ticket.id)
+                    
+                        ticket_data['client_info'] = {
+                            'name': ticket.client_ticket.name,
+                            'surname': ticket.client_ticket.surname,
+                            'email': ticket.client_ticket.email,
+                            'phone': ticket.client_ticket.phone,
+                            'company': getattr(ticket.client_ticket, 'company', ''),
+                            'reference_number': getattr(ticket.client_ticket, 'reference_number', f'CT{ticket.client_ticket.id:06d}'),
+                            'images': images
+                        }
+                    
+                    # Add SLA status if available
+                    if hasattr(ticket, 'get_sla_status'):
+                        ticket_data['sla_status'] = ticket.get_sla_status().value
+                    
+                    if use_fulltext:
+                        ticket_data['search_snippet'] = search_snippets.get(ticket.id)
+                    
+                    # Denormalized counters, no child table access
+                    ticket_data['comment_count'] = ticket.comment_count or 0
+                    ticket_data['attachment_count'] = ticket.attachment_count or 0
+                    
+                    tickets_data.append(ticket_data)
+                    
+                except Exception as e:
+                    current_app.logger.error(f"Error processing ticket {ticket.id}: {str(e)}")
+                    continue
         
         current_app.logger.info(f"Successfully serialized {len(tickets_data)} tickets")
         
-        return jsonify({
-            'tickets': tickets_data,
-            'pagination': {
+        if cursor:
+            pagination = {
+                'per_page': pagination_info['per_page'],
+                'has_next': pagination_info['has_next'],
+                'next_cursor': pagination_info['next_cursor'],
+                'sort': sort
+            }
+        else:
+            pagination = {
                 'page': pagination_info['page'],
                 'per_page': pagination_info['per_page'],
                 'total': pagination_info['total'],
+                'count': pagination_info['count'],
                 'total_pages': pagination_info['total_pages'],
                 'has_prev': pagination_info['has_prev'],
                 'has_next': pagination_info['has_next'],
                 'prev_page': pagination_info['prev_page'],
-                'next_page': pagination_info['next_page']
+                'next_page': pagination_info['next_page'],
+                'next_cursor': pagination_info['next_cursor'],
+                'sort': sort
             }
-        }), 200
         
+        body = current_app.json.dumps({
+            'tickets': tickets_data,
+            'pagination': pagination
+        })
+        cache.set(cache_key, body)
+        cache.set(f'{cache_key}:etag', etag)
+        
+        response = current_app.response_class(body, mimetype='application/json', headers={'X-Cache': 'MISS'})
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        return response
+        
+    except ValidationError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Error in get_tickets: {str(e)}")
         return jsonify({'message': 'Internal server error occurred while fetching tickets'}), 500
@@ -235,21 +506,18 @@ def create_ticket():
             estimated_hours=data.get('estimated_hours')
         )
         
-        db.session.add(ticket)
-        db.session.flush()  # Get the ID
+        add_ticket(ticket)  # Get the ID
         
         # Create audit log
-        audit_log = AuditLog(
+        audit.record(
             action='CREATED',
             details=f"Created ticket: {title}",
             user_id=current_user_id,
-            ticket_id=ticket.id,
-            ip_address=get_client_ip(),
-            user_agent=get_user_agent()
+            ticket_id=ticket.id
         )
-        db.session.add(audit_log)
         
         db.session.commit()
+        invalidate_ticket_lists(cache, ticket.created_by_id, ticket.assigned_to_id)
         
         return jsonify({
             'message': 'Ticket created successfully',
@@ -278,6 +546,94 @@ def create_ticket():
         current_app.logger.error(f"Error creating ticket: {str(e)}")
         return jsonify({'message': 'Internal server error'}), 500
 
+# Related collections for ?include= on the ticket detail; each adds one selectinload query plus one for its users
+TICKET_INCLUDES = ('comments', 'attachments', 'watchers', 'audit')
+
+def parse_include_param(include):
+    """Parse ?include=a,b into a set of TICKET_INCLUDES"""
+    requested = {name.strip() for name in include.split(',') if name.strip()}
+    unknown = requested.difference(TICKET_INCLUDES)
+    if unknown:
+        raise ValidationError(
+            f"Unknown include: {', '.join(sorted(unknown))}. Allowed: {', '.join(TICKET_INCLUDES)}"
+        )
+    return requested
+
+def ticket_detail_options(includes, ticket_model=Ticket):
+    """Loader options for the ticket detail: to-one relationships joined, included collections select-in loaded.
+    
+    ticket_model is Ticket or ArchivedTicket, which has the same relationships.
+    """
+    comment, attachment, watcher, audit_log = (
+        ticket_model.comments, ticket_model.attachments, ticket_model.watchers, ticket_model.audit_logs
+    )
+    comment_model = comment.property.mapper.class_
+    options = [
+        sa.orm.joinedload(ticket_model.created_by),
+        sa.orm.joinedload(ticket_model.assigned_to),
+        sa.orm.joinedload(ticket_model.category),
+        sa.orm.joinedload(ticket_model.client_ticket)
+    ]
+    if 'comments' in includes:
+        options.append(
+            sa.orm.selectinload(comment.and_(comment_model.is_deleted == False))
+            .selectinload(comment_model.author)
+        )
+    if 'attachments' in includes:
+        options.append(
+            sa.orm.selectinload(attachment).selectinload(attachment.property.mapper.class_.uploaded_by)
+        )
+    if 'watchers' in includes:
+        options.append(sa.orm.selectinload(watcher).selectinload(watcher.property.mapper.class_.user))
+    if 'audit' in includes:
+        options.append(sa.orm.selectinload(audit_log).selectinload(audit_log.property.mapper.class_.user))
+    return options
+
+def ticket_includes(ticket, includes, user):
+    """The included collections' visible objects in response order, and the values their part of the
+    ETag is built from; nothing is serialized until the conditional GET has been answered
+    """
+    collections = {}
+    if 'comments' in includes:
+        # Same visibility as GET /tickets/<id>/comments
+        show_internal = user.is_admin or ticket.assigned_to_id == user.id
+        collections['comments'] = [c for c in ticket.comments if show_internal or not c.is_internal]
+    if 'attachments' in includes:
+        collections['attachments'] = sorted(ticket.attachments, key=lambda a: (a.uploaded_at, a.id))
+    if 'watchers' in includes:
+        collections['watchers'] = sorted(ticket.watchers, key=lambda w: (w.created_at, w.id))
+    if 'audit' in includes:
+        collections['audit'] = sorted(ticket.audit_logs, key=lambda log: (log.created_at, log.id))
+    versions = [
+        [(item.id, item.updated_at) if name == 'comments' else item.id for item in items]
+        for name, items in collections.items()
+    ]
+    return collections, versions
+
+def serialize_ticket_includes(collections):
+    """Response bodies of the collections returned by ticket_includes"""
+    included = {}
+    if 'comments' in collections:
+        included['comments'] = []
+        for comment in collections['comments']:
+            comment_data = comment.to_dict()
+            comment_data['time_ago'] = format_time_ago(comment.created_at)
+            included['comments'].append(comment_data)
+    if 'attachments' in collections:
+        included['attachments'] = [attachment.to_dict() for attachment in collections['attachments']]
+    if 'watchers' in collections:
+        included['watchers'] = [{
+            'id': watcher.id,
+            'created_at': watcher.created_at,
+            'user': {
+                'id': watcher.user.id,
+                'username': watcher.user.username
+            } if watcher.user else None
+        } for watcher in collections['watchers']]
+    if 'audit' in collections:
+        included['audit'] = [log.to_dict() for log in collections['audit']]
+    return included
+
 @bp.route('/tickets/<int:ticket_id>', methods=['GET'])
 @jwt_required()
 def get_ticket(ticket_id):
@@ -288,16 +644,42 @@ def get_ticket(ticket_id):
         if not user:
             return jsonify({'message': 'User not found'}), 404
         
-        ticket = db.session.get(Ticket, ticket_id)
+        includes = parse_include_param(request.args.get('include', ''))
+        if 'audit' in includes and not user.is_admin:
+            return jsonify({'message': 'Admin access required'}), 403
+        if 'audit' in includes:
+            # Events queued by this worker's requests are written first, so they are read back
+            audit.flush_pending()
+        
+        # One query for the ticket and its to-one relationships, two per included collection
+        ticket = db.session.scalar(
+            sa.select(Ticket).where(Ticket.id == ticket_id).options(*ticket_detail_options(includes))
+        )
+        if ticket is None:
+            # Archived tickets are served read-only from the archive tables
+            ticket = db.session.scalar(
+                sa.select(ArchivedTicket).where(ArchivedTicket.id == ticket_id)
+                .options(*ticket_detail_options(includes, ArchivedTicket))
+            )
+        archived = isinstance(ticket, ArchivedTicket)
         
         if not ticket or getattr(ticket, 'is_deleted', False):
             current_app.logger.warning(f"Ticket {ticket_id} not found")
             return jsonify({'message': 'Ticket not found'}), 404
         
         # Check permissions
-        if not user.is_admin and ticket.created_by_id != current_user_id and ticket.assigned_to_id != current_user_id:
+        if not user.is_admin and ticket.created_by_id != user.id and ticket.assigned_to_id != user.id:
             return jsonify({'message': 'Access denied'}), 403
         
+        collections, versions = ticket_includes(ticket, includes, user)
+        
+        # Conditional GET: answer before serializing
+        etag = ticket_etag(ticket)
+        if includes:
+            etag = make_etag(etag, sorted(includes), versions)
+        if etag_matches(etag):
+            return not_modified(etag, ticket.updated_at)
+        
         ticket_data = {
             'id': ticket.id,
             'ticket_number': getattr(ticket, 'ticket_number', f'TKT-{ticket.id}'),
@@ -305,10 +687,10 @@ def get_ticket(ticket_id):
             'description': ticket.description,
             'status': ticket.status,
             'priority': ticket.priority,
-            'created_at': ticket.created_at.isoformat() if ticket.created_at else None,
-            'updated_at': ticket.updated_at.isoformat() if ticket.updated_at else None,
-            'resolved_at': ticket.resolved_at.isoformat() if getattr(ticket, 'resolved_at', None) else None,
-            'closed_at': ticket.closed_at.isoformat() if getattr(ticket, 'closed_at', None) else None,
+            'created_at': ticket.created_at,
+            'updated_at': ticket.updated_at,
+            'resolved_at': getattr(ticket, 'resolved_at', None),
+            'closed_at': getattr(ticket, 'closed_at', None),
             'created_by': None,
             'assigned_to': None,
             'category': None,
@@ -341,12 +723,6 @@ def get_ticket(ticket_id):
             }
         
         if ticket.client_ticket:
-            try:
-                images = json.loads(ticket.client_ticket.images) if ticket.client_ticket.images else []
-            except (json.JSONDecodeError, TypeError) as e:
-                current_app.logger.warning(f"Failed to parse images for ticket {ticket.id}: {e}")
-                images = []
-            
             ticket_data['client_info'] = {
                 'name': ticket.client_ticket.name,
                 'surname': ticket.client_ticket.surname,
@@ -354,19 +730,188 @@ def get_ticket(ticket_id):
                 'phone': ticket.client_ticket.phone,
                 'company': getattr(ticket.client_ticket, 'company', ''),
                 'reference_number': getattr(ticket.client_ticket, 'reference_number', f'CT{ticket.client_ticket.id:06d}'),
-                'images': images
+                'images': _parse_client_images(ticket.client_ticket.images, ticket.id)
             }
         
         # Add SLA status if available
         if hasattr(ticket, 'get_sla_status'):
             ticket_data['sla_status'] = ticket.get_sla_status().value
         
-        return jsonify(ticket_data), 200
+        if archived:
+            ticket_data['archived'] = True
+            ticket_data['archived_at'] = ticket.archived_at
+        ticket_data.update(serialize_ticket_includes(collections))
+        
+        response = jsonify(ticket_data)
+        response.set_etag(etag)
+        response.last_modified = ticket.updated_at
+        return response, 200
         
+    except ValidationError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Error in get_ticket: {str(e)}")
         return jsonify({'message': 'Internal server error occurred while fetching ticket'}), 500
 
+# Entry types merged into a ticket timeline
+TIMELINE_TYPES = ('audit', 'comment')
+
+def _timeline_branch(entry_type, model, ticket_id, criteria, after, descending, limit):
+    """First `limit` entries of one type after the cursor, read in (ticket_id, created_at) index order"""
+    if entry_type == 'comment':
+        columns = (model.content, model.author_id, model.is_internal, sa.literal(None, sa.String))
+    else:
+        columns = (model.details, model.user_id, sa.literal(False, sa.Boolean), model.action)
+    query = sa.select(
+        sa.literal(entry_type, sa.String).label('type'),
+        model.id.label('id'),
+        model.created_at.label('created_at'),
+        *[column.label(name) for column, name in zip(columns, ('content', 'user_id', 'is_internal', 'action'))]
+    ).where(model.ticket_id == ticket_id, *criteria)
+    
+    if after is not None:
+        # Seek past (created_at, type, id); the type is constant within the branch
+        created_at, after_type, after_id = after
+        past, reached = (operator.lt, operator.le) if descending else (operator.gt, operator.ge)
+        if entry_type == after_type:
+            query = query.where(reached(model.created_at, created_at), sa.or_(
+                past(model.created_at, created_at),
+                sa.and_(model.created_at == created_at, past(model.id, after_id))
+            ))
+        elif past(entry_type, after_type):
+            query = query.where(reached(model.created_at, created_at))
+        else:
+            query = query.where(past(model.created_at, created_at))
+    
+    order = [model.created_at, model.id]
+    return query.order_by(*[c.desc() if descending else c.asc() for c in order]).limit(limit)
+
+@bp.route('/tickets/<int:ticket_id>/timeline', methods=['GET'])
+@jwt_required()
+def get_ticket_timeline(ticket_id):
+    """Comments and audit entries of a ticket merged by created_at, keyset paged.
+    
+    Each entry type contributes at most per_page + 1 rows read in index order
+    after the cursor, and the UNION ALL of those is merge-sorted in SQL, so a
+    page costs the same however long the ticket's history is.
+    """
+    try:
+        current_user_id = get_jwt_identity()
+        user = db.session.get(User, current_user_id)
+        
+        if not user:
+            return jsonify({'message': 'User not found'}), 404
+        
+        types = request.args.get('types', '').strip()
+        types = {t.strip() for t in types.split(',') if t.strip()} if types else None
+        if types is not None and types.difference(TIMELINE_TYPES):
+            raise ValidationError(f"Unknown types. Allowed: {', '.join(TIMELINE_TYPES)}")
+        if types is None:
+            # As with include=audit, audit entries are for admins
+            types = set(TIMELINE_TYPES) if user.is_admin else {'comment'}
+        elif 'audit' in types and not user.is_admin:
+            return jsonify({'message': 'Admin access required'}), 403
+        if 'audit' in types:
+            audit.flush_pending()
+        
+        ticket = db.session.get(Ticket, ticket_id)
+        models = {'comment': TicketComment, 'audit': AuditLog}
+        if ticket is None:
+            ticket = db.session.get(ArchivedTicket, ticket_id)
+            models = {name: ARCHIVED_MODELS[model] for name, model in models.items()}
+        
+        if not ticket or ticket.is_deleted:
+            return jsonify({'message': 'Ticket not found'}), 404
+        
+        if not user.is_admin and ticket.created_by_id != user.id and ticket.assigned_to_id != user.id:
+            return jsonify({'message': 'Access denied'}), 403
+        
+        order = request.args.get('order', 'asc')
+        if order not in ('asc', 'desc'):
+            raise ValidationError("order must be asc or desc")
+        descending = order == 'desc'
+        per_page = min(200, max(1, request.args.get('per_page', 50, type=int)))
+        
+        after = None
+        cursor = request.args.get('cursor', '').strip()
+        if cursor:
+            cursor_order, after = decode_cursor(cursor)
+            if cursor_order != order or len(after) != 3:
+                raise ValidationError("Cursor does not match the requested order")
+        
+        branches = []
+        if 'comment' in types:
+            comment = models['comment']
+            criteria = [comment.is_deleted == False]
+            # Internal notes are hidden from non-admins who are not assigned, as in get_ticket_comments
+            if not user.is_admin and ticket.assigned_to_id != user.id:
+                criteria.append(comment.is_internal == False)
+            branches.append(_timeline_branch('comment', comment, ticket_id, criteria, after, descending, per_page + 1))
+        if 'audit' in types:
+            branches.append(_timeline_branch('audit', models['audit'], ticket_id, [], after, descending, per_page + 1))
+        
+        entries = sa.union_all(*[sa.select(branch.subquery()) for branch in branches]).subquery('timeline')
+        order_by = [entries.c.created_at, entries.c.type, entries.c.id]
+        rows = db.session.execute(
+            sa.select(entries, User.username).outerjoin(User, User.id == entries.c.user_id)
+            .order_by(*[c.desc() if descending else c.asc() for c in order_by])
+            .limit(per_page + 1)
+        ).all()
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        
+        timeline = []
+        for row in rows:
+            entry = {
+                'type': row.type,
+                'id': row.id,
+                'created_at': row.created_at,
+                'user': {'id': row.user_id, 'username': row.username} if row.user_id is not None else None
+            }
+            if row.type == 'comment':
+                entry.update(content=row.content, is_internal=bool(row.is_internal))
+            else:
+                entry.update(action=row.action, details=row.content)
+            timeline.append(entry)
+        
+        return jsonify({
+            'ticket_id': ticket_id,
+            'timeline': timeline,
+            'pagination': {
+                'per_page': per_page,
+                'has_next': has_next,
+                'next_cursor': encode_cursor(order, [rows[-1].created_at, rows[-1].type, rows[-1].id]) if has_next else None,
+                'order': order
+            }
+        }), 200
+        
+    except ValidationError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error getting timeline for ticket {ticket_id}: {str(e)}")
+        return jsonify({'message': 'Internal server error'}), 500
+
+@bp.route('/tickets/<int:ticket_id>/unarchive', methods=['POST'])
+@jwt_required()
+def unarchive_ticket(ticket_id):
+    """Move an archived ticket and its history back to the live tables (admin only)"""
+    try:
+        current_user_id = get_jwt_identity()
+        user = db.session.get(User, current_user_id)
+        
+        if not user or not user.is_admin:
+            return jsonify({'message': 'Admin access required'}), 403
+        
+        if not unarchive_tickets([ticket_id], user_id=user.id):
+            return jsonify({'message': 'Archived ticket not found'}), 404
+        
+        return jsonify({'message': 'Ticket restored from archive', 'ticket_id': ticket_id}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error unarchiving ticket {ticket_id}: {str(e)}")
+        return jsonify({'message': 'Internal server error'}), 500
+
 @bp.route('/tickets/<int:ticket_id>', methods=['PUT'])
 @jwt_required()
 def update_ticket(ticket_id):
@@ -388,6 +933,7 @@ def update_ticket(ticket_id):
     
     try:
         changes = []
+        previous_assignee_id = ticket.assigned_to_id
         
         # Update fields if provided and valid
         if 'title' in data:
@@ -464,17 +1010,15 @@ def update_ticket(ticket_id):
         
         # Create audit log if there were changes
         if changes:
-            audit_log = AuditLog(
+            audit.record(
                 action='UPDATED',
                 details='; '.join(changes),
                 user_id=current_user_id,
-                ticket_id=ticket_id,
-                ip_address=get_client_ip(),
-                user_agent=get_user_agent()
+                ticket_id=ticket_id
             )
-            db.session.add(audit_log)
         
         db.session.commit()
+        invalidate_ticket_lists(cache, ticket.created_by_id, ticket.assigned_to_id, previous_assignee_id)
         
         # Return updated ticket data
         return jsonify({
@@ -504,6 +1048,254 @@ def update_ticket(ticket_id):
         current_app.logger.error(f"Error updating ticket {ticket_id}: {str(e)}")
         return jsonify({'message': 'Internal server error'}), 500
 
+# Bulk mutations: ids (or a filter) plus one change set applied to every matching ticket
+BULK_MAX_TICKETS = 1000
+BULK_FILTER_COLUMNS = {
+    'status': Ticket.status,
+    'priority': Ticket.priority,
+    'category_id': Ticket.category_id,
+    'assigned_to_id': Ticket.assigned_to_id,
+    'created_by_id': Ticket.created_by_id
+}
+BULK_CHANGE_FIELDS = ('status', 'priority', 'assigned_to_id', 'category_id', 'is_deleted')
+
+def _bulk_filter_criteria(filters):
+    """WHERE criteria for a bulk filter: {column: value | null | [values]}"""
+    if not isinstance(filters, dict) or not filters:
+        raise ValidationError("filter must be a non-empty object")
+    unknown = set(filters).difference(BULK_FILTER_COLUMNS)
+    if unknown:
+        raise ValidationError(
+            f"Unknown filter keys: {', '.join(sorted(unknown))}. Allowed: {', '.join(BULK_FILTER_COLUMNS)}"
+        )
+    criteria = []
+    for key, value in filters.items():
+        column = BULK_FILTER_COLUMNS[key]
+        if value is None:
+            criteria.append(column.is_(None))
+        elif isinstance(value, list):
+            for item in value:
+                _check_bulk_filter_value(key, column, item)
+            criteria.append(column.in_(value))
+        else:
+            _check_bulk_filter_value(key, column, value)
+            criteria.append(column == value)
+    return criteria
+
+def _check_bulk_filter_value(key, column, value):
+    expected = column.type.python_type
+    # bool is an int subclass, but true/false is no id
+    if isinstance(value, bool) or not isinstance(value, expected):
+        kind = 'an integer' if expected is int else 'a string'
+        raise ValidationError(f"filter.{key} must be {kind}, null or a list of those")
+
+def _bulk_ticket_ids(ids):
+    if not isinstance(ids, list) or not ids:
+        raise ValidationError("ids must be a non-empty list")
+    if len(ids) > BULK_MAX_TICKETS:
+        raise ValidationError(f"At most {BULK_MAX_TICKETS} tickets can be updated at once")
+    # As in filters, true/false, 1.5 and "1" are no ids
+    if any(isinstance(i, bool) or not isinstance(i, int) for i in ids):
+        raise ValidationError("ids must be integers")
+    return list(dict.fromkeys(ids))
+
+def _bulk_changes(data, user):
+    """Validate the requested change set; returns (changes, new assignee, new category)"""
+    if not isinstance(data, dict):
+        raise ValidationError("changes must be an object")
+    changes = {field: data[field] for field in BULK_CHANGE_FIELDS if field in data}
+    if not changes:
+        raise ValidationError(f"No changes given. Allowed: {', '.join(BULK_CHANGE_FIELDS)}")
+    
+    if 'status' in changes and changes['status'] not in [s.value for s in TicketStatus]:
+        raise ValidationError("Invalid status")
+    if 'priority' in changes and (not isinstance(changes['priority'], str) or changes['priority'] not in PRIORITY_RANK):
+        raise ValidationError("Invalid priority")
+    if 'is_deleted' in changes:
+        if not isinstance(changes['is_deleted'], bool):
+            raise ValidationError("is_deleted must be a boolean")
+        if not user.is_admin:
+            raise ValidationError("Only admins can delete or restore tickets")
+    
+    for field in ('assigned_to_id', 'category_id'):
+        if field in changes and changes[field] is not None and (
+            isinstance(changes[field], bool) or not isinstance(changes[field], int)
+        ):
+            raise ValidationError(f"{field} must be an integer or null")
+    
+    assignee = category = None
+    if 'assigned_to_id' in changes:
+        changes['assigned_to_id'] = changes['assigned_to_id'] or None
+        if changes['assigned_to_id']:
+            assignee = db.session.get(User, changes['assigned_to_id'])
+            if not assignee or not assignee.is_active:
+                raise ValidationError("Invalid assigned user")
+    if 'category_id' in changes:
+        changes['category_id'] = changes['category_id'] or None
+        if changes['category_id']:
+            category = db.session.get(TicketCategory, changes['category_id'])
+            if not category or not category.is_active:
+                raise ValidationError("Invalid category")
+    return changes, assignee, category
+
+def _describe_bulk_change(row, changes, assignee, category):
+    """Audit descriptions of the changes that actually apply to row (same wording as update_ticket)"""
+    described = []
+    if 'status' in changes and changes['status'] != row.status:
+        described.append(f"Status changed from '{row.status}' to '{changes['status']}'")
+    if 'priority' in changes and changes['priority'] != row.priority:
+        described.append(f"Priority changed from '{row.priority}' to '{changes['priority']}'")
+    if 'assigned_to_id' in changes and changes['assigned_to_id'] != row.assigned_to_id:
+        described.append(f"Assigned to {assignee.username}" if assignee else "Unassigned")
+    if 'category_id' in changes and changes['category_id'] != row.category_id:
+        described.append(f"Category changed to {category.name}" if category else "Category removed")
+    if 'is_deleted' in changes and changes['is_deleted'] != row.is_deleted:
+        described.append("Ticket deleted" if changes['is_deleted'] else "Ticket restored")
+    return described
+
+@bp.route('/tickets/bulk', methods=['PATCH'])
+@jwt_required()
+def bulk_update_tickets():
+    """Apply one change set to many tickets in a single transaction"""
+    current_user_id = get_jwt_identity()
+    user = db.session.get(User, current_user_id)
+    
+    if not user:
+        return jsonify({'message': 'User not found'}), 404
+    
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        if not isinstance(data, dict):
+            raise ValidationError("Request body must be an object")
+        changes, assignee, category = _bulk_changes(data.get('changes') or {}, user)
+        
+        # Restoring has to see deleted tickets; everything else only touches live ones
+        query = sa.select(
+            Ticket.id, Ticket.status, Ticket.priority, Ticket.assigned_to_id, Ticket.category_id,
+            Ticket.created_by_id, Ticket.created_at, Ticket.is_deleted
+        )
+        if changes.get('is_deleted') is not False:
+            query = query.where(Ticket.is_deleted == False)
+        
+        if 'ids' in data:
+            ids = _bulk_ticket_ids(data['ids'])
+            query = query.where(Ticket.id.in_(ids))
+        elif 'filter' in data:
+            ids = None
+            query = query.where(*_bulk_filter_criteria(data['filter'])).order_by(Ticket.id).limit(BULK_MAX_TICKETS + 1)
+            if not user.is_admin:
+                query = query.where(sa.or_(Ticket.created_by_id == user.id, Ticket.assigned_to_id == user.id))
+        else:
+            raise ValidationError("Either ids or filter is required")
+    except ValidationError as e:
+        return jsonify({'message': str(e)}), 400
+    
+    try:
+        rows = {row.id: row for row in db.session.execute(query.with_for_update())}
+        if ids is None:
+            if len(rows) > BULK_MAX_TICKETS:
+                return jsonify({
+                    'message': f'Filter matches more than {BULK_MAX_TICKETS} tickets; narrow it or pass ids'
+                }), 400
+            ids = list(rows)
+        
+        now = datetime.utcnow()
+        results = []
+        changed = {}
+        for ticket_id in ids:
+            row = rows.get(ticket_id)
+            if row is None:
+                results.append({'id': ticket_id, 'result': 'not_found'})
+            elif not user.is_admin and user.id not in (row.created_by_id, row.assigned_to_id):
+                results.append({'id': ticket_id, 'result': 'forbidden'})
+            else:
+                described = _describe_bulk_change(row, changes, assignee, category)
+                if described:
+                    changed[ticket_id] = described
+                results.append({
+                    'id': ticket_id,
+                    'result': 'updated' if described else 'unchanged',
+                    'changes': described
+                })
+        
+        if changed:
+            changed_ids = list(changed)
+            values = {'updated_at': now}
+            if 'status' in changes:
+                # Stamp resolved/closed only on tickets entering that status, as update_ticket does
+                values['status'] = changes['status']
+                if changes['status'] == 'Resolved':
+                    values['resolved_at'] = sa.case((Ticket.status != 'Resolved', now), else_=Ticket.resolved_at)
+                elif changes['status'] == 'Closed':
+                    values['closed_at'] = sa.case((Ticket.status != 'Closed', now), else_=Ticket.closed_at)
+            if 'priority' in changes:
+                values['priority'] = changes['priority']
+                values['priority_rank'] = PRIORITY_RANK[changes['priority']]
+            for field in ('assigned_to_id', 'category_id', 'is_deleted'):
+                if field in changes:
+                    values[field] = changes[field]
+            
+            rollup_before = rollups.contributions(Ticket.id.in_(changed_ids))
+            db.session.execute(
+                sa.update(Ticket).where(Ticket.id.in_(changed_ids)).values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            
+            # SLA due dates follow the new category, relative to each ticket's creation time
+            if category is not None:
+                sla_rows = []
+                for ticket_id in changed_ids:
+                    created_at = rows[ticket_id].created_at
+                    if rows[ticket_id].category_id == category.id or not created_at:
+                        continue
+                    sla_row = {'id': ticket_id}
+                    if category.sla_response_hours:
+                        sla_row['sla_response_due'] = created_at + timedelta(hours=category.sla_response_hours)
+                    if category.sla_resolution_hours:
+                        sla_row['sla_resolution_due'] = created_at + timedelta(hours=category.sla_resolution_hours)
+                    if len(sla_row) > 1:
+                        sla_rows.append(sla_row)
+                if sla_rows:
+                    db.session.execute(sa.update(Ticket), sla_rows)
+            
+            # Set-based writes skip the Ticket mapper events that maintain the durations, work queues
+            # and daily rollup (which reads the durations)
+            if 'resolved_at' in values:
+                refresh_ticket_durations(Ticket.id.in_(changed_ids))
+            refresh_ticket_queues(Ticket.id.in_(changed_ids))
+            rollups.apply_changes(rollup_before, Ticket.id.in_(changed_ids))
+            
+            # The audit writer batches these into one insert
+            for ticket_id, described in changed.items():
+                audit.record(
+                    action='DELETED' if changes.get('is_deleted') else 'UPDATED',
+                    details='Bulk update: ' + '; '.join(described),
+                    user_id=user.id,
+                    ticket_id=ticket_id
+                )
+        
+        db.session.commit()
+        
+        if changed:
+            affected = {rows[i].created_by_id for i in changed} | {rows[i].assigned_to_id for i in changed}
+            invalidate_ticket_lists(cache, *affected, changes.get('assigned_to_id'))
+        
+        summary = {'requested': len(ids)}
+        for outcome in ('updated', 'unchanged', 'not_found', 'forbidden'):
+            summary[outcome] = sum(1 for r in results if r['result'] == outcome)
+        
+        return jsonify({
+            'message': f"{summary['updated']} tickets updated",
+            'summary': summary,
+            'results': results
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error in bulk ticket update: {str(e)}")
+        return jsonify({'message': 'Internal server error'}), 500
+
 @bp.route('/tickets/<int:ticket_id>/reply', methods=['POST'])
 @jwt_required()
 def reply_to_ticket(ticket_id):
@@ -2,7 +2,8 @@ from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.api import bp
 from app.models import User
-from app import db
+from app import db, cache
+from app.caching import invalidate_all_ticket_lists
 import sqlalchemy as sa
 
 @bp.route('/users', methods=['GET'])
@@ -48,6 +49,7 @@ def update_profile():
     if not user:
         return jsonify({'message': 'User not found'}), 404
     
+    renamed = 'username' in data and data['username'] != user.username
     if 'username' in data:
         # Check if username is already taken
         existing_user = db.session.scalar(sa.select(User).where(User.username == data['username']))
@@ -66,6 +68,9 @@ def update_profile():
         user.about_me = data['about_me']
     
     db.session.commit()
+    if renamed:
+        # Ticket list bodies embed creator and assignee usernames
+        invalidate_all_ticket_lists(cache)
     
     return jsonify({
         'message': 'Profile updated successfully',
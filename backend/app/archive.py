@@ -0,0 +1,128 @@
+"""Hot/cold archival of tickets.
+
+archive_tickets() moves tickets closed more than ARCHIVE_AFTER_DAYS ago, and
+soft-deleted tickets untouched for as long, into the archived_* tables together
+with their comments, attachment metadata, watchers, client submission and audit
+rows. Each chunk of tickets is copied with INSERT ... SELECT and deleted from the
+live tables in its own transaction, so the live tables and their indexes only
+hold the working set. GET /api/tickets/<id> falls back to the archive
+(see models.ArchivedTicket) and unarchive_tickets() moves tickets back.
+"""
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+from app import db, cache, audit
+from app.caching import invalidate_ticket_lists
+from app.models import Ticket, ARCHIVED_MODELS, refresh_ticket_queues
+
+
+def _ticket_column(model):
+    return model.id if model in (Ticket, ARCHIVED_MODELS[Ticket]) else model.ticket_id
+
+
+def _copy(source, target, ticket_ids, archived_at=None):
+    """INSERT INTO target SELECT ... FROM source for ticket_ids' rows; returns the row count"""
+    source_table, target_table = source.__table__, target.__table__
+    names = [column.name for column in target_table.columns if column.name in source_table.columns]
+    columns = [source_table.c[name] for name in names]
+    if archived_at is not None:
+        names.append('archived_at')
+        columns.append(sa.literal(archived_at, sa.DateTime).label('archived_at'))
+    select = sa.select(*columns).where(_ticket_column(source).in_(ticket_ids))
+    return db.session.execute(target_table.insert().from_select(names, select)).rowcount
+
+
+def _delete(model, ticket_ids):
+    return db.session.execute(
+        sa.delete(model.__table__).where(_ticket_column(model).in_(ticket_ids))
+    ).rowcount
+
+
+def _move(ticket_ids, restore=False):
+    """Move tickets and their child rows between the live and archive tables; the caller commits"""
+    archived_at = None if restore else datetime.utcnow()
+    pairs = [(archive, live) if restore else (live, archive) for live, archive in ARCHIVED_MODELS.items()]
+    moved = {}
+    # Parents are inserted first and deleted last
+    for source, target in pairs:
+        moved[source.__tablename__] = _copy(source, target, ticket_ids, archived_at)
+    for source, _ in reversed(pairs):
+        _delete(source, ticket_ids)
+    return moved
+
+
+def _rowid_guard():
+    """Tickets owning the highest id of a live table; SQLite hands that id out again once deleted"""
+    guarded = sa.select(sa.func.max(Ticket.id)).scalar_subquery()
+    criteria = [Ticket.id != guarded]
+    for model in ARCHIVED_MODELS:
+        if model is Ticket:
+            continue
+        newest = sa.select(model.ticket_id).where(
+            model.id == sa.select(sa.func.max(model.id)).scalar_subquery()
+        )
+        criteria.append(Ticket.id.not_in(newest.where(model.ticket_id.is_not(None))))
+    return criteria
+
+
+def archivable_ticket_ids(cutoff, after_id=0, limit=500):
+    """Next chunk of archivable ticket ids, in id order"""
+    query = sa.select(Ticket.id).where(
+        Ticket.id > after_id,
+        sa.or_(
+            sa.and_(Ticket.status == 'Closed', Ticket.closed_at < cutoff),
+            sa.and_(Ticket.is_deleted == True, Ticket.updated_at < cutoff)
+        )
+    ).order_by(Ticket.id).limit(limit)
+    if db.engine.dialect.name == 'sqlite':
+        query = query.where(*_rowid_guard())
+    return db.session.scalars(query).all()
+
+
+def archive_tickets(older_than_days, chunk_size=500, limit=None, progress=None):
+    """Archive eligible tickets chunk by chunk, committing each chunk; returns the number archived"""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    archived = 0
+    # Queued audit rows for these tickets must reach the live table before it is archived
+    audit.flush()
+    after_id = 0
+    while limit is None or archived < limit:
+        size = chunk_size if limit is None else min(chunk_size, limit - archived)
+        ticket_ids = archivable_ticket_ids(cutoff, after_id, size)
+        if not ticket_ids:
+            break
+        users = db.session.execute(
+            sa.select(Ticket.created_by_id, Ticket.assigned_to_id).where(Ticket.id.in_(ticket_ids))
+        ).all()
+        moved = _move(ticket_ids)
+        audit.record(
+            action='ARCHIVED',
+            details=f"Archived {len(ticket_ids)} tickets ({ticket_ids[0]}-{ticket_ids[-1]}), "
+                    f"{moved['ticket_comment']} comments, {moved['audit_log']} audit rows"
+        )
+        db.session.commit()
+        invalidate_ticket_lists(cache, *{user_id for row in users for user_id in row})
+        archived += len(ticket_ids)
+        after_id = ticket_ids[-1]
+        if progress:
+            progress(archived, moved)
+    return archived
+
+
+def unarchive_tickets(ticket_ids, user_id=None):
+    """Move archived tickets back to the live tables in one transaction; returns the ids restored"""
+    archive = ARCHIVED_MODELS[Ticket]
+    found = db.session.execute(
+        sa.select(archive.id, archive.created_by_id, archive.assigned_to_id).where(archive.id.in_(ticket_ids))
+    ).all()
+    restored = [row.id for row in found]
+    if not restored:
+        return []
+    _move(restored, restore=True)
+    refresh_ticket_queues(Ticket.id.in_(restored))
+    for ticket_id in restored:
+        audit.record(action='UNARCHIVED', details='Restored from archive', user_id=user_id, ticket_id=ticket_id)
+    db.session.commit()
+    invalidate_ticket_lists(cache, *{user for row in found for user in (row.created_by_id, row.assigned_to_id)})
+    return restored
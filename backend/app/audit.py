@@ -0,0 +1,399 @@
+"""Audit log pipeline.
+
+Endpoints call audit.record(...) instead of adding AuditLog rows to their own
+transaction. In 'async' mode (the default) events are held on the session until
+it commits, so rolled-back work is never audited, then queued in memory and
+bulk-inserted in batches by a background flusher thread per worker. Setting
+AUDIT_SPOOL_DIR also appends every queued event to a local spool file that is
+replayed on the next start if the process dies before flushing it (delivery is
+then at-least-once). 'sync' mode adds the row to the current session as before,
+for tests and one-off scripts.
+
+A batch the database rejects is bisected down to the offending rows, which are
+appended to AUDIT_DEAD_LETTER_FILE so they cannot block the events behind them.
+Connection and locking errors leave the unwritten events queued for the next
+flush instead.
+
+Events only reach the database on the next flush, so reads that return audit
+rows (GET /api/tickets/<id>?include=audit, the timeline) call flush_pending()
+first: a client then sees its own actions. Events queued by other workers
+still appear up to AUDIT_FLUSH_INTERVAL seconds late.
+
+Each app keeps its queue, spool and flusher in app.extensions['audit'] (an
+AuditQueue); the module-level AuditLogWriter resolves it from current_app.
+
+metrics() reports queue depth, the age of the oldest queued event, the lag of
+the last flush and the number of dead-lettered events.
+"""
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import sqlalchemy as sa
+from flask import current_app, has_request_context
+
+USER_AGENT_MAX_LENGTH = 255
+SESSION_KEY = 'audit_events'
+# The database could not be reached or was busy: retry later rather than dead-letter
+TRANSIENT_ERRORS = (sa.exc.OperationalError, sa.exc.InterfaceError)
+
+
+def _encode(row):
+    return json.dumps({**row, 'created_at': row['created_at'].isoformat()}, default=str)
+
+
+def _decode(line):
+    row = json.loads(line)
+    row['created_at'] = datetime.fromisoformat(row['created_at'])
+    return row
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class AuditSpool:
+    """Append-only NDJSON segments under a directory, one active segment per process"""
+
+    def __init__(self, directory, fsync=True):
+        self.directory = directory
+        self.fsync = fsync
+        self._file = None
+        self._sequence = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, suffix):
+        return os.path.join(self.directory, f'{os.getpid()}-{self._sequence}.{suffix}')
+
+    def append(self, rows):
+        if self._file is None:
+            self._file = open(self._path('ndjson'), 'a', encoding='utf-8')
+        self._file.write(''.join(_encode(row) + '\n' for row in rows))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def rotate(self):
+        """Close the active segment; returns its path (None when nothing was written)"""
+        if self._file is None:
+            return None
+        self._file.close()
+        self._file = None
+        path = self._path('ndjson')
+        self._sequence += 1
+        return path
+
+    def reset(self):
+        """Forget the active segment inherited from a parent process"""
+        self._file = None
+        self._sequence = 0
+
+    def claim_orphans(self):
+        """Take over segments left behind by processes that are no longer running"""
+        claimed = []
+        for path in sorted(glob.glob(os.path.join(self.directory, '*.ndjson'))):
+            pid = int(os.path.basename(path).split('-', 1)[0])
+            if pid == os.getpid() or _pid_alive(pid):
+                continue
+            target = self._path(f'recovered-{len(claimed)}.ndjson')
+            try:
+                # The rename is atomic, so exactly one worker replays each segment
+                os.rename(path, target)
+            except FileNotFoundError:
+                continue
+            claimed.append(target)
+        return claimed
+
+    @staticmethod
+    def read(path):
+        with open(path, encoding='utf-8') as f:
+            # A torn last line from a crash mid-write is skipped
+            rows = []
+            for line in f:
+                try:
+                    rows.append(_decode(line))
+                except ValueError:
+                    continue
+            return rows
+
+    def count(self):
+        return len(glob.glob(os.path.join(self.directory, '*.ndjson')))
+
+
+class _FlushInterrupted(Exception):
+    """A transient database error stopped a flush after `handled` of its events (in queue order)"""
+
+    def __init__(self, handled, error):
+        super().__init__(str(error))
+        self.handled = handled
+        self.error = error
+
+
+class AuditLogWriter:
+    """Flask extension recording audit events into the current app's AuditQueue"""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from app import db
+
+        app.extensions['audit'] = AuditQueue(app)
+        if not sa.event.contains(db.session, 'after_commit', _after_commit):
+            sa.event.listen(db.session, 'after_commit', _after_commit)
+            sa.event.listen(db.session, 'after_soft_rollback', _after_rollback)
+
+    @staticmethod
+    def _queue():
+        return current_app.extensions['audit']
+
+    def record(self, action, details=None, user_id=None, ticket_id=None, ip_address=None, user_agent=None):
+        """Audit an action; written once (and only if) the current transaction commits"""
+        from app import db
+        from app.models import AuditLog
+        from app.utils import get_client_ip, get_user_agent
+
+        if has_request_context():
+            ip_address = ip_address or get_client_ip()
+            user_agent = user_agent or get_user_agent()
+        row = {
+            'action': action,
+            'details': details,
+            'user_id': int(user_id) if user_id is not None else None,
+            'ticket_id': ticket_id,
+            'ip_address': ip_address,
+            'user_agent': user_agent[:USER_AGENT_MAX_LENGTH] if user_agent else None,
+            'created_at': datetime.utcnow()
+        }
+        if self._queue().mode == 'sync':
+            db.session.add(AuditLog(**row))
+        else:
+            db.session.info.setdefault(SESSION_KEY, []).append(row)
+
+    def enqueue(self, rows):
+        self._queue().enqueue(rows)
+
+    def flush(self):
+        return self._queue().flush()
+
+    def flush_pending(self):
+        """Write the events this worker has queued before a read that returns audit rows"""
+        queue = self._queue()
+        if queue.mode != 'sync':
+            queue.flush_quietly()
+
+    def metrics(self):
+        return self._queue().metrics()
+
+
+def _after_commit(session):
+    rows = session.info.pop(SESSION_KEY, None)
+    if rows:
+        current_app.extensions['audit'].enqueue(rows)
+
+
+def _after_rollback(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(SESSION_KEY, None)
+
+
+class AuditQueue:
+    """One app's queued audit events, spool and background flusher"""
+
+    def __init__(self, app):
+        self.app = app
+        self.mode = app.config.get('AUDIT_MODE', 'async')
+        self.batch_size = app.config.get('AUDIT_BATCH_SIZE', 500)
+        self.flush_interval = app.config.get('AUDIT_FLUSH_INTERVAL', 1.0)
+        self.queue_max = app.config.get('AUDIT_QUEUE_MAX', 10000)
+        spool_dir = app.config.get('AUDIT_SPOOL_DIR')
+        self.spool = AuditSpool(spool_dir, app.config.get('AUDIT_SPOOL_FSYNC', True)) if spool_dir else None
+        self.dead_letter_file = app.config.get('AUDIT_DEAD_LETTER_FILE')
+        self._queue = deque()
+        self._segments = []  # spool segments whose events are queued but not yet committed
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._exit_hook = False
+        self._stats = {
+            'flushed_total': 0, 'failed_flushes': 0, 'dead_lettered_total': 0, 'last_flush_at': None,
+            'last_flush_size': 0, 'last_flush_lag_seconds': None
+        }
+
+    def enqueue(self, rows):
+        """Queue committed events for the flusher"""
+        self._ensure_flusher()
+        now = time.monotonic()
+        with self._lock:
+            if self.spool is not None:
+                self.spool.append(rows)
+            self._queue.extend((now, row) for row in rows)
+            depth = len(self._queue)
+        if depth >= self.queue_max:
+            # Back-pressure: the caller writes the backlog rather than let the queue grow unbounded.
+            # This runs in after_commit, so a failure is logged (the events stay queued), never raised
+            self.flush_quietly()
+        elif depth >= self.batch_size:
+            self._wakeup.set()
+
+    def _ensure_flusher(self):
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: the parent's queue and flusher thread are not ours
+                self._queue.clear()
+                self._segments = []
+                self._pid = os.getpid()
+                self._thread = None
+                if self.spool is not None:
+                    self.spool.reset()
+                    self._segments = self.spool.claim_orphans()
+                    for path in self._segments:
+                        self._queue.extend((time.monotonic(), row) for row in AuditSpool.read(path))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='audit-flusher', daemon=True)
+                self._thread.start()
+                if not self._exit_hook:
+                    atexit.register(self.flush_quietly)
+                    self._exit_hook = True
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush_quietly()
+
+    def flush_quietly(self):
+        try:
+            self.flush()
+        except Exception as e:
+            # Events stay queued (and spooled) for the next attempt
+            self.app.logger.error(f"Audit log flush failed: {str(e)}")
+
+    def flush(self):
+        """Write every queued event now; returns the number written. Raises (with the unwritten
+        events requeued) when the database cannot be reached.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._queue:
+                    return 0
+                batch = list(self._queue)
+                self._queue.clear()
+                if self.spool is not None:
+                    segment = self.spool.rotate()
+                    if segment:
+                        self._segments.append(segment)
+                segments, self._segments = self._segments, []
+
+            oldest = batch[0][0]
+            rows = [row for _, row in batch]
+            rejected = []
+            try:
+                self._write(rows, rejected)
+            except _FlushInterrupted as e:
+                self._dead_letter(rejected)
+                # Put the unwritten events back in front so the next flush retries them in order
+                with self._lock:
+                    self._queue.extendleft(reversed(batch[e.handled:]))
+                    self._segments = segments + self._segments
+                    self._stats['failed_flushes'] += 1
+                raise e.error
+            self._dead_letter(rejected)
+            written = len(rows) - len(rejected)
+
+            for path in segments:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            with self._lock:
+                self._stats.update(
+                    flushed_total=self._stats['flushed_total'] + written,
+                    last_flush_at=datetime.utcnow(),
+                    last_flush_size=written,
+                    last_flush_lag_seconds=round(time.monotonic() - oldest, 3)
+                )
+            return written
+
+    def _insert(self, rows):
+        from app import db
+        from app.models import AuditLog
+
+        with self.app.app_context():
+            try:
+                for start in range(0, len(rows), self.batch_size):
+                    db.session.execute(sa.insert(AuditLog), rows[start:start + self.batch_size])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+    def _write(self, rows, rejected):
+        """Insert rows in order, bisecting a batch the database rejects until the offending rows are
+        isolated in rejected; returns the number of rows handled (written or rejected), or raises
+        _FlushInterrupted with that number on a transient error
+        """
+        try:
+            self._insert(rows)
+            return len(rows)
+        except TRANSIENT_ERRORS as e:
+            raise _FlushInterrupted(0, e)
+        except Exception as e:
+            if len(rows) == 1:
+                rejected.append((rows[0], e))
+                return 1
+        middle = len(rows) // 2
+        handled = self._write(rows[:middle], rejected)
+        try:
+            return handled + self._write(rows[middle:], rejected)
+        except _FlushInterrupted as e:
+            raise _FlushInterrupted(handled + e.handled, e.error)
+
+    def _dead_letter(self, rejected):
+        if not rejected:
+            return
+        with self._lock:
+            self._stats['dead_lettered_total'] += len(rejected)
+        lines = ''.join(
+            json.dumps({'event': row, 'error': str(error).splitlines()[0]}, default=str) + '\n'
+            for row, error in rejected
+        )
+        self.app.logger.error(f"Audit log: {len(rejected)} event(s) rejected by the database, dead-lettered")
+        if not self.dead_letter_file:
+            self.app.logger.error(f"Audit log dead letters: {lines}")
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.dead_letter_file)), exist_ok=True)
+            with open(self.dead_letter_file, 'a', encoding='utf-8') as f:
+                f.write(lines)
+        except OSError as e:
+            self.app.logger.error(f"Audit log dead letters could not be written ({str(e)}): {lines}")
+
+    def metrics(self):
+        with self._lock:
+            depth = len(self._queue)
+            oldest = self._queue[0][0] if depth else None
+            stats = dict(self._stats)
+        stats.update(
+            mode=self.mode,
+            queue_depth=depth,
+            oldest_event_age_seconds=round(time.monotonic() - oldest, 3) if oldest is not None else 0,
+            spool_segments=self.spool.count() if self.spool is not None else None
+        )
+        return stats
@@ -0,0 +1,306 @@
+"""Response cache with generation-based invalidation.
+
+Entries are stored under a key that embeds the current generation of the
+scope they were computed for. Writers bump the generation of every scope they
+affect, which orphans the old entries at once (they then age out of the LRU
+or expire by TTL) without having to enumerate them.
+
+Backends:
+- 'memory' (default): bounded in-process LRU with TTL, per worker.
+- 'redis': shared across workers, set CACHE_REDIS_URL; needs the redis package.
+- 'null': caching disabled.
+
+ReportCache keeps report results in the same backend, served stale while
+they are recomputed in the background.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class LRUCache:
+    """Bounded, thread-safe in-process LRU with per-entry TTL"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def get_counter(self, name):
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def incr(self, name):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+            return self._counters[name]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+
+
+class RedisCache:
+    """Shared backend for multi-worker deployments"""
+
+    def __init__(self, url, prefix='omnidesk:'):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        return self._client.get(self.prefix + key)
+
+    def set(self, key, value, ttl=None):
+        self._client.set(self.prefix + key, value, ex=ttl or None)
+
+    def delete(self, key):
+        self._client.delete(self.prefix + key)
+
+    def get_counter(self, name):
+        value = self._client.get(self.prefix + 'gen:' + name)
+        return int(value) if value else 0
+
+    def incr(self, name):
+        return self._client.incr(self.prefix + 'gen:' + name)
+
+    def clear(self):
+        for key in self._client.scan_iter(self.prefix + '*'):
+            self._client.delete(key)
+
+
+class NullCache:
+    """Backend used when caching is disabled"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def get_counter(self, name):
+        return 0
+
+    def incr(self, name):
+        return 0
+
+    def clear(self):
+        pass
+
+
+class ResponseCache:
+    """Flask extension wrapping the configured backend"""
+
+    def __init__(self, app=None):
+        self.backend = NullCache()
+        self.default_ttl = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        kind = app.config.get('CACHE_BACKEND', 'memory')
+        if kind == 'redis':
+            try:
+                self.backend = RedisCache(app.config['CACHE_REDIS_URL'])
+            except ImportError:
+                app.logger.warning('CACHE_BACKEND=redis but the redis package is not installed; '
+                                   'using the in-process cache')
+                self.backend = LRUCache(app.config.get('CACHE_MAX_ENTRIES', 1024))
+        elif kind == 'memory':
+            self.backend = LRUCache(app.config.get('CACHE_MAX_ENTRIES', 1024))
+        else:
+            self.backend = NullCache()
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 30)
+        app.extensions['response_cache'] = self
+
+    def make_key(self, namespace, scopes, params):
+        """Key for params under the current generations of scopes"""
+        generations = [f'{scope}={self.backend.get_counter(scope)}' for scope in scopes]
+        digest = hashlib.sha1(
+            json.dumps([generations, params], sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+        return f'{namespace}:{digest}'
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, value, ttl or self.default_ttl)
+
+    def invalidate(self, *scopes):
+        """Bump the generation of each scope, orphaning every entry computed under it"""
+        for scope in set(scopes):
+            self.backend.incr(scope)
+
+    def clear(self):
+        self.backend.clear()
+
+
+# --- Ticket list scopes ---
+# Admins see every ticket and share one scope; other users only see tickets
+# they created or are assigned to, so each has their own. Every entry is also
+# keyed under ALL_TICKETS_SCOPE, bumped by writes to the rows list bodies embed
+# (category names and colors, usernames), which can appear in any scope.
+#
+# A cached body (and its ETag) is served as is until its TTL, so the clock-derived
+# sla_status in it can lag by up to CACHE_DEFAULT_TTL seconds (30 by default)
+# after a ticket crosses its SLA warning or breach time.
+
+TICKET_LIST_NAMESPACE = 'tickets:list'
+ADMIN_TICKETS_SCOPE = 'tickets:admin'
+ALL_TICKETS_SCOPE = 'tickets:all'
+
+
+def ticket_list_scopes(user):
+    """Scopes whose generations key the user's list entries"""
+    return [ADMIN_TICKETS_SCOPE if user.is_admin else f'tickets:user:{user.id}', ALL_TICKETS_SCOPE]
+
+
+def ticket_list_params(args):
+    """Normalized query parameters: sorted, stripped, empties dropped, field lists ordered"""
+    params = []
+    for name, value in args.items(multi=True):
+        value = value.strip()
+        if not value:
+            continue
+        if name == 'fields':
+            value = ','.join(sorted({f.strip() for f in value.split(',') if f.strip()}))
+        elif name == 'search':
+            value = ' '.join(value.lower().split())
+        params.append((name, value))
+    return sorted(params)
+
+
+def invalidate_ticket_lists(cache, *user_ids):
+    """Invalidate list entries that could include a ticket touching user_ids (creator/assignee, old and new)"""
+    scopes = [ADMIN_TICKETS_SCOPE]
+    scopes += [f'tickets:user:{user_id}' for user_id in user_ids if user_id]
+    cache.invalidate(*scopes)
+
+
+def invalidate_all_ticket_lists(cache):
+    """Invalidate every list entry, after a write to a category or user that list bodies embed"""
+    cache.invalidate(ALL_TICKETS_SCOPE)
+
+
+# --- Report results ---
+
+class ReportCache:
+    """Stale-while-revalidate cache of report bodies, keyed by report name and parameters.
+
+    An entry younger than REPORT_CACHE_TTL seconds is served as is. An older one
+    is still served, for up to REPORT_CACHE_STALE_TTL seconds more, while a
+    single background refresh recomputes it. Concurrent misses on the same key
+    share one computation (single-flight) instead of each running the report.
+    Entries live in the response cache backend, so with redis they are shared
+    across workers; the refresh and miss coalescing are per worker.
+    """
+
+    def __init__(self, app=None):
+        self.cache = None
+        self.ttl = 60
+        self.stale_ttl = 600
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.cache = app.extensions['response_cache']
+        self.ttl = app.config.get('REPORT_CACHE_TTL', 60)
+        self.stale_ttl = app.config.get('REPORT_CACHE_STALE_TTL', 600)
+        app.extensions['report_cache'] = self
+
+    @staticmethod
+    def make_key(name, params):
+        return f"reports:{name}:{json.dumps(params, sort_keys=True, default=str)}"
+
+    def _compute(self, key, compute):
+        """Run compute as the one in-flight computation for key; callers arriving meanwhile wait on it"""
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = Future()
+        if not leader:
+            return flight.result()
+        try:
+            body = compute()
+            entry = {'at': time.time(), 'body': body}
+            self.cache.set(key, json.dumps(entry), ttl=self.ttl + self.stale_ttl)
+            flight.set_result(entry)
+            return entry
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _refresh(self, app, key, compute):
+        from app import db
+        try:
+            with app.app_context():
+                try:
+                    self._compute(key, compute)
+                finally:
+                    db.session.remove()
+        except Exception as e:
+            app.logger.warning(f"Background report refresh failed for {key}: {e}")
+
+    def _schedule_refresh(self, key, compute):
+        from flask import current_app
+        with self._lock:
+            if key in self._inflight:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='report-refresh')
+        self._executor.submit(self._refresh, current_app._get_current_object(), key, compute)
+
+    def get_or_compute(self, name, params, compute):
+        """(body, age in seconds, 'HIT' | 'STALE' | 'MISS') for the report; compute() returns the
+        serialized body and must not depend on the request, as it may run in a background thread
+        """
+        key = self.make_key(name, params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            entry = json.loads(cached)
+            age = max(0.0, time.time() - entry['at'])
+            if age < self.ttl:
+                return entry['body'], age, 'HIT'
+            self._schedule_refresh(key, compute)
+            return entry['body'], age, 'STALE'
+        entry = self._compute(key, compute)
+        return entry['body'], max(0.0, time.time() - entry['at']), 'MISS'
@@ -0,0 +1,165 @@
+import click
+from flask import Blueprint
+from app import db
+
+bp = Blueprint('cli', __name__, cli_group=None)
+
+
+@bp.cli.group()
+def tickets():
+    """Ticket maintenance commands."""
+    pass
+
+
+@tickets.command('recount')
+@click.option('--ticket-id', 'ticket_ids', type=int, multiple=True,
+              help='Only recount these tickets (repeatable). Defaults to all tickets.')
+def recount(ticket_ids):
+    """Recompute denormalized comment and attachment counters."""
+    from app.models import recount_ticket_counters
+    updated = recount_ticket_counters(list(ticket_ids) or None)
+    db.session.commit()
+    click.echo(f'Recounted {updated} tickets')
+
+
+@tickets.command('requeue')
+def requeue():
+    """Rebuild the work queue entries from the ticket table."""
+    from app.models import refresh_ticket_queues
+    written = refresh_ticket_queues()
+    db.session.commit()
+    click.echo(f'Wrote {written} queue entries')
+
+
+@tickets.command('durations')
+@click.option('--batch-size', type=int, default=1000, show_default=True, help='Tickets read and updated per batch.')
+def durations(batch_size):
+    """Backfill response_seconds and resolution_seconds on live and archived tickets."""
+    from app.models import Ticket, ArchivedTicket, refresh_ticket_durations
+    updated = 0
+    for model in (Ticket, ArchivedTicket):
+        updated += refresh_ticket_durations(model=model, batch_size=batch_size)
+        db.session.commit()
+    click.echo(f'Updated {updated} tickets')
+
+
+
+@tickets.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']),
+              help='Source format. Defaults to the file extension (.csv, .ndjson, .jsonl; .gz accepted).')
+@click.option('--job-id', help='Name the job, or resume an interrupted job from its last checkpoint.')
+@click.option('--batch-size', type=int, help='Rows per executemany batch (IMPORT_BATCH_SIZE).')
+@click.option('--commit-every', type=int, help='Rows per commit and checkpoint (IMPORT_COMMIT_EVERY).')
+def import_tickets(path, fmt, job_id, batch_size, commit_every):
+    """Stream-import tickets from a CSV or NDJSON file."""
+    from app.importer import TicketImporter, TicketImportError, detect_format, open_text, iter_records
+
+    def progress(job):
+        click.echo(f'{job.rows_read} rows read, {job.imported} imported, {job.failed} rejected')
+
+    try:
+        fmt = detect_format(path, fmt)
+        importer = TicketImporter.start(fmt, source=path, job_id=job_id, batch_size=batch_size,
+                                        commit_every=commit_every, progress=progress)
+    except TicketImportError as e:
+        raise click.ClickException(str(e))
+
+    click.echo(f'Import job {importer.job.id} resuming after row {importer.job.rows_read}'
+               if importer.job.rows_read else f'Import job {importer.job.id} started')
+    try:
+        with open(path, 'rb') as source:
+            job = importer.run(iter_records(open_text(source), fmt))
+    except Exception as e:
+        raise click.ClickException(f'{e}\nResume with --job-id {importer.job.id}')
+
+    errors = job.to_dict()['errors']
+    for error in errors:
+        click.echo(f"row {error['row']}: {'; '.join(error['errors'])}", err=True)
+    if job.failed > len(errors):
+        click.echo(f'... only the first {len(errors)} row errors are kept', err=True)
+
+
+@tickets.command('archive')
+@click.option('--older-than-days', type=int, help='Archive tickets closed (or soft-deleted) longer ago than this '
+                                                  '(ARCHIVE_AFTER_DAYS).')
+@click.option('--chunk-size', type=int, help='Tickets moved per transaction (ARCHIVE_CHUNK_SIZE).')
+@click.option('--limit', type=int, help='Stop after archiving this many tickets.')
+def archive(older_than_days, chunk_size, limit):
+    """Move old closed and soft-deleted tickets into the archive tables."""
+    from flask import current_app
+    from app.archive import archive_tickets
+
+    def progress(archived, moved):
+        click.echo(f"{archived} tickets archived (last chunk: {moved['ticket_comment']} comments, "
+                   f"{moved['audit_log']} audit rows)")
+
+    config = current_app.config
+    archived = archive_tickets(
+        older_than_days if older_than_days is not None else config.get('ARCHIVE_AFTER_DAYS', 365),
+        chunk_size=chunk_size or config.get('ARCHIVE_CHUNK_SIZE', 500),
+        limit=limit,
+        progress=progress
+    )
+    click.echo(f'Archived {archived} tickets')
+
+
+@tickets.command('unarchive')
+@click.argument('ticket_ids', type=int, nargs=-1, required=True)
+def unarchive(ticket_ids):
+    """Move archived tickets back to the live tables."""
+    from app.archive import unarchive_tickets
+    restored = unarchive_tickets(list(ticket_ids))
+    missing = sorted(set(ticket_ids) - set(restored))
+    click.echo(f'Restored {len(restored)} tickets')
+    if missing:
+        click.echo(f"Not in the archive: {', '.join(map(str, missing))}", err=True)
+
+
+@bp.cli.group()
+def reports():
+    """Report rollup commands."""
+    pass
+
+
+@reports.command('reconcile')
+@click.option('--days', type=int, help='Only reconcile the last N days. Defaults to every day.')
+def reconcile(days):
+    """Recompute the report rollups (daily stats, duration sketches) from the tickets and correct drifted rows (run nightly)."""
+    from datetime import datetime, timedelta
+    from app import rollups
+    start_day = (datetime.utcnow() - timedelta(days=days)).date() if days else None
+    corrected = rollups.reconcile(start_day)
+    db.session.commit()
+    click.echo(f'Corrected {corrected} rollup rows')
+
+
+@reports.command('run-jobs')
+def run_jobs():
+    """Run queued report jobs, and those left behind by dead workers, in the foreground."""
+    from app import report_jobs
+    jobs = report_jobs.resumable_jobs()
+    for job in jobs:
+        click.echo(f'Running {job.report} job {job.id}')
+        report_jobs.run_job(job.id, job.attempts)
+    click.echo(f'Ran {len(jobs)} report jobs')
+
+
+@bp.cli.group()
+def search():
+    """Full-text search index commands."""
+    pass
+
+
+@search.command('rebuild')
+def rebuild():
+    """Create the search index if missing and repopulate it from tickets."""
+    from app import fulltext
+    with db.engine.begin() as connection:
+        if not fulltext.is_supported(connection):
+            click.echo(f'Full-text search is not supported on {connection.dialect.name}; '
+                       'searches fall back to substring matching')
+            return
+        fulltext.install(connection)
+        documents = fulltext.rebuild(connection)
+    click.echo(f'Indexed {documents} tickets')
@@ -0,0 +1,182 @@
+"""Streaming report exports.
+
+export_rows() runs the export query with yield_per, so rows are fetched from a
+server-side cursor (or SQLite's lazy cursor) a batch at a time instead of being
+loaded up front. encode() turns them into NDJSON, CSV or a JSON document one
+chunk per batch, and gzip_chunks() optionally compresses the stream. Memory
+stays flat however many rows the date range covers.
+
+export_batches() reads the same rows with one keyset query per batch instead,
+for callers that write to the database between batches (report jobs record
+their progress) and so cannot keep a cursor open.
+"""
+import csv
+import io
+import zlib
+from datetime import date
+
+import sqlalchemy as sa
+from flask import current_app
+
+from app.models import Ticket, TicketCategory, User, AuditLog
+
+EXPORT_FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+EXPORT_BATCH_SIZE = 1000
+
+TICKET_EXPORT_FIELDS = (
+    'id', 'ticket_number', 'title', 'status', 'priority', 'category', 'created_by', 'assigned_to',
+    'created_at', 'resolved_at', 'sla_breached'
+)
+AUDIT_EXPORT_FIELDS = ('id', 'action', 'details', 'user', 'ticket_id', 'ip_address', 'created_at')
+
+
+def _before(model, before):
+    """Rows after (created_at, id) = before in the exports' newest-first order"""
+    created_at, row_id = before
+    return sa.or_(model.created_at < created_at, sa.and_(model.created_at == created_at, model.id < row_id))
+
+
+def _ticket_export_query(start_date, end_date, before=None):
+    created_by = sa.orm.aliased(User)
+    assigned_to = sa.orm.aliased(User)
+    query = sa.select(
+        Ticket.id,
+        Ticket.ticket_number,
+        Ticket.title,
+        Ticket.status,
+        Ticket.priority,
+        sa.func.coalesce(TicketCategory.name, 'Uncategorized').label('category'),
+        sa.func.coalesce(created_by.username, 'Client').label('created_by'),
+        sa.func.coalesce(assigned_to.username, 'Unassigned').label('assigned_to'),
+        Ticket.created_at,
+        Ticket.resolved_at,
+        sa.type_coerce(sa.func.coalesce(Ticket.sla_resolution_breached, False), sa.Boolean).label('sla_breached')
+    ).outerjoin(TicketCategory, TicketCategory.id == Ticket.category_id).outerjoin(
+        created_by, created_by.id == Ticket.created_by_id
+    ).outerjoin(
+        assigned_to, assigned_to.id == Ticket.assigned_to_id
+    ).where(
+        Ticket.is_deleted == False,
+        Ticket.created_at >= start_date,
+        Ticket.created_at <= end_date
+    ).order_by(Ticket.created_at.desc(), Ticket.id.desc())
+    return query.where(_before(Ticket, before)) if before else query
+
+
+def _audit_export_query(start_date, end_date, before=None):
+    query = sa.select(
+        AuditLog.id,
+        AuditLog.action,
+        AuditLog.details,
+        sa.func.coalesce(User.username, 'System').label('user'),
+        AuditLog.ticket_id,
+        AuditLog.ip_address,
+        AuditLog.created_at
+    ).outerjoin(User, User.id == AuditLog.user_id).where(
+        AuditLog.created_at >= start_date,
+        AuditLog.created_at <= end_date
+    ).order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+    return query.where(_before(AuditLog, before)) if before else query
+
+
+EXPORT_REPORTS = {
+    'tickets': (_ticket_export_query, TICKET_EXPORT_FIELDS),
+    'audit': (_audit_export_query, AUDIT_EXPORT_FIELDS),
+}
+
+
+def export_rows(session, report_type, start_date, end_date, batch_size=EXPORT_BATCH_SIZE):
+    """Export records as dicts, fetched batch_size rows at a time"""
+    build_query, _ = EXPORT_REPORTS[report_type]
+    result = session.execute(
+        build_query(start_date, end_date).execution_options(stream_results=True, yield_per=batch_size)
+    )
+    for partition in result.mappings().partitions():
+        yield from (dict(row) for row in partition)
+
+
+def count_rows(session, report_type, start_date, end_date):
+    """Number of records export_rows() would produce"""
+    build_query, _ = EXPORT_REPORTS[report_type]
+    return session.scalar(
+        sa.select(sa.func.count()).select_from(build_query(start_date, end_date).order_by(None).subquery())
+    )
+
+
+def export_batches(session, report_type, start_date, end_date, batch_size=EXPORT_BATCH_SIZE):
+    """export_rows() as lists of dicts, one short query per batch seeking past the previous one"""
+    build_query, _ = EXPORT_REPORTS[report_type]
+    before = None
+    while True:
+        batch = [
+            dict(row) for row in
+            session.execute(build_query(start_date, end_date, before).limit(batch_size)).mappings()
+        ]
+        if batch:
+            yield batch
+        if len(batch) < batch_size:
+            return
+        before = (batch[-1]['created_at'], batch[-1]['id'])
+
+
+def _batches(records, size):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _csv_value(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def encode(records, fmt, fields, envelope=None, batch_size=EXPORT_BATCH_SIZE):
+    """Serialize records as fmt, yielding one text chunk per batch.
+
+    For 'json' the records become the "data" array of envelope (a dict), with
+    "total_records" appended once the count is known.
+    """
+    dumps = current_app.json.dumps
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        for batch in _batches(records, batch_size):
+            writer.writerows({key: _csv_value(value) for key, value in record.items()} for record in batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+        return
+
+    if fmt == 'ndjson':
+        for batch in _batches(records, batch_size):
+            yield ''.join(dumps(record) + '\n' for record in batch)
+        return
+
+    head = dumps(envelope or {})
+    yield (head[:-1] + ',' if len(head) > 2 else '{') + '"data":['
+    total = 0
+    for batch in _batches(records, batch_size):
+        yield (',' if total else '') + ','.join(dumps(record) for record in batch)
+        total += len(batch)
+    yield f'],"total_records":{total}}}'
+
+
+def gzip_chunks(chunks, level=6):
+    """gzip-compress a stream of text chunks, yielding bytes as the compressor produces them"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,350 @@
+"""Full-text search index over tickets, public comments and client submissions.
+
+One search document per ticket, built from ticket_number, title, description,
+non-internal, non-deleted comment content and linked ClientTicket descriptions.
+
+SQLite uses an FTS5 virtual table ranked with bm25(); PostgreSQL uses a
+tsvector table with a GIN index ranked with ts_rank_cd(). Both are kept in
+sync by database triggers, so set-based UPDATEs and raw SQL writes are
+indexed exactly like ORM writes. Other engines fall back to ILIKE in the
+callers (see is_enabled()).
+"""
+import re
+import sqlalchemy as sa
+from app import db
+
+SEARCH_TABLE = 'ticket_search'
+SNIPPET_START = '<mark>'
+SNIPPET_END = '</mark>'
+
+# --- SQLite (FTS5) ---
+
+_SQLITE_INSERT = """
+    INSERT INTO ticket_search (rowid, ticket_number, title, description, comments, client_description)
+    SELECT t.id, t.ticket_number, t.title, t.description,
+        (SELECT group_concat(c.content, ' ') FROM ticket_comment c
+         WHERE c.ticket_id = t.id AND c.is_deleted = 0 AND c.is_internal = 0),
+        (SELECT group_concat(ct.description, ' ') FROM client_ticket ct WHERE ct.ticket_id = t.id)
+    FROM ticket t
+"""
+
+_SQLITE_REFRESH = """
+    DELETE FROM ticket_search WHERE rowid = {tid};
+""" + _SQLITE_INSERT + """ WHERE t.id = {tid};
+"""
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS ticket_search USING fts5(
+        ticket_number, title, description, comments, client_description,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS ticket_search_ticket_ai AFTER INSERT ON ticket BEGIN
+        {_SQLITE_REFRESH.format(tid='NEW.id')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS ticket_search_ticket_au
+    AFTER UPDATE OF ticket_number, title, description ON ticket BEGIN
+        {_SQLITE_REFRESH.format(tid='NEW.id')}
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS ticket_search_ticket_ad AFTER DELETE ON ticket BEGIN
+        DELETE FROM ticket_search WHERE rowid = OLD.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS ticket_search_comment_ai AFTER INSERT ON ticket_comment BEGIN
+        {_SQLITE_REFRESH.format(tid='NEW.ticket_id')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS ticket_search_comment_au
+    AFTER UPDATE OF content, is_internal, is_deleted, ticket_id ON ticket_comment BEGIN
+        {_SQLITE_REFRESH.format(tid='NEW.ticket_id')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS ticket_search_comment_moved
+    AFTER UPDATE OF ticket_id ON ticket_comment WHEN OLD.ticket_id IS NOT NEW.ticket_id BEGIN
+        {_SQLITE_REFRESH.format(tid='OLD.ticket_id')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS ticket_search_comment_ad AFTER DELETE ON ticket_comment BEGIN
+        {_SQLITE_REFRESH.format(tid='OLD.ticket_id')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS ticket_search_client_ai
+    AFTER INSERT ON client_ticket WHEN NEW.ticket_id IS NOT NULL BEGIN
+        {_SQLITE_REFRESH.format(tid='NEW.ticket_id')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS ticket_search_client_au
+    AFTER UPDATE OF description, ticket_id ON client_ticket WHEN NEW.ticket_id IS NOT NULL BEGIN
+        {_SQLITE_REFRESH.format(tid='NEW.ticket_id')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS ticket_search_client_moved
+    AFTER UPDATE OF ticket_id ON client_ticket
+    WHEN OLD.ticket_id IS NOT NULL AND OLD.ticket_id IS NOT NEW.ticket_id BEGIN
+        {_SQLITE_REFRESH.format(tid='OLD.ticket_id')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS ticket_search_client_ad
+    AFTER DELETE ON client_ticket WHEN OLD.ticket_id IS NOT NULL BEGIN
+        {_SQLITE_REFRESH.format(tid='OLD.ticket_id')}
+    END
+    """
+]
+
+_SQLITE_TRIGGERS = [
+    'ticket_search_ticket_ai', 'ticket_search_ticket_au', 'ticket_search_ticket_ad',
+    'ticket_search_comment_ai', 'ticket_search_comment_au', 'ticket_search_comment_moved',
+    'ticket_search_comment_ad', 'ticket_search_client_ai', 'ticket_search_client_au',
+    'ticket_search_client_moved', 'ticket_search_client_ad'
+]
+
+# bm25 column weights: ticket_number, title, description, comments, client_description
+_SQLITE_RANK = 'bm25(ticket_search, 10.0, 5.0, 2.0, 1.0, 1.0)'
+
+# --- PostgreSQL (tsvector + GIN) ---
+
+_PG_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS ticket_search (
+        ticket_id INTEGER PRIMARY KEY,
+        document TSVECTOR NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_ticket_search_document ON ticket_search USING GIN (document)",
+    """
+    CREATE OR REPLACE FUNCTION ticket_search_refresh(tid INTEGER) RETURNS void AS $$
+    BEGIN
+        DELETE FROM ticket_search WHERE ticket_id = tid;
+        INSERT INTO ticket_search (ticket_id, document)
+        SELECT t.id,
+            setweight(to_tsvector('simple', coalesce(t.ticket_number, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(t.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(t.description, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce((
+                SELECT string_agg(c.content, ' ') FROM ticket_comment c
+                WHERE c.ticket_id = t.id AND NOT c.is_deleted AND NOT c.is_internal
+            ), '')), 'C') ||
+            setweight(to_tsvector('english', coalesce((
+                SELECT string_agg(ct.description, ' ') FROM client_ticket ct WHERE ct.ticket_id = t.id
+            ), '')), 'C')
+        FROM ticket t WHERE t.id = tid;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION ticket_search_ticket_trg() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            DELETE FROM ticket_search WHERE ticket_id = OLD.id;
+        ELSE
+            PERFORM ticket_search_refresh(NEW.id);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION ticket_search_child_trg() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.ticket_id IS NOT NULL THEN
+            PERFORM ticket_search_refresh(OLD.ticket_id);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.ticket_id IS NOT NULL THEN
+            PERFORM ticket_search_refresh(NEW.ticket_id);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS ticket_search_ticket ON ticket",
+    """
+    CREATE TRIGGER ticket_search_ticket
+    AFTER INSERT OR DELETE OR UPDATE OF ticket_number, title, description ON ticket
+    FOR EACH ROW EXECUTE FUNCTION ticket_search_ticket_trg()
+    """,
+    "DROP TRIGGER IF EXISTS ticket_search_comment ON ticket_comment",
+    """
+    CREATE TRIGGER ticket_search_comment
+    AFTER INSERT OR DELETE OR UPDATE OF content, is_internal, is_deleted, ticket_id ON ticket_comment
+    FOR EACH ROW EXECUTE FUNCTION ticket_search_child_trg()
+    """,
+    "DROP TRIGGER IF EXISTS ticket_search_client ON client_ticket",
+    """
+    CREATE TRIGGER ticket_search_client
+    AFTER INSERT OR DELETE OR UPDATE OF description, ticket_id ON client_ticket
+    FOR EACH ROW EXECUTE FUNCTION ticket_search_child_trg()
+    """
+]
+
+_PG_DROP = [
+    "DROP TRIGGER IF EXISTS ticket_search_client ON client_ticket",
+    "DROP TRIGGER IF EXISTS ticket_search_comment ON ticket_comment",
+    "DROP TRIGGER IF EXISTS ticket_search_ticket ON ticket",
+    "DROP FUNCTION IF EXISTS ticket_search_child_trg()",
+    "DROP FUNCTION IF EXISTS ticket_search_ticket_trg()",
+    "DROP FUNCTION IF EXISTS ticket_search_refresh(INTEGER)",
+    "DROP TABLE IF EXISTS ticket_search"
+]
+
+_enabled = {}
+
+
+def is_supported(bind) -> bool:
+    """Whether this engine has a native full-text backend"""
+    return bind.dialect.name in ('sqlite', 'postgresql')
+
+
+def is_enabled() -> bool:
+    """Whether the search index exists on the current engine (cached per engine)"""
+    engine = db.engine
+    key = str(engine.url)
+    if key not in _enabled:
+        _enabled[key] = is_supported(engine) and sa.inspect(engine).has_table(SEARCH_TABLE)
+    return _enabled[key]
+
+
+def owns(table_name: str) -> bool:
+    """Whether a table belongs to the search index (including SQLite's FTS5 shadow tables).
+
+    These are created by install() rather than from the models, so migration
+    autogenerate must leave them alone (see migrations/env.py).
+    """
+    return table_name == SEARCH_TABLE or table_name.startswith(f'{SEARCH_TABLE}_')
+
+
+def install(bind) -> bool:
+    """Create the search table and sync triggers if missing. Returns True if the table was new."""
+    if not is_supported(bind):
+        return False
+    existed = sa.inspect(bind).has_table(SEARCH_TABLE)
+    for statement in (_SQLITE_DDL if bind.dialect.name == 'sqlite' else _PG_DDL):
+        bind.exec_driver_sql(statement)
+    _enabled.pop(str(bind.engine.url), None)
+    return not existed
+
+
+def uninstall(bind):
+    """Drop the search table and its triggers"""
+    if bind.dialect.name == 'sqlite':
+        for trigger in _SQLITE_TRIGGERS:
+            bind.exec_driver_sql(f'DROP TRIGGER IF EXISTS {trigger}')
+        bind.exec_driver_sql('DROP TABLE IF EXISTS ticket_search')
+    elif bind.dialect.name == 'postgresql':
+        for statement in _PG_DROP:
+            bind.exec_driver_sql(statement)
+    _enabled.pop(str(bind.engine.url), None)
+
+
+def rebuild(bind) -> int:
+    """Repopulate the whole index from the source tables. Returns the number of documents."""
+    if bind.dialect.name == 'sqlite':
+        bind.exec_driver_sql('DELETE FROM ticket_search')
+        bind.exec_driver_sql(_SQLITE_INSERT)
+    elif bind.dialect.name == 'postgresql':
+        bind.exec_driver_sql('TRUNCATE ticket_search')
+        bind.exec_driver_sql('SELECT ticket_search_refresh(id) FROM ticket')
+    else:
+        return 0
+    return bind.execute(sa.text('SELECT COUNT(*) FROM ticket_search')).scalar()
+
+
+@sa.event.listens_for(db.metadata, 'after_create')
+def _install_after_create(target, connection, **kw):
+    # db.create_all() setups (dev databases, tests) get the index without a migration
+    if install(connection):
+        rebuild(connection)
+
+
+def _terms(search: str) -> list:
+    """Split user input into word groups, dropping query-syntax characters"""
+    groups = []
+    for chunk in search.split():
+        words = re.findall(r'\w+', chunk)
+        if words:
+            groups.append(words)
+    return groups
+
+
+def match_subquery(search: str):
+    """Subquery of (ticket_id, rank) for tickets matching search; lower rank is more relevant.
+
+    Every whitespace-separated term must match (as a prefix); a term such as
+    TKT-1700000 is matched as a phrase of its word parts. Unlike the ILIKE
+    fallback, terms match word starts only: "print" finds "printer", "rint" does not.
+    """
+    groups = _terms(search)
+    if not groups:
+        return sa.select(
+            sa.literal(None, sa.Integer).label('ticket_id'), sa.literal(0.0).label('rank')
+        ).where(sa.false()).subquery('search_matches')
+
+    if db.engine.dialect.name == 'sqlite':
+        expression = ' '.join('"' + ' '.join(words) + '"*' for words in groups)
+        return sa.select(
+            sa.literal_column('rowid', sa.Integer).label('ticket_id'),
+            sa.literal_column(_SQLITE_RANK, sa.Float).label('rank')
+        ).select_from(sa.table(SEARCH_TABLE)).where(
+            sa.text('ticket_search MATCH :search_expression').bindparams(search_expression=expression)
+        ).subquery('search_matches')
+
+    expression = ' & '.join(f'{word}:*' for words in groups for word in words)
+    query = sa.func.to_tsquery('english', expression)
+    document = sa.literal_column('document')
+    return sa.select(
+        sa.literal_column('ticket_id', sa.Integer).label('ticket_id'),
+        (-sa.func.ts_rank_cd(document, query)).label('rank')
+    ).select_from(sa.table(SEARCH_TABLE)).where(
+        document.op('@@')(query)
+    ).subquery('search_matches')
+
+
+def snippets(search: str, ticket_ids) -> dict:
+    """Highlighted excerpts for the given (already matched) tickets, keyed by ticket id"""
+    groups = _terms(search)
+    ticket_ids = list(ticket_ids)
+    if not groups or not ticket_ids:
+        return {}
+
+    if db.engine.dialect.name == 'sqlite':
+        expression = ' '.join('"' + ' '.join(words) + '"*' for words in groups)
+        rows = db.session.execute(
+            sa.text(
+                f"SELECT rowid, snippet(ticket_search, -1, '{SNIPPET_START}', '{SNIPPET_END}', '…', 16) "
+                "FROM ticket_search WHERE ticket_search MATCH :expression AND rowid IN :ids"
+            ).bindparams(sa.bindparam('ids', expanding=True)),
+            {'expression': expression, 'ids': ticket_ids}
+        ).all()
+    else:
+        # The same text the search document is built from, so any matched column can be highlighted
+        expression = ' & '.join(f'{word}:*' for words in groups for word in words)
+        rows = db.session.execute(
+            sa.text(
+                "SELECT t.id, ts_headline('english', "
+                "coalesce(t.ticket_number, '') || ' ' || coalesce(t.title, '') || ' ' || "
+                "coalesce(t.description, '') || ' ' || coalesce(("
+                "SELECT string_agg(c.content, ' ') FROM ticket_comment c "
+                "WHERE c.ticket_id = t.id AND NOT c.is_deleted AND NOT c.is_internal), '') || ' ' || "
+                "coalesce((SELECT string_agg(ct.description, ' ') FROM client_ticket ct "
+                "WHERE ct.ticket_id = t.id), ''), "
+                "to_tsquery('english', :expression), "
+                f"'StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, MaxFragments=2, MaxWords=20') "
+                "FROM ticket t WHERE t.id IN :ids"
+            ).bindparams(sa.bindparam('ids', expanding=True)),
+            {'expression': expression, 'ids': ticket_ids}
+        ).all()
+
+    return {row[0]: row[1] for row in rows}
@@ -0,0 +1,359 @@
+"""Streaming bulk import of historical tickets from CSV or NDJSON (optionally gzipped).
+
+Records are parsed one at a time, validated with validate_ticket_data, and
+category and user references are resolved from maps loaded once per job. Valid
+rows are inserted with one executemany per batch, bypassing Ticket.__init__.
+The ImportJob row is the checkpoint: it is committed in the same transaction as
+each group of batches, so an interrupted job resumes from its last committed
+source row without duplicating or skipping tickets.
+"""
+import csv
+import gzip
+import io
+import json
+import re
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import sqlalchemy as sa
+from flask import current_app
+
+from app import db, cache, ticket_numbers, audit, rollups
+from app.models import (
+    Ticket, ArchivedTicket, TicketCategory, User, ImportJob, PRIORITY_RANK, refresh_ticket_queues, ticket_durations
+)
+from app.utils import validate_ticket_data, sanitize_html
+from app.caching import invalidate_ticket_lists
+from app.ticket_numbers import TICKET_NUMBER_LENGTH
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+MAX_REPORTED_ERRORS = 1000
+JOB_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,36}$')
+
+DATE_FIELDS = ('created_at', 'updated_at', 'resolved_at', 'closed_at', 'first_response_at')
+HOURS_FIELDS = ('estimated_hours', 'actual_hours')
+
+
+class TicketImportError(Exception):
+    """The import as a whole cannot proceed (bad format, unknown job, ...)"""
+    pass
+
+
+def detect_format(filename=None, fmt=None):
+    """Explicit format, else inferred from the file extension (.gz ignored)"""
+    if fmt:
+        fmt = fmt.lower()
+        fmt = 'ndjson' if fmt in ('jsonl', 'json') else fmt
+    elif filename:
+        name = filename.lower()
+        name = name[:-3] if name.endswith('.gz') else name
+        if name.endswith('.csv'):
+            fmt = 'csv'
+        elif name.endswith(('.ndjson', '.jsonl')):
+            fmt = 'ndjson'
+    if fmt not in IMPORT_FORMATS:
+        raise TicketImportError(f"Unknown import format; use one of: {', '.join(IMPORT_FORMATS)}")
+    return fmt
+
+
+def open_text(stream):
+    """Text stream over a binary source, transparently decompressing gzip"""
+    if not hasattr(stream, 'peek'):
+        stream = io.BufferedReader(stream)
+    if stream.peek(2)[:2] == b'\x1f\x8b':
+        stream = gzip.GzipFile(fileobj=stream)
+    return io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+
+def iter_records(text, fmt):
+    """Yield (row number, record dict or None, parse error or None), one source record at a time"""
+    if fmt == 'csv':
+        for row_number, record in enumerate(csv.DictReader(text), start=1):
+            yield row_number, record, None
+        return
+
+    row_number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield row_number, None, "Each line must be a JSON object"
+            continue
+        yield row_number, record, None
+
+
+def _parse_datetime(value):
+    """ISO 8601 string to naive UTC datetime"""
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+class TicketImporter:
+    """Runs (or resumes) one ImportJob over a record stream"""
+
+    def __init__(self, job, batch_size=None, commit_every=None, progress=None):
+        config = current_app.config
+        self.job = job
+        self.batch_size = batch_size or config.get('IMPORT_BATCH_SIZE', 1000)
+        self.commit_every = max(commit_every or config.get('IMPORT_COMMIT_EVERY', 10000), self.batch_size)
+        self.progress = progress
+        self.errors = json.loads(job.errors) if job.errors else []
+        self.user_ids = set()
+        self.numbers = set()
+        self.reserved = iter(())
+        self._load_references()
+
+    @classmethod
+    def start(cls, fmt, source=None, job_id=None, user_id=None, **kwargs):
+        """Importer for a new job, or for resuming job_id where it stopped"""
+        job = db.session.get(ImportJob, job_id) if job_id else None
+        if job is None:
+            if job_id and not JOB_ID_PATTERN.match(job_id):
+                raise TicketImportError("job_id may only contain letters, digits, '-' and '_' (max 36)")
+            job = ImportJob(id=job_id or uuid.uuid4().hex, source=source, format=fmt, created_by_id=user_id)
+            db.session.add(job)
+        elif job.status == 'completed':
+            raise TicketImportError(f"Import job {job.id} has already completed")
+        elif job.format != fmt:
+            raise TicketImportError(f"Import job {job.id} is a {job.format} import")
+        job.status = 'running'
+        job.message = None
+        db.session.commit()
+        return cls(job, **kwargs)
+
+    def _load_references(self):
+        """Category and user lookups by lowercased name/username/email and by id"""
+        self.categories = {}
+        for category in db.session.execute(sa.select(
+            TicketCategory.id, TicketCategory.name, TicketCategory.sla_response_hours,
+            TicketCategory.sla_resolution_hours
+        )):
+            self.categories[category.name.lower()] = category
+            self.categories[str(category.id)] = category
+
+        self.users = {}
+        for user in db.session.execute(sa.select(User.id, User.username, User.email)):
+            self.users[user.username.lower()] = user.id
+            self.users[user.email.lower()] = user.id
+            self.users[str(user.id)] = user.id
+
+    def _reference(self, record, name, lookup, label):
+        """Resolve `name` (or `name_id`) through lookup; returns (value, error)"""
+        key = _text(record.get(name) or record.get(f'{name}_id')).lower()
+        if not key:
+            return None, None
+        value = lookup.get(key)
+        if value is None:
+            return None, f"Unknown {label} '{key}'"
+        return value, None
+
+    def prepare(self, record):
+        """Ticket insert row for a source record, or (None, errors)"""
+        data = {key.strip(): value for key, value in record.items() if key}
+        validation = validate_ticket_data({
+            field: _text(data.get(field)) for field in ('title', 'description', 'priority', 'status')
+        })
+        errors = list(validation['errors'])
+
+        category, error = self._reference(data, 'category', self.categories, 'category')
+        errors += [error] if error else []
+        created_by_id, error = self._reference(data, 'created_by', self.users, 'user')
+        errors += [error] if error else []
+        assigned_to_id, error = self._reference(data, 'assigned_to', self.users, 'user')
+        errors += [error] if error else []
+
+        dates = {}
+        for field in DATE_FIELDS:
+            value = _text(data.get(field))
+            try:
+                dates[field] = _parse_datetime(value) if value else None
+            except ValueError:
+                errors.append(f"Invalid {field} '{value}'")
+
+        ticket_number = _text(data.get('ticket_number')) or None
+        if ticket_number is not None and len(ticket_number) > TICKET_NUMBER_LENGTH:
+            errors.append(f"ticket_number '{ticket_number}' is longer than {TICKET_NUMBER_LENGTH} characters")
+
+        hours = {}
+        for field in HOURS_FIELDS:
+            value = _text(data.get(field))
+            try:
+                hours[field] = float(value) if value else None
+            except ValueError:
+                errors.append(f"Invalid {field} '{value}'")
+
+        if errors:
+            return None, errors
+
+        priority = _text(data.get('priority')) or 'Medium'
+        created_at = dates['created_at'] or datetime.utcnow()
+        sla_response_due = sla_resolution_due = None
+        if category is not None:
+            if category.sla_response_hours:
+                sla_response_due = created_at + timedelta(hours=category.sla_response_hours)
+            if category.sla_resolution_hours:
+                sla_resolution_due = created_at + timedelta(hours=category.sla_resolution_hours)
+        resolution_notes = _text(data.get('resolution_notes'))
+
+        return {
+            'ticket_number': ticket_number,
+            'title': sanitize_html(_text(data.get('title'))),
+            'description': sanitize_html(_text(data.get('description'))),
+            'status': _text(data.get('status')) or 'Open',
+            'priority': priority,
+            'priority_rank': PRIORITY_RANK[priority],
+            'is_deleted': False,
+            'created_at': created_at,
+            'updated_at': dates['updated_at'] or created_at,
+            'resolved_at': dates['resolved_at'],
+            'closed_at': dates['closed_at'],
+            'first_response_at': dates['first_response_at'],
+            **ticket_durations(created_at, dates['first_response_at'], dates['resolved_at']),
+            'resolution_notes': sanitize_html(resolution_notes) if resolution_notes else None,
+            'estimated_hours': hours['estimated_hours'],
+            'actual_hours': hours['actual_hours'],
+            'sla_response_due': sla_response_due,
+            'sla_resolution_due': sla_resolution_due,
+            'created_by_id': created_by_id,
+            'assigned_to_id': assigned_to_id,
+            'category_id': category.id if category is not None else None
+        }, None
+
+    def _reject(self, row_number, errors):
+        self.job.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'errors': errors})
+
+    def _reserve_numbers(self):
+        """Reserve enough ticket numbers for the next commit window before it writes anything"""
+        self.reserved = iter(ticket_numbers.reserve(self.commit_every))
+
+    def _next_number(self):
+        for number in self.reserved:
+            if number not in self.numbers:
+                return number
+        # Numbers the file already used were skipped. The window holds the write lock by now, so
+        # top up through its own connection (a separate one would wait for it on SQLite)
+        self.reserved = iter(ticket_numbers.reserve(self.batch_size, connection=db.session.connection()))
+        return self._next_number()
+
+    @staticmethod
+    def _taken(numbers):
+        """Which of numbers belong to a live or archived ticket (archived ones come back on unarchive)"""
+        if not numbers:
+            return set()
+        return set(db.session.scalars(sa.union(
+            sa.select(Ticket.ticket_number).where(Ticket.ticket_number.in_(numbers)),
+            sa.select(ArchivedTicket.ticket_number).where(ArchivedTicket.ticket_number.in_(numbers))
+        )))
+
+    def _insert(self, batch):
+        """Assign missing ticket numbers, drop duplicates and executemany the batch"""
+        supplied = [row['ticket_number'] for _, row in batch if row['ticket_number']]
+        taken = self._taken(supplied)
+
+        rows = []
+        assigned = []
+        for row_number, row in batch:
+            number = row['ticket_number']
+            if number is None:
+                number = row['ticket_number'] = self._next_number()
+                assigned.append(row)
+            elif number in taken or number in self.numbers:
+                self._reject(row_number, [f"Duplicate ticket_number '{number}'"])
+                continue
+            self.numbers.add(number)
+            self.user_ids.update((row['created_by_id'], row['assigned_to_id']))
+            rows.append(row)
+
+        # Tickets written outside the counter (e.g. by raw SQL) may hold reserved numbers: draw again
+        while assigned:
+            clashes = self._taken([row['ticket_number'] for row in assigned])
+            assigned = [row for row in assigned if row['ticket_number'] in clashes]
+            for row in assigned:
+                row['ticket_number'] = self._next_number()
+                self.numbers.add(row['ticket_number'])
+
+        if rows:
+            db.session.execute(sa.insert(Ticket), rows)
+            # Supplied numbers in the counter's format must never be handed out again
+            ticket_numbers.advance_past(supplied, db.session.connection())
+            imported = Ticket.ticket_number.in_([row['ticket_number'] for row in rows])
+            refresh_ticket_queues(imported)
+            rollups.apply_changes(None, imported)
+            self.job.imported += len(rows)
+
+    def _commit(self):
+        """Commit the pending batches together with the checkpoint"""
+        self.job.errors = json.dumps(self.errors)
+        db.session.commit()
+        if self.progress:
+            self.progress(self.job)
+
+    def run(self, records):
+        """Import records, skipping those already committed by an earlier run of this job"""
+        job = self.job
+        resume_after = job.rows_read
+        batch = []
+        uncommitted = 0
+
+        try:
+            self._reserve_numbers()
+            for row_number, record, error in records:
+                if row_number <= resume_after:
+                    continue
+
+                if error:
+                    self._reject(row_number, [error])
+                else:
+                    row, errors = self.prepare(record)
+                    if errors:
+                        self._reject(row_number, errors)
+                    else:
+                        batch.append((row_number, row))
+
+                job.rows_read = row_number
+                uncommitted += 1
+                if len(batch) >= self.batch_size:
+                    self._insert(batch)
+                    batch = []
+                if uncommitted >= self.commit_every:
+                    self._insert(batch)
+                    batch = []
+                    self._commit()
+                    self._reserve_numbers()
+                    uncommitted = 0
+
+            self._insert(batch)
+            job.status = 'completed'
+            job.finished_at = datetime.utcnow()
+            audit.record(
+                action='IMPORTED',
+                details=f"Imported {job.imported} tickets from {job.source or 'upload'} "
+                        f"(job {job.id}, {job.failed} rows rejected)",
+                user_id=job.created_by_id
+            )
+            self._commit()
+        except Exception as e:
+            # Everything after the last checkpoint is rolled back; the job can be resumed
+            db.session.rollback()
+            job.status = 'failed'
+            job.message = str(e)
+            db.session.commit()
+            raise
+        finally:
+            invalidate_ticket_lists(cache, *self.user_ids)
+
+        return job
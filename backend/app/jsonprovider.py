@@ -0,0 +1,77 @@
+"""App-wide JSON provider.
+
+Responses go through orjson when it is installed and through the stdlib json
+module otherwise. Both encode datetimes and dates as ISO 8601 strings, enums as
+their values and Decimals as strings, so endpoints can hand model values over
+without calling .isoformat() themselves and get identical output either way.
+"""
+import dataclasses
+import decimal
+import enum
+import uuid
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is absent
+    orjson = None
+
+
+def _default(o):
+    """Encode the types neither encoder handles natively"""
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, enum.Enum):
+        return o.value
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """stdlib json encoder with ISO 8601 datetimes (Flask's default uses HTTP dates)"""
+    default = staticmethod(_default)
+    ensure_ascii = False
+
+
+class OrjsonProvider(StdlibJSONProvider):
+    """orjson encoder; datetimes, enums, dataclasses and UUIDs are encoded natively"""
+
+    def _options(self, indent=False):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.keys() - {'default', 'sort_keys', 'indent'}:
+            # Options orjson can't honour (cls, separators, ...) go to the stdlib
+            return super().dumps(obj, **kwargs)
+        option = self._options(indent=bool(kwargs.get('indent')))
+        if not kwargs.get('sort_keys', self.sort_keys):
+            option &= ~orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent=indent))
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def provider_class():
+    """Fastest available provider class"""
+    return OrjsonProvider if orjson is not None else StdlibJSONProvider
@@ -3,12 +3,24 @@ import sqlalchemy as sa
 import sqlalchemy.orm as so
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
-from app import db, login
+from app import db, login, ticket_numbers
 from time import time
 import jwt
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from flask import current_app
 import enum
+import json
+from app.sketches import bucket_index
+
+# Predicate for partial indexes over live (not soft-deleted) rows. It must match
+# what `Model.is_deleted == False` compiles to so the planner can use the index.
+LIVE_ROWS = {
+    'sqlite_where': sa.text('is_deleted = 0'),
+    'postgresql_where': sa.text('is_deleted = false'),
+}
+
+# Tickets due within this many hours are reported as approaching breach
+SLA_WARNING_HOURS = 4
 
 @login.user_loader
 def load_user(id):
@@ -29,6 +41,14 @@ class TicketPriority(enum.Enum):
     HIGH = "High"
     CRITICAL = "Critical"
 
+# Sort rank for priorities so list views can order by urgency through an index
+PRIORITY_RANK = {
+    TicketPriority.LOW.value: 1,
+    TicketPriority.MEDIUM.value: 2,
+    TicketPriority.HIGH.value: 3,
+    TicketPriority.CRITICAL.value: 4
+}
+
 class SLAStatus(enum.Enum):
     WITHIN_SLA = "Within SLA"
     APPROACHING_BREACH = "Approaching Breach"
@@ -147,16 +167,17 @@ class TicketCategory(db.Model):
 
 class Ticket(db.Model):
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
-    title: so.Mapped[str] = so.mapped_column(sa.String(150), nullable=False, index=True)
+    title: so.Mapped[str] = so.mapped_column(sa.String(150), nullable=False)
     description: so.Mapped[str] = so.mapped_column(sa.Text, nullable=False)
-    status: so.Mapped[str] = so.mapped_column(sa.String(50), default='Open', index=True)
-    priority: so.Mapped[str] = so.mapped_column(sa.String(50), default="Medium", index=True)
-    created_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, default=datetime.utcnow, index=True)
-    updated_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    status: so.Mapped[str] = so.mapped_column(sa.String(50), default='Open')
+    priority: so.Mapped[str] = so.mapped_column(sa.String(50), default="Medium")
+    priority_rank: so.Mapped[int] = so.mapped_column(sa.SmallInteger, default=2)
+    created_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, default=datetime.utcnow)
+    updated_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Enhanced fields
     ticket_number: so.Mapped[str] = so.mapped_column(sa.String(20), unique=True, index=True)
-    is_deleted: so.Mapped[bool] = so.mapped_column(sa.Boolean, default=False, index=True)  # Soft delete
+    is_deleted: so.Mapped[bool] = so.mapped_column(sa.Boolean, default=False)  # Soft delete
     resolution_notes: so.Mapped[Optional[str]] = so.mapped_column(sa.Text)
     resolved_at: so.Mapped[Optional[datetime]] = so.mapped_column(sa.DateTime)
     closed_at: so.Mapped[Optional[datetime]] = so.mapped_column(sa.DateTime)
@@ -166,15 +187,24 @@ class Ticket(db.Model):
     actual_hours: so.Mapped[Optional[float]] = so.mapped_column(sa.Float)
     
     # SLA tracking
-    sla_response_due: so.Mapped[Optional[datetime]] = so.mapped_column(sa.DateTime, index=True)
-    sla_resolution_due: so.Mapped[Optional[datetime]] = so.mapped_column(sa.DateTime, index=True)
+    sla_response_due: so.Mapped[Optional[datetime]] = so.mapped_column(sa.DateTime)
+    sla_resolution_due: so.Mapped[Optional[datetime]] = so.mapped_column(sa.DateTime)
     sla_response_breached: so.Mapped[bool] = so.mapped_column(sa.Boolean, default=False)
     sla_resolution_breached: so.Mapped[bool] = so.mapped_column(sa.Boolean, default=False)
     first_response_at: so.Mapped[Optional[datetime]] = so.mapped_column(sa.DateTime)
 
+    # Seconds from created_at to first_response_at / resolved_at, set whenever those are written
+    # (see ticket_durations) so analytics aggregate integers instead of timestamp arithmetic
+    response_seconds: so.Mapped[Optional[int]] = so.mapped_column(sa.Integer)
+    resolution_seconds: so.Mapped[Optional[int]] = so.mapped_column(sa.Integer)
+
+    # Denormalized child counts so list views never touch the child tables
+    comment_count: so.Mapped[int] = so.mapped_column(sa.Integer, default=0, server_default='0')
+    attachment_count: so.Mapped[int] = so.mapped_column(sa.Integer, default=0, server_default='0')
+
     # Foreign keys
-    created_by_id: so.Mapped[Optional[int]] = so.mapped_column(sa.ForeignKey('user.id'), nullable=True, index=True)
-    assigned_to_id: so.Mapped[Optional[int]] = so.mapped_column(sa.ForeignKey('user.id'), nullable=True, index=True)
+    created_by_id: so.Mapped[Optional[int]] = so.mapped_column(sa.ForeignKey('user.id'), nullable=True)
+    assigned_to_id: so.Mapped[Optional[int]] = so.mapped_column(sa.ForeignKey('user.id'), nullable=True)
     category_id: so.Mapped[Optional[int]] = so.mapped_column(sa.ForeignKey('ticket_category.id'), nullable=True, index=True)
 
     # Relationships
@@ -203,20 +233,45 @@ class Ticket(db.Model):
         "AuditLog", back_populates="ticket", cascade="all, delete-orphan"
     )
 
+    # Every write pays for each index on this table, so each one must serve a query
+    # (test_query_plans.py checks). Composite (sort key, id) indexes back keyset pagination.
+    __table_args__ = (
+        sa.Index('ix_ticket_created_at_id', 'created_at', 'id'),
+        sa.Index('ix_ticket_updated_at_id', 'updated_at', 'id'),
+        sa.Index('ix_ticket_priority_rank_id', 'priority_rank', 'id'),
+        sa.Index('ix_ticket_sla_resolution_due_id', 'sla_resolution_due', 'id'),
+        # Partial indexes over live tickets matching the list filters
+        sa.Index('ix_ticket_live_status', 'status', 'created_at', 'id', **LIVE_ROWS),
+        sa.Index('ix_ticket_live_priority', 'priority', 'created_at', 'id', **LIVE_ROWS),
+        # Full rather than partial: SQLite only uses full indexes for the branches of the
+        # non-admin list's created_by_id = ? OR assigned_to_id = ?
+        sa.Index('ix_ticket_assignee_created', 'assigned_to_id', 'created_at', 'id'),
+        sa.Index('ix_ticket_creator_created', 'created_by_id', 'created_at', 'id'),
+        # Covers the dashboard's single grouped pass so it never reads table rows
+        sa.Index('ix_ticket_live_dashboard', 'category_id', 'priority', 'status', 'created_at',
+                 'sla_response_breached', 'sla_resolution_breached', 'sla_response_due', 'sla_resolution_due',
+                 **LIVE_ROWS),
+    )
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         if not self.ticket_number:
             self.ticket_number = self.generate_ticket_number()
         self.calculate_sla_dates()
 
+    @so.validates('priority')
+    def validate_priority(self, key, priority):
+        """Keep priority_rank in step with priority"""
+        self.priority_rank = PRIORITY_RANK.get(priority, PRIORITY_RANK['Medium'])
+        return priority
+
+    def adjust_comment_count(self, delta):
+        """Atomically adjust the visible comment counter; use when a comment is added, deleted or restored"""
+        self.comment_count = Ticket.comment_count + delta
+
     def generate_ticket_number(self):
-        """Generate a unique ticket number"""
-        import random
-        import string
-        prefix = "TKT"
-        timestamp = int(datetime.utcnow().timestamp())
-        random_suffix = ''.join(random.choices(string.digits, k=4))
-        return f"{prefix}-{timestamp}-{random_suffix}"
+        """Next number from the ticket number service (see app.ticket_numbers)"""
+        return ticket_numbers.next_number()
 
     def calculate_sla_dates(self):
         """Calculate SLA due dates based on category settings"""
@@ -228,13 +283,18 @@ class Ticket(db.Model):
 
     def get_sla_status(self):
         """Get current SLA status"""
+        return Ticket.sla_status_for(self.sla_resolution_due, self.sla_resolution_breached)
+
+    @staticmethod
+    def sla_status_for(sla_resolution_due, sla_resolution_breached):
+        """SLA status from the raw columns, for callers that select columns rather than tickets"""
         now = datetime.utcnow()
         
-        if self.sla_resolution_breached or (self.sla_resolution_due and now > self.sla_resolution_due):
+        if sla_resolution_breached or (sla_resolution_due and now > sla_resolution_due):
             return SLAStatus.BREACHED
-        elif self.sla_resolution_due:
-            hours_until_breach = (self.sla_resolution_due - now).total_seconds() / 3600
-            if hours_until_breach <= 4:  # 4 hours warning
+        elif sla_resolution_due:
+            hours_until_breach = (sla_resolution_due - now).total_seconds() / 3600
+            if hours_until_breach <= SLA_WARNING_HOURS:
                 return SLAStatus.APPROACHING_BREACH
         
         return SLAStatus.WITHIN_SLA
@@ -247,18 +307,18 @@ class Ticket(db.Model):
             'description': self.description,
             'status': self.status,
             'priority': self.priority,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'resolved_at': self.resolved_at.isoformat() if getattr(self, 'resolved_at', None) else None,
-            'closed_at': self.closed_at.isoformat() if getattr(self, 'closed_at', None) else None,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'resolved_at': getattr(self, 'resolved_at', None),
+            'closed_at': getattr(self, 'closed_at', None),
             'created_by_id': self.created_by_id,
             'assigned_to_id': self.assigned_to_id,
             'category_id': getattr(self, 'category_id', None),
             'estimated_hours': getattr(self, 'estimated_hours', None),
             'actual_hours': getattr(self, 'actual_hours', None),
             'sla_status': self.get_sla_status().value if hasattr(self, 'get_sla_status') else 'Within SLA',
-            'comment_count': len(getattr(self, 'comments', [])),
-            'attachment_count': len(getattr(self, 'attachments', []))
+            'comment_count': self.comment_count or 0,
+            'attachment_count': self.attachment_count or 0
         }
 
     def __repr__(self):
@@ -266,6 +326,61 @@ class Ticket(db.Model):
         return f"<Ticket {ticket_num} - {self.title} ({self.status})>"
 
 
+TICKET_NUMBER_ATTEMPTS = 5
+
+
+def add_ticket(ticket):
+    """Add and flush a new ticket as the first write of the session's transaction. If its number
+    was taken meanwhile (by an imported ticket), roll back and retry with the next number.
+    """
+    for attempt in range(TICKET_NUMBER_ATTEMPTS):
+        db.session.add(ticket)
+        try:
+            db.session.flush()
+            return ticket
+        except sa.exc.IntegrityError:
+            db.session.rollback()
+            taken = db.session.scalar(sa.select(Ticket.id).where(Ticket.ticket_number == ticket.ticket_number))
+            if taken is None or attempt + 1 == TICKET_NUMBER_ATTEMPTS:
+                raise
+            ticket.ticket_number = ticket.generate_ticket_number()
+
+
+def _elapsed_seconds(start, end):
+    return max(0, int((end - start).total_seconds()))
+
+
+def ticket_durations(created_at, first_response_at, resolved_at):
+    """{'response_seconds', 'resolution_seconds'} for the timestamps, None where not reached yet"""
+    return {
+        'response_seconds': _elapsed_seconds(created_at, first_response_at) if created_at and first_response_at else None,
+        'resolution_seconds': _elapsed_seconds(created_at, resolved_at) if created_at and resolved_at else None,
+    }
+
+
+_DURATION_SOURCES = ('created_at', 'first_response_at', 'resolved_at')
+
+
+def _set_ticket_durations(target):
+    if target.created_at is None and (target.first_response_at or target.resolved_at):
+        target.created_at = datetime.utcnow()
+    for field, seconds in ticket_durations(target.created_at, target.first_response_at, target.resolved_at).items():
+        setattr(target, field, seconds)
+
+
+# Registered ahead of the queue and rollup events, which read the durations
+@sa.event.listens_for(Ticket, 'before_insert')
+def _ticket_inserting_durations(mapper, connection, target):
+    _set_ticket_durations(target)
+
+
+@sa.event.listens_for(Ticket, 'before_update')
+def _ticket_updating_durations(mapper, connection, target):
+    state = sa.inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in _DURATION_SOURCES):
+        _set_ticket_durations(target)
+
+
 class TicketComment(db.Model):
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
     content: so.Mapped[str] = so.mapped_column(sa.Text, nullable=False)
@@ -282,6 +397,11 @@ class TicketComment(db.Model):
     ticket: so.Mapped["Ticket"] = so.relationship("Ticket", back_populates="comments")
     author: so.Mapped["User"] = so.relationship("User", back_populates="comments")
 
+    __table_args__ = (
+        sa.Index('ix_ticket_comment_ticket_created', 'ticket_id', 'created_at'),
+        sa.Index('ix_ticket_comment_live_created_at', 'created_at', **LIVE_ROWS),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -329,6 +449,307 @@ class TicketAttachment(db.Model):
         }
 
 
+STALE_ATTACHMENT_COUNTS = 'stale_attachment_counts'
+
+
+def _adjust_attachment_count(connection, target, delta):
+    connection.execute(
+        sa.update(Ticket).where(Ticket.id == target.ticket_id)
+        .values(attachment_count=Ticket.attachment_count + delta)
+    )
+    # The UPDATE bypasses the session, whose loaded Ticket still holds the old count;
+    # it is expired once the flush is over (flush events must not expire other objects)
+    session = so.object_session(target)
+    if session is not None:
+        session.info.setdefault(STALE_ATTACHMENT_COUNTS, set()).add(target.ticket_id)
+
+
+@sa.event.listens_for(TicketAttachment, 'after_insert')
+def _attachment_inserted(mapper, connection, target):
+    _adjust_attachment_count(connection, target, 1)
+
+
+@sa.event.listens_for(TicketAttachment, 'after_delete')
+def _attachment_deleted(mapper, connection, target):
+    _adjust_attachment_count(connection, target, -1)
+
+
+@sa.event.listens_for(so.Session, 'after_flush_postexec')
+def _expire_attachment_counts(session, flush_context):
+    for ticket_id in session.info.pop(STALE_ATTACHMENT_COUNTS, ()):
+        ticket = session.identity_map.get(session.identity_key(Ticket, ticket_id))
+        if ticket is not None:
+            session.expire(ticket, ['attachment_count'])
+
+
+# --- Work queues ---
+# Each live, unresolved ticket has a row per queue it belongs to: 'open' (key 0), 'assignee'
+# (key = assignee id, 0 for unassigned) and 'category' (key = category id). The (kind, key,
+# due_at, ticket_id) index serves a queue head in SLA order with a range scan of page size,
+# whatever the total number of tickets. Rows are maintained by the Ticket mapper events
+# below; set-based writes that bypass them call refresh_ticket_queues().
+
+QUEUE_STATUSES = (TicketStatus.OPEN.value, TicketStatus.IN_PROGRESS.value, TicketStatus.PENDING.value)
+QUEUE_NO_DUE = datetime(9999, 12, 31)  # Tickets without a resolution SLA sort last
+
+
+class TicketQueueEntry(db.Model):
+    kind: so.Mapped[str] = so.mapped_column(sa.String(10), primary_key=True)
+    key: so.Mapped[int] = so.mapped_column(sa.Integer, primary_key=True)
+    ticket_id: so.Mapped[int] = so.mapped_column(sa.ForeignKey('ticket.id'), primary_key=True, index=True)
+    due_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, nullable=False)
+
+    __table_args__ = (
+        sa.Index('ix_ticket_queue_entry_head', 'kind', 'key', 'due_at', 'ticket_id'),
+    )
+
+
+def ticket_queue_keys(status, is_deleted, assigned_to_id, category_id):
+    """(kind, key) of every queue a ticket with these values belongs to"""
+    if is_deleted or status not in QUEUE_STATUSES:
+        return []
+    keys = [('open', 0), ('assignee', assigned_to_id or 0)]
+    if category_id:
+        keys.append(('category', category_id))
+    return keys
+
+
+_QUEUE_FIELDS = ('status', 'is_deleted', 'assigned_to_id', 'category_id', 'sla_resolution_due')
+
+
+def _write_queue_entries(connection, target):
+    keys = ticket_queue_keys(target.status, target.is_deleted, target.assigned_to_id, target.category_id)
+    if keys:
+        due_at = target.sla_resolution_due or QUEUE_NO_DUE
+        connection.execute(sa.insert(TicketQueueEntry), [
+            {'kind': kind, 'key': key, 'ticket_id': target.id, 'due_at': due_at} for kind, key in keys
+        ])
+
+
+@sa.event.listens_for(Ticket, 'after_insert')
+def _ticket_inserted(mapper, connection, target):
+    _write_queue_entries(connection, target)
+
+
+@sa.event.listens_for(Ticket, 'after_update')
+def _ticket_updated(mapper, connection, target):
+    state = sa.inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in _QUEUE_FIELDS):
+        connection.execute(sa.delete(TicketQueueEntry).where(TicketQueueEntry.ticket_id == target.id))
+        _write_queue_entries(connection, target)
+
+
+@sa.event.listens_for(Ticket, 'after_delete')
+def _ticket_deleted(mapper, connection, target):
+    connection.execute(sa.delete(TicketQueueEntry).where(TicketQueueEntry.ticket_id == target.id))
+
+
+# --- Daily report rollup ---
+# ticket_daily_stats holds per-day counters keyed by (day, category, priority, assignee), with 0
+# for no category and unassigned. A ticket counts towards created, the SLA breach flags and its
+# first-response time on the day it was created, and towards resolved (with its resolution time)
+# and closed on the days those happened. The Ticket mapper events under Rollup maintenance add
+# each write's difference in the same transaction; set-based writes and the nightly reconcile
+# use app.rollups.
+
+class TicketDailyStats(db.Model):
+    __tablename__ = 'ticket_daily_stats'
+
+    day: so.Mapped[date] = so.mapped_column(sa.Date, primary_key=True)
+    category_id: so.Mapped[int] = so.mapped_column(sa.Integer, primary_key=True)
+    priority: so.Mapped[str] = so.mapped_column(sa.String(50), primary_key=True)
+    assignee_id: so.Mapped[int] = so.mapped_column(sa.Integer, primary_key=True)
+
+    created: so.Mapped[int] = so.mapped_column(sa.Integer, default=0, server_default='0')
+    resolved: so.Mapped[int] = so.mapped_column(sa.Integer, default=0, server_default='0')
+    closed: so.Mapped[int] = so.mapped_column(sa.Integer, default=0, server_default='0')
+    response_breached: so.Mapped[int] = so.mapped_column(sa.Integer, default=0, server_default='0')
+    resolution_breached: so.Mapped[int] = so.mapped_column(sa.Integer, default=0, server_default='0')
+    responded: so.Mapped[int] = so.mapped_column(sa.Integer, default=0, server_default='0')
+    response_seconds: so.Mapped[int] = so.mapped_column(sa.BigInteger, default=0, server_default='0')
+    resolution_seconds: so.Mapped[int] = so.mapped_column(sa.BigInteger, default=0, server_default='0')
+
+
+DAILY_STATS_KEY = ('day', 'category_id', 'priority', 'assignee_id')
+DAILY_STATS_COUNTERS = (
+    'created', 'resolved', 'closed', 'response_breached', 'resolution_breached',
+    'responded', 'response_seconds', 'resolution_seconds'
+)
+# Ticket columns every rollup (this one and the duration sketches) is computed from
+TICKET_ROLLUP_FIELDS = (
+    'created_at', 'resolved_at', 'closed_at', 'first_response_at', 'category_id', 'priority',
+    'assigned_to_id', 'is_deleted', 'sla_response_breached', 'sla_resolution_breached',
+    'response_seconds', 'resolution_seconds'
+)
+
+
+def daily_stats_contribution(values):
+    """{(day, category_id, priority, assignee_id): {counter: amount}} for a ticket's TICKET_ROLLUP_FIELDS values"""
+    contribution = {}
+    created_at = values['created_at']
+    if values['is_deleted'] or created_at is None:
+        return contribution
+    # Priority defaults to Medium on the model; rows written around it are counted the same way
+    dimensions = (values['category_id'] or 0, values['priority'] or 'Medium', values['assigned_to_id'] or 0)
+
+    def add(when, counter, amount=1):
+        counters = contribution.setdefault((when.date(),) + dimensions, {})
+        counters[counter] = counters.get(counter, 0) + amount
+
+    add(created_at, 'created')
+    if values['sla_response_breached']:
+        add(created_at, 'response_breached')
+    if values['sla_resolution_breached']:
+        add(created_at, 'resolution_breached')
+    if values['first_response_at'] is not None:
+        add(created_at, 'responded')
+        add(created_at, 'response_seconds', values['response_seconds'] or 0)
+    if values['resolved_at'] is not None:
+        add(values['resolved_at'], 'resolved')
+        add(values['resolved_at'], 'resolution_seconds', values['resolution_seconds'] or 0)
+    if values['closed_at'] is not None:
+        add(values['closed_at'], 'closed')
+    return contribution
+
+
+# --- Duration sketches ---
+# ticket_duration_sketch holds DDSketch bucket counts (see app.sketches) of first-response and
+# resolution times, keyed by (day, category, assignee, metric, bucket) like the daily rollup: a
+# response time on the day the ticket was created, a resolution time on the day it was resolved.
+# Summing the counts over a window merges its daily sketches, so percentiles for any range,
+# category or agent come from one grouped query.
+
+class TicketDurationSketch(db.Model):
+    __tablename__ = 'ticket_duration_sketch'
+
+    day: so.Mapped[date] = so.mapped_column(sa.Date, primary_key=True)
+    category_id: so.Mapped[int] = so.mapped_column(sa.Integer, primary_key=True)
+    assignee_id: so.Mapped[int] = so.mapped_column(sa.Integer, primary_key=True)
+    metric: so.Mapped[str] = so.mapped_column(sa.String(10), primary_key=True)  # 'response' or 'resolution'
+    bucket: so.Mapped[int] = so.mapped_column(sa.SmallInteger, primary_key=True)
+
+    count: so.Mapped[int] = so.mapped_column(sa.Integer, default=0, server_default='0')
+
+
+DURATION_SKETCH_KEY = ('day', 'category_id', 'assignee_id', 'metric', 'bucket')
+DURATION_SKETCH_COUNTERS = ('count',)
+
+
+def duration_sketch_contribution(values):
+    """{(day, category_id, assignee_id, metric, bucket): {'count': 1}} for a ticket's TICKET_ROLLUP_FIELDS values"""
+    contribution = {}
+    if values['is_deleted'] or values['created_at'] is None:
+        return contribution
+    dimensions = (values['category_id'] or 0, values['assigned_to_id'] or 0)
+    if values['response_seconds'] is not None:
+        key = (values['created_at'].date(),) + dimensions + ('response', bucket_index(values['response_seconds']))
+        contribution[key] = {'count': 1}
+    if values['resolution_seconds'] is not None and values['resolved_at'] is not None:
+        key = (values['resolved_at'].date(),) + dimensions + ('resolution', bucket_index(values['resolution_seconds']))
+        contribution[key] = {'count': 1}
+    return contribution
+
+
+# --- Rollup maintenance ---
+# (table, key columns, counter columns, contribution function) of each per-ticket rollup. A
+# contribution maps key tuples to counter amounts; the rollups are kept by adding the difference
+# between a ticket's contributions before and after each write.
+
+TICKET_ROLLUPS = (
+    (TicketDailyStats.__table__, DAILY_STATS_KEY, DAILY_STATS_COUNTERS, daily_stats_contribution),
+    (TicketDurationSketch.__table__, DURATION_SKETCH_KEY, DURATION_SKETCH_COUNTERS, duration_sketch_contribution),
+)
+NO_CONTRIBUTIONS = ({},) * len(TICKET_ROLLUPS)
+
+
+def rollup_contributions(values):
+    """One contribution per TICKET_ROLLUPS entry for a ticket's TICKET_ROLLUP_FIELDS values"""
+    return tuple(contribute(values) for _, _, _, contribute in TICKET_ROLLUPS)
+
+
+def rollup_delta(before, after):
+    """after - before for two contributions (or sums of them), dropping counters that cancel out"""
+    delta = {}
+    for key in before.keys() | after.keys():
+        old, new = before.get(key, {}), after.get(key, {})
+        counters = {c: new.get(c, 0) - old.get(c, 0) for c in old.keys() | new.keys()}
+        counters = {c: amount for c, amount in counters.items() if amount}
+        if counters:
+            delta[key] = counters
+    return delta
+
+
+def apply_rollup_delta(connection, table, key_columns, counter_columns, delta):
+    """Add delta to a rollup table, creating rows as needed, in one upsert where the dialect has one"""
+    if not delta:
+        return
+    rows = [
+        {**dict(zip(key_columns, key)), **{c: counters.get(c, 0) for c in counter_columns}}
+        for key, counters in delta.items()
+    ]
+    if connection.dialect.name in ('sqlite', 'postgresql'):
+        if connection.dialect.name == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).values(rows)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={c: table.c[c] + stmt.excluded[c] for c in counter_columns}
+        ))
+        return
+    for row in rows:
+        matches = [table.c[k] == row[k] for k in key_columns]
+        updated = connection.execute(
+            table.update().where(*matches).values({c: table.c[c] + row[c] for c in counter_columns})
+        ).rowcount
+        if not updated:
+            connection.execute(table.insert().values(row))
+
+
+def apply_rollup_changes(connection, before, after):
+    """Apply the difference between two rollup_contributions() tuples to every rollup"""
+    for (table, key_columns, counter_columns, _), old, new in zip(TICKET_ROLLUPS, before, after):
+        apply_rollup_delta(connection, table, key_columns, counter_columns, rollup_delta(old, new))
+
+
+def _stored_rollup_contributions(connection, target):
+    """Contributions of the ticket as stored; attribute history lacks the old values of expired attributes"""
+    row = connection.execute(
+        sa.select(*[getattr(Ticket, field) for field in TICKET_ROLLUP_FIELDS]).where(Ticket.id == target.id)
+    ).mappings().first()
+    return rollup_contributions(row) if row else NO_CONTRIBUTIONS
+
+
+def _target_rollup_contributions(target):
+    return rollup_contributions({field: getattr(target, field) for field in TICKET_ROLLUP_FIELDS})
+
+
+@sa.event.listens_for(Ticket, 'after_insert')
+def _ticket_inserted_stats(mapper, connection, target):
+    apply_rollup_changes(connection, NO_CONTRIBUTIONS, _target_rollup_contributions(target))
+
+
+@sa.event.listens_for(Ticket, 'before_update')
+def _ticket_updating_stats(mapper, connection, target):
+    state = sa.inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in TICKET_ROLLUP_FIELDS):
+        state.info['rollups_before'] = _stored_rollup_contributions(connection, target)
+
+
+@sa.event.listens_for(Ticket, 'after_update')
+def _ticket_updated_stats(mapper, connection, target):
+    state = sa.inspect(target)
+    before = state.info.pop('rollups_before', None)
+    if before is not None:
+        apply_rollup_changes(connection, before, _target_rollup_contributions(target))
+
+
+@sa.event.listens_for(Ticket, 'before_delete')
+def _ticket_deleting_stats(mapper, connection, target):
+    apply_rollup_changes(connection, _stored_rollup_contributions(connection, target), NO_CONTRIBUTIONS)
+
+
 class TicketWatcher(db.Model):
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
     created_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, default=datetime.utcnow)
@@ -359,7 +780,7 @@ class ClientTicket(db.Model):
     company: so.Mapped[Optional[str]] = so.mapped_column(sa.String(100))
     reference_number: so.Mapped[str] = so.mapped_column(sa.String(20), unique=True, index=True)
 
-    ticket_id: so.Mapped[Optional[int]] = so.mapped_column(sa.ForeignKey('ticket.id'))
+    ticket_id: so.Mapped[Optional[int]] = so.mapped_column(sa.ForeignKey('ticket.id'), index=True)
     ticket: so.Mapped[Optional["Ticket"]] = so.relationship(
         "Ticket", back_populates="client_ticket"
     )
@@ -401,6 +822,11 @@ class AuditLog(db.Model):
     user: so.Mapped[Optional["User"]] = so.relationship("User", back_populates="audit_logs")
     ticket: so.Mapped[Optional["Ticket"]] = so.relationship("Ticket", back_populates="audit_logs")
 
+    __table_args__ = (
+        sa.Index('ix_audit_log_user_created', 'user_id', 'created_at'),
+        sa.Index('ix_audit_log_ticket_created', 'ticket_id', 'created_at'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -422,21 +848,269 @@ class TokenBlacklist(db.Model):
     created_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, default=datetime.utcnow, index=True)
 
 
-# Create database indexes for performance
-def create_indexes():
-    """Create additional database indexes for performance"""
-    try:
-        # Ticket indexes
-        db.engine.execute(sa.text('CREATE INDEX IF NOT EXISTS idx_ticket_status_priority ON ticket(status, priority)'))
-        db.engine.execute(sa.text('CREATE INDEX IF NOT EXISTS idx_ticket_created_assigned ON ticket(created_by_id, assigned_to_id)'))
-        db.engine.execute(sa.text('CREATE INDEX IF NOT EXISTS idx_ticket_sla_dates ON ticket(sla_response_due, sla_resolution_due)'))
-        
-        # Comment indexes
-        db.engine.execute(sa.text('CREATE INDEX IF NOT EXISTS idx_comment_ticket_created ON ticket_comment(ticket_id, created_at)'))
-        
-        # Audit log indexes
-        db.engine.execute(sa.text('CREATE INDEX IF NOT EXISTS idx_audit_user_created ON audit_log(user_id, created_at)'))
-        db.engine.execute(sa.text('CREATE INDEX IF NOT EXISTS idx_audit_ticket_created ON audit_log(ticket_id, created_at)'))
-        
-    except Exception as e:
-        print(f"Error creating indexes: {e}")
+class TicketNumberCounter(db.Model):
+    """Next unreserved ticket number; workers advance it a block at a time"""
+    name: so.Mapped[str] = so.mapped_column(sa.String(20), primary_key=True)
+    next_value: so.Mapped[int] = so.mapped_column(sa.BigInteger, nullable=False)
+
+
+class ImportJob(db.Model):
+    """Progress and checkpoint of a bulk ticket import; committed together with each batch of rows"""
+    id: so.Mapped[str] = so.mapped_column(sa.String(36), primary_key=True)
+    source: so.Mapped[Optional[str]] = so.mapped_column(sa.String(255))
+    format: so.Mapped[str] = so.mapped_column(sa.String(10), nullable=False)
+    status: so.Mapped[str] = so.mapped_column(sa.String(20), default='running', index=True)
+    rows_read: so.Mapped[int] = so.mapped_column(sa.Integer, default=0)  # Checkpoint: last committed source row
+    imported: so.Mapped[int] = so.mapped_column(sa.Integer, default=0)
+    failed: so.Mapped[int] = so.mapped_column(sa.Integer, default=0)
+    errors: so.Mapped[Optional[str]] = so.mapped_column(sa.Text)  # JSON list of {row, errors}, capped
+    message: so.Mapped[Optional[str]] = so.mapped_column(sa.Text)
+    created_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, default=datetime.utcnow)
+    updated_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at: so.Mapped[Optional[datetime]] = so.mapped_column(sa.DateTime)
+    
+    created_by_id: so.Mapped[Optional[int]] = so.mapped_column(sa.ForeignKey('user.id'), nullable=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'source': self.source,
+            'format': self.format,
+            'status': self.status,
+            'rows_read': self.rows_read,
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': json.loads(self.errors) if self.errors else [],
+            'message': self.message,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'finished_at': self.finished_at
+        }
+
+
+class ReportJob(db.Model):
+    """A report run in the background (see app.report_jobs); the row is the durable queue entry"""
+    id: so.Mapped[str] = so.mapped_column(sa.String(36), primary_key=True)
+    report: so.Mapped[str] = so.mapped_column(sa.String(20), nullable=False)
+    format: so.Mapped[str] = so.mapped_column(sa.String(10), nullable=False)
+    params: so.Mapped[Optional[str]] = so.mapped_column(sa.Text)  # JSON: start_date/end_date or days
+    status: so.Mapped[str] = so.mapped_column(sa.String(20), default='queued', index=True)
+    rows_written: so.Mapped[int] = so.mapped_column(sa.Integer, default=0)
+    total_rows: so.Mapped[Optional[int]] = so.mapped_column(sa.Integer)
+    result_size: so.Mapped[Optional[int]] = so.mapped_column(sa.BigInteger)  # Compressed bytes on disk
+    attempts: so.Mapped[int] = so.mapped_column(sa.Integer, default=0)
+    worker: so.Mapped[Optional[str]] = so.mapped_column(sa.String(100))  # host:pid running it
+    message: so.Mapped[Optional[str]] = so.mapped_column(sa.Text)
+    created_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, default=datetime.utcnow)
+    updated_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    started_at: so.Mapped[Optional[datetime]] = so.mapped_column(sa.DateTime)
+    finished_at: so.Mapped[Optional[datetime]] = so.mapped_column(sa.DateTime)
+    
+    created_by_id: so.Mapped[Optional[int]] = so.mapped_column(sa.ForeignKey('user.id'), nullable=True, index=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'report': self.report,
+            'format': self.format,
+            'params': json.loads(self.params) if self.params else {},
+            'status': self.status,
+            'rows_written': self.rows_written,
+            'total_rows': self.total_rows,
+            'progress': round(min(100, self.rows_written / self.total_rows * 100), 1) if self.total_rows
+                        else (100.0 if self.status == 'done' else 0.0),
+            'result_size': self.result_size,
+            'attempts': self.attempts,
+            'message': self.message,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+# --- Archive tier ---
+# Closed and soft-deleted tickets are moved, with their child rows, into archived_* copies of
+# the live tables (see app.archive). The copies have the same columns without foreign keys, plus
+# archived_at; the mapped classes below are read-only and reuse the live models' serializers.
+
+def archive_table(table):
+    """archived_<name>: table's columns without constraints or defaults, plus archived_at"""
+    columns = [
+        sa.Column(column.name, column.type, primary_key=column.primary_key,
+                  nullable=column.nullable, autoincrement=False)
+        for column in table.columns
+    ]
+    columns.append(sa.Column('archived_at', sa.DateTime, nullable=False))
+    if 'ticket_id' in table.columns:
+        columns.append(sa.Index(f'ix_archived_{table.name}_ticket_id', 'ticket_id'))
+    if 'ticket_number' in table.columns:
+        # Numbers stay reserved while archived (imports check them, unarchive restores them)
+        columns.append(sa.Index(f'ix_archived_{table.name}_ticket_number', 'ticket_number'))
+    return sa.Table(f'archived_{table.name}', db.metadata, *columns)
+
+
+def _archived_user(cls_name, column):
+    return so.relationship('User', primaryjoin=f'foreign({cls_name}.{column}) == User.id', viewonly=True)
+
+
+class ArchivedTicket(db.Model):
+    __table__ = archive_table(Ticket.__table__)
+
+    created_by = _archived_user('ArchivedTicket', 'created_by_id')
+    assigned_to = _archived_user('ArchivedTicket', 'assigned_to_id')
+    category = so.relationship(
+        'TicketCategory', primaryjoin='foreign(ArchivedTicket.category_id) == TicketCategory.id', viewonly=True
+    )
+    client_ticket = so.relationship(
+        'ArchivedClientTicket', primaryjoin='foreign(ArchivedClientTicket.ticket_id) == ArchivedTicket.id',
+        uselist=False, viewonly=True
+    )
+    comments = so.relationship(
+        'ArchivedTicketComment', primaryjoin='foreign(ArchivedTicketComment.ticket_id) == ArchivedTicket.id',
+        order_by='ArchivedTicketComment.created_at', viewonly=True
+    )
+    attachments = so.relationship(
+        'ArchivedTicketAttachment', primaryjoin='foreign(ArchivedTicketAttachment.ticket_id) == ArchivedTicket.id',
+        viewonly=True
+    )
+    watchers = so.relationship(
+        'ArchivedTicketWatcher', primaryjoin='foreign(ArchivedTicketWatcher.ticket_id) == ArchivedTicket.id',
+        viewonly=True
+    )
+    audit_logs = so.relationship(
+        'ArchivedAuditLog', primaryjoin='foreign(ArchivedAuditLog.ticket_id) == ArchivedTicket.id', viewonly=True
+    )
+
+    get_sla_status = Ticket.get_sla_status
+
+
+class ArchivedTicketComment(db.Model):
+    __table__ = archive_table(TicketComment.__table__)
+
+    author = _archived_user('ArchivedTicketComment', 'author_id')
+
+    to_dict = TicketComment.to_dict
+
+
+class ArchivedTicketAttachment(db.Model):
+    __table__ = archive_table(TicketAttachment.__table__)
+
+    uploaded_by = _archived_user('ArchivedTicketAttachment', 'uploaded_by_id')
+
+    to_dict = TicketAttachment.to_dict
+
+
+class ArchivedTicketWatcher(db.Model):
+    __table__ = archive_table(TicketWatcher.__table__)
+
+    user = _archived_user('ArchivedTicketWatcher', 'user_id')
+
+
+class ArchivedClientTicket(db.Model):
+    __table__ = archive_table(ClientTicket.__table__)
+
+    ticket = so.relationship(
+        'ArchivedTicket', primaryjoin='foreign(ArchivedClientTicket.ticket_id) == ArchivedTicket.id', viewonly=True
+    )
+
+    to_dict = ClientTicket.to_dict
+
+
+class ArchivedAuditLog(db.Model):
+    __table__ = archive_table(AuditLog.__table__)
+
+    user = _archived_user('ArchivedAuditLog', 'user_id')
+
+    to_dict = AuditLog.to_dict
+
+
+# Live model -> archive model, parents before children
+ARCHIVED_MODELS = {
+    Ticket: ArchivedTicket,
+    TicketComment: ArchivedTicketComment,
+    TicketAttachment: ArchivedTicketAttachment,
+    TicketWatcher: ArchivedTicketWatcher,
+    ClientTicket: ArchivedClientTicket,
+    AuditLog: ArchivedAuditLog,
+}
+
+
+def recount_ticket_counters(ticket_ids=None):
+    """Recompute comment_count and attachment_count from the child tables.
+    
+    Set-based: one UPDATE with correlated subqueries, optionally restricted to ticket_ids.
+    Returns the number of ticket rows updated; the caller commits.
+    """
+    comments = sa.select(sa.func.count(TicketComment.id)).where(
+        TicketComment.ticket_id == Ticket.id,
+        TicketComment.is_deleted == False
+    ).scalar_subquery()
+    attachments = sa.select(sa.func.count(TicketAttachment.id)).where(
+        TicketAttachment.ticket_id == Ticket.id
+    ).scalar_subquery()
+    
+    stmt = sa.update(Ticket).values(comment_count=comments, attachment_count=attachments)
+    if ticket_ids is not None:
+        stmt = stmt.where(Ticket.id.in_(ticket_ids))
+    
+    return db.session.execute(stmt.execution_options(synchronize_session=False)).rowcount
+
+
+def refresh_ticket_queues(criterion=None):
+    """Rebuild queue entries for tickets matching criterion (every ticket when None).
+    
+    For writes that bypass the ORM events: set-based UPDATEs and executemany INSERTs.
+    One DELETE and an INSERT ... SELECT per queue kind; the caller commits.
+    """
+    stale = sa.delete(TicketQueueEntry)
+    tickets = [Ticket.is_deleted == False, Ticket.status.in_(QUEUE_STATUSES)]
+    if criterion is not None:
+        stale = stale.where(TicketQueueEntry.ticket_id.in_(sa.select(Ticket.id).where(criterion)))
+        tickets.append(criterion)
+    db.session.execute(stale)
+
+    due_at = sa.func.coalesce(Ticket.sla_resolution_due, sa.literal(QUEUE_NO_DUE, sa.DateTime))
+    queues = (
+        ('open', sa.literal(0), ()),
+        ('assignee', sa.func.coalesce(Ticket.assigned_to_id, 0), ()),
+        ('category', Ticket.category_id, (Ticket.category_id.is_not(None),)),
+    )
+    written = 0
+    for kind, key, criteria in queues:
+        entries = sa.select(sa.literal(kind, sa.String), key, Ticket.id, due_at).where(*tickets, *criteria)
+        written += db.session.execute(
+            sa.insert(TicketQueueEntry).from_select(['kind', 'key', 'ticket_id', 'due_at'], entries)
+        ).rowcount
+    return written
+
+
+def refresh_ticket_durations(criterion=None, model=None, batch_size=1000):
+    """Recompute response_seconds/resolution_seconds for tickets matching criterion (all when None).
+    
+    For writes that bypass the ORM events, and the backfill. Walks the tickets in id order
+    batch_size at a time and executemany-updates the rows whose stored durations differ.
+    model may be ArchivedTicket; returns the number of rows updated, the caller commits.
+    """
+    model = model or Ticket
+    updated = 0
+    last_id = 0
+    while True:
+        query = sa.select(
+            model.id, model.created_at, model.first_response_at, model.resolved_at,
+            model.response_seconds, model.resolution_seconds
+        ).where(model.id > last_id).order_by(model.id).limit(batch_size)
+        if criterion is not None:
+            query = query.where(criterion)
+        rows = db.session.execute(query).all()
+        if not rows:
+            return updated
+        last_id = rows[-1].id
+        changes = []
+        for row in rows:
+            durations = ticket_durations(row.created_at, row.first_response_at, row.resolved_at)
+            if (row.response_seconds, row.resolution_seconds) != (durations['response_seconds'], durations['resolution_seconds']):
+                changes.append({'id': row.id, **durations})
+        if changes:
+            db.session.execute(sa.update(model), changes)
+            updated += len(changes)
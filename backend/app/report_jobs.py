@@ -0,0 +1,338 @@
+"""Background report jobs.
+
+POST /api/reports/jobs stores a ReportJob row and submits its id to this
+worker's pool. Jobs run in a process pool so that encoding and compressing a
+year of rows does not hold a web worker's GIL; each pool process builds its own
+app from the submitting app's config. A job claims its row with a conditional
+UPDATE, reads its rows in keyset batches (committing progress between them) and
+writes a gzip file under REPORT_JOB_DIR, renamed into place once complete.
+
+The rows are the queue, so jobs survive a restart: resume() resubmits jobs that
+are still queued and running jobs whose process is gone or that have not
+reported progress for REPORT_JOB_STALE_SECONDS. Every worker calls it on its
+first job request (and then at most once a minute); `flask reports run-jobs`
+does the same in the foreground. A job whose process died
+REPORT_JOB_MAX_ATTEMPTS times is failed instead of retried. With
+REPORT_JOB_WORKERS=0 jobs run on a thread in the web worker instead.
+"""
+import gzip
+import json
+import multiprocessing
+import os
+import pickle
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from flask import current_app
+
+from app import db
+from app.models import ReportJob
+from app.exports import EXPORT_FORMATS, EXPORT_REPORTS, export_batches, count_rows, encode, gzip_chunks
+
+# report: (formats, admin only)
+REPORT_JOB_TYPES = {
+    'tickets': (tuple(EXPORT_FORMATS), True),
+    'audit': (tuple(EXPORT_FORMATS), True),
+    'dashboard': (('json',), False),
+    'trends': (('json',), False),
+    'performance': (('json',), False),
+}
+RESUME_INTERVAL = 60
+READ_CHUNK_SIZE = 64 * 1024
+
+_executor = None
+_executor_pid = None
+_last_resume = None
+_lock = threading.Lock()
+_worker_app = None
+
+
+class ReportJobError(Exception):
+    """The job request is invalid (unknown report, bad format or dates, ...)"""
+    pass
+
+
+class JobSuperseded(Exception):
+    """Another process took the job over after presuming this one dead"""
+    pass
+
+
+def _worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _parse_date(value, default):
+    if not value:
+        return default
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ReportJobError('Invalid date format. Use ISO format (YYYY-MM-DD)')
+
+
+def result_path(job):
+    return os.path.join(current_app.config['REPORT_JOB_DIR'], f'{job.id}.{job.format}.gz')
+
+
+def create_job(user, report, fmt=None, start_date=None, end_date=None, days=None):
+    """Validate a job request and store it as queued; the caller checks access to the report,
+    commits, then calls submit()
+    """
+    if report not in REPORT_JOB_TYPES:
+        raise ReportJobError(f"Unknown report. Use one of: {', '.join(REPORT_JOB_TYPES)}")
+    formats, _ = REPORT_JOB_TYPES[report]
+    fmt = (fmt or 'json').lower()
+    if fmt not in formats:
+        raise ReportJobError(f"Invalid format. Use one of: {', '.join(formats)}")
+
+    if report in EXPORT_REPORTS:
+        now = datetime.utcnow()
+        start = _parse_date(start_date, now - timedelta(days=30))
+        end = _parse_date(end_date, now)
+        params = {'start_date': start.isoformat(), 'end_date': end.isoformat()}
+    else:
+        try:
+            days = int(days) if days is not None else 30
+        except (TypeError, ValueError):
+            raise ReportJobError('days must be an integer')
+        if days < 1:
+            raise ReportJobError('days must be positive')
+        params = {'days': days}
+
+    job = ReportJob(id=str(uuid.uuid4()), report=report, format=fmt, params=json.dumps(params),
+                    status='queued', rows_written=0, attempts=0, created_by_id=user.id)
+    db.session.add(job)
+    return job
+
+
+# --- Running jobs ---
+
+def _claim(job_id, attempts):
+    """Mark the job running under this process; False if another process got there first"""
+    max_attempts = current_app.config.get('REPORT_JOB_MAX_ATTEMPTS', 3)
+    now = datetime.utcnow()
+    claimed = db.session.execute(
+        sa.update(ReportJob).where(
+            ReportJob.id == job_id,
+            ReportJob.status.in_(['queued', 'running']),
+            ReportJob.attempts == attempts,
+            ReportJob.attempts < max_attempts
+        ).values(
+            status='running', attempts=attempts + 1, worker=_worker_name(),
+            rows_written=0, started_at=now, updated_at=now
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return bool(claimed)
+
+
+def _update(owner, **values):
+    """Record progress (or the outcome) while this process still owns the job.
+    owner is (job id, attempt number) as claimed; a takeover bumps the attempt number.
+    """
+    job_id, attempt = owner
+    updated = db.session.execute(
+        sa.update(ReportJob).where(
+            ReportJob.id == job_id,
+            ReportJob.status == 'running',
+            ReportJob.attempts == attempt
+        ).values(updated_at=datetime.utcnow(), **values).execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    if not updated:
+        raise JobSuperseded(job_id)
+
+
+def _export_chunks(job, owner, params):
+    start_date = datetime.fromisoformat(params['start_date'])
+    end_date = datetime.fromisoformat(params['end_date'])
+    _update(owner, total_rows=count_rows(db.session, job.report, start_date, end_date))
+
+    def records():
+        written = 0
+        for batch in export_batches(db.session, job.report, start_date, end_date):
+            yield from batch
+            written += len(batch)
+            _update(owner, rows_written=written)
+
+    _, fields = EXPORT_REPORTS[job.report]
+    envelope = {'report_type': job.report, 'start_date': start_date, 'end_date': end_date}
+    return encode(records(), job.format, fields, envelope)
+
+
+def _report_chunks(job, params):
+    from app.api.reports import dashboard_report, trends_report, performance_report
+    build = {'dashboard': dashboard_report, 'trends': trends_report, 'performance': performance_report}[job.report]
+    yield current_app.json.dumps(build(params['days']))
+
+
+def run_job(job_id, attempts):
+    """Claim and run a job to completion in the current app context"""
+    if not _claim(job_id, attempts):
+        return
+    owner = (job_id, attempts + 1)
+    job = db.session.get(ReportJob, job_id)
+    params = json.loads(job.params or '{}')
+    path = result_path(job)
+    partial = f'{path}.{os.getpid()}.part'
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        chunks = _export_chunks(job, owner, params) if job.report in EXPORT_REPORTS else _report_chunks(job, params)
+        with open(partial, 'wb') as f:
+            for data in gzip_chunks(chunks):
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(partial, path)
+        _update(owner, status='done', result_size=os.path.getsize(path), finished_at=datetime.utcnow())
+    except JobSuperseded:
+        db.session.rollback()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Report job {job_id} failed: {str(e)}")
+        try:
+            _update(owner, status='failed', message=str(e), finished_at=datetime.utcnow())
+        except JobSuperseded:
+            pass
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+
+def _init_worker(config):
+    """Pool process initializer: one app per process, built from the web worker's config"""
+    global _worker_app
+    from app import create_app
+    _worker_app = create_app(type('ReportJobConfig', (), config))
+
+
+def _process_main(job_id, attempts):
+    with _worker_app.app_context():
+        try:
+            run_job(job_id, attempts)
+        finally:
+            db.session.remove()
+
+
+def _thread_main(app, job_id, attempts):
+    with app.app_context():
+        try:
+            run_job(job_id, attempts)
+        finally:
+            db.session.remove()
+
+
+def _portable_config(app):
+    """The picklable part of app.config, to rebuild the app in a pool process"""
+    config = {}
+    for key, value in app.config.items():
+        if not key.isupper():
+            continue
+        try:
+            pickle.dumps(value)
+        except Exception:
+            continue
+        config[key] = value
+    return config
+
+
+def _get_executor(app):
+    global _executor, _executor_pid
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            # Forked workers must not share the parent's pool
+            workers = app.config.get('REPORT_JOB_WORKERS', 2)
+            if workers > 0:
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(_portable_config(app),)
+                )
+            else:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='report-job')
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def submit(job):
+    """Hand a committed job to this worker's pool"""
+    global _executor
+    app = current_app._get_current_object()
+    executor = _get_executor(app)
+    if isinstance(executor, ThreadPoolExecutor):
+        executor.submit(_thread_main, app, job.id, job.attempts)
+        return
+    try:
+        executor.submit(_process_main, job.id, job.attempts)
+    except BrokenProcessPool:
+        # A pool process died (its job is resumed later); start a fresh pool
+        with _lock:
+            _executor = None
+        _get_executor(app).submit(_process_main, job.id, job.attempts)
+
+
+def _presumed_dead(job, stale_before):
+    if job.updated_at < stale_before:
+        return True
+    host, _, pid = (job.worker or '').rpartition(':')
+    return host == socket.gethostname() and pid.isdigit() and not _pid_alive(int(pid))
+
+
+def resumable_jobs():
+    """Queued jobs, and running jobs presumed dead; jobs out of attempts are failed instead"""
+    stale_before = datetime.utcnow() - timedelta(seconds=current_app.config.get('REPORT_JOB_STALE_SECONDS', 900))
+    max_attempts = current_app.config.get('REPORT_JOB_MAX_ATTEMPTS', 3)
+    jobs = []
+    for job in db.session.scalars(
+        sa.select(ReportJob).where(ReportJob.status.in_(['queued', 'running'])).order_by(ReportJob.created_at)
+    ):
+        if job.status == 'running' and not _presumed_dead(job, stale_before):
+            continue
+        if job.attempts >= max_attempts:
+            job.status = 'failed'
+            job.message = f'Gave up after {job.attempts} attempts'
+            job.finished_at = datetime.utcnow()
+            continue
+        jobs.append(job)
+    db.session.commit()
+    return jobs
+
+
+def resume(force=False):
+    """Resubmit jobs left behind by restarted workers; throttled to once a minute per process"""
+    global _last_resume
+    with _lock:
+        if not force and _last_resume is not None and time.monotonic() - _last_resume < RESUME_INTERVAL:
+            return 0
+        _last_resume = time.monotonic()
+    jobs = resumable_jobs()
+    for job in jobs:
+        submit(job)
+    return len(jobs)
+
+
+def iter_result(path, decompress):
+    """Stream a finished result file, gunzipped on the fly when decompress"""
+    with (gzip.open(path, 'rb') if decompress else open(path, 'rb')) as f:
+        while True:
+            data = f.read(READ_CHUNK_SIZE)
+            if not data:
+                return
+            yield data
@@ -0,0 +1,116 @@
+"""Maintenance of the per-ticket rollups read by the reports: ticket_daily_stats and the
+ticket_duration_sketch quantile sketches (models.TICKET_ROLLUPS).
+
+Ticket writes through the ORM update the rollups from the mapper events in
+app.models. Set-based writes (bulk updates, imports) bypass those events and
+instead diff the affected tickets' contributions around the write:
+
+    before = contributions(Ticket.id.in_(ids))
+    db.session.execute(sa.update(Ticket)...)
+    apply_changes(before, Ticket.id.in_(ids))
+
+reconcile() recomputes a range of days from the tickets and corrects rows that
+drifted; `flask reports reconcile` is meant to run nightly. Archived tickets
+still count, so archiving and unarchiving leave the rollups unchanged.
+"""
+from datetime import datetime, time, timedelta
+
+import sqlalchemy as sa
+
+from app import db
+from app.models import (
+    Ticket, ArchivedTicket, TICKET_ROLLUPS, TICKET_ROLLUP_FIELDS, NO_CONTRIBUTIONS,
+    rollup_contributions, apply_rollup_changes
+)
+
+BATCH_SIZE = 1000
+
+
+def _accumulate(total, contribution):
+    for key, counters in contribution.items():
+        target = total.setdefault(key, {})
+        for counter, amount in counters.items():
+            target[counter] = target.get(counter, 0) + amount
+    return total
+
+
+def _sum_contributions(query, totals=None):
+    """Add the contributions of query's rows to totals (one dict per rollup)"""
+    totals = totals or tuple({} for _ in TICKET_ROLLUPS)
+    result = db.session.execute(query.execution_options(stream_results=True, yield_per=BATCH_SIZE))
+    for partition in result.mappings().partitions():
+        for row in partition:
+            for total, contribution in zip(totals, rollup_contributions(row)):
+                _accumulate(total, contribution)
+    return totals
+
+
+def _fields(model):
+    return sa.select(*[getattr(model, field) for field in TICKET_ROLLUP_FIELDS])
+
+
+def contributions(criterion):
+    """Summed rollup contributions of the (live table) tickets matching criterion"""
+    return _sum_contributions(_fields(Ticket).where(criterion))
+
+
+def apply_changes(before, criterion):
+    """Apply the difference between before (None for newly inserted tickets) and the current
+    contributions of criterion's tickets
+    """
+    apply_rollup_changes(db.session.connection(), before or NO_CONTRIBUTIONS, contributions(criterion))
+
+
+def reconcile(start_day=None, end_day=None):
+    """Recompute every rollup for [start_day, end_day] (all days when None) from the live and
+    archived tickets and rewrite the rows that differ; returns the number corrected.
+    The caller commits.
+    """
+    start = datetime.combine(start_day, time.min) if start_day else None
+    end = datetime.combine(end_day + timedelta(days=1), time.min) if end_day else None
+
+    def in_range(column):
+        bounds = []
+        if start is not None:
+            bounds.append(column >= start)
+        if end is not None:
+            bounds.append(column < end)
+        return sa.and_(*bounds)
+
+    totals = None
+    for model in (Ticket, ArchivedTicket):
+        query = _fields(model)
+        if start is not None or end is not None:
+            # A ticket contributes on the days it was created, resolved and closed
+            query = query.where(sa.or_(in_range(model.created_at), in_range(model.resolved_at), in_range(model.closed_at)))
+        totals = _sum_contributions(query, totals)
+
+    corrected = 0
+    for (table, key_columns, counter_columns, _), expected in zip(TICKET_ROLLUPS, totals):
+        expected = {
+            key: counters for key, counters in expected.items()
+            if (start_day is None or key[0] >= start_day) and (end_day is None or key[0] <= end_day)
+        }
+
+        stored = sa.select(table)
+        if start_day is not None:
+            stored = stored.where(table.c.day >= start_day)
+        if end_day is not None:
+            stored = stored.where(table.c.day <= end_day)
+        actual = {
+            tuple(row[k] for k in key_columns): {c: row[c] for c in counter_columns if row[c]}
+            for row in db.session.execute(stored).mappings()
+        }
+
+        for key in actual.keys() | expected.keys():
+            counters = {c: amount for c, amount in expected.get(key, {}).items() if amount}
+            if actual.get(key) == counters:
+                continue
+            corrected += 1
+            if key in actual:
+                db.session.execute(table.delete().where(*[table.c[k] == v for k, v in zip(key_columns, key)]))
+            if counters:
+                db.session.execute(table.insert().values(
+                    **dict(zip(key_columns, key)), **{c: counters.get(c, 0) for c in counter_columns}
+                ))
+    return corrected
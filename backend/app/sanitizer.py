@@ -0,0 +1,60 @@
+"""HTML sanitizer engine behind utils.sanitize_html.
+
+bleach.clean() builds a new Cleaner (and its html5lib parser and serializer
+configuration) on every call. HTMLSanitizer builds one Cleaner per thread,
+since Cleaner instances are not thread-safe, and reuses it. Input with no
+markup and nothing the parser would rewrite is returned as-is without parsing.
+Results for other input are kept in a bounded LRU keyed by a digest of the
+content, so repeated text (templates, bulk edits, imports) is cleaned once.
+"""
+import hashlib
+import re
+import threading
+
+from bleach.sanitizer import Cleaner
+
+from app.caching import LRUCache
+
+# Characters bleach/html5lib would change: markup and entities, and control
+# characters it drops or replaces (\r is normalised to \n). Text without any
+# of them comes back from Cleaner.clean() unchanged.
+NEEDS_CLEANING = re.compile(r'[<>&\x00-\x08\x0b-\x1f]')
+
+CACHE_MAX_ENTRIES = 1024
+CACHE_MAX_LENGTH = 20000  # Longer content is cleaned every time rather than held in memory
+
+
+class HTMLSanitizer:
+    def __init__(self, tags, attributes, strip=True, cache_size=CACHE_MAX_ENTRIES):
+        self.tags = tags
+        self.attributes = attributes
+        self.strip = strip
+        self._local = threading.local()
+        self._cache = LRUCache(cache_size) if cache_size else None
+
+    @property
+    def cleaner(self):
+        """This thread's Cleaner, built on first use"""
+        cleaner = getattr(self._local, 'cleaner', None)
+        if cleaner is None:
+            cleaner = self._local.cleaner = Cleaner(tags=self.tags, attributes=self.attributes, strip=self.strip)
+        return cleaner
+
+    def clean(self, content):
+        if not content:
+            return ""
+        if not NEEDS_CLEANING.search(content):
+            return content
+        if self._cache is None or len(content) > CACHE_MAX_LENGTH:
+            return self.cleaner.clean(content)
+
+        key = hashlib.blake2b(content.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        cleaned = self._cache.get(key)
+        if cleaned is None:
+            cleaned = self.cleaner.clean(content)
+            self._cache.set(key, cleaned)
+        return cleaned
+
+    def clear_cache(self):
+        if self._cache is not None:
+            self._cache.clear()
@@ -0,0 +1,62 @@
+"""DDSketch quantile sketches for ticket durations.
+
+A value is counted in the logarithmic bucket ceil(log_gamma(value)), with
+gamma = (1 + a) / (1 - a). Any quantile read back from the bucket counts is
+then within relative accuracy a of the true value, whatever the distribution.
+Merging two sketches adds their bucket counts, and removing a value subtracts
+one, so the counts can live in ticket_duration_sketch as ordinary rollup
+counters: kept up to date by the same per-write deltas and nightly reconcile as
+ticket_daily_stats, and merged for any window by a SUM ... GROUP BY bucket.
+"""
+import math
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+ZERO_BUCKET = -1  # Durations under a second; log buckets of values >= 1 start at 0
+
+_LOG_GAMMA = math.log(GAMMA)
+
+
+def bucket_index(value):
+    if value < 1:
+        return ZERO_BUCKET
+    return math.ceil(math.log(value) / _LOG_GAMMA)
+
+
+def bucket_value(index):
+    """Representative value of a bucket: within RELATIVE_ACCURACY of everything counted in it"""
+    if index == ZERO_BUCKET:
+        return 0.0
+    return 2 * GAMMA ** index / (GAMMA + 1)
+
+
+class DDSketch:
+    """Bucket counts of one sketch; build from rows with add_bucket, read with quantile"""
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+
+    def add(self, value, count=1):
+        self.add_bucket(bucket_index(value), count)
+
+    def add_bucket(self, index, count):
+        self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+
+    def merge(self, other):
+        for index, count in other.buckets.items():
+            self.add_bucket(index, count)
+        return self
+
+    def quantile(self, q):
+        """Approximate q-quantile (0 <= q <= 1), None for an empty sketch"""
+        if self.count <= 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return bucket_value(index)
+        return bucket_value(max(self.buckets))
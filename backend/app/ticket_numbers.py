@@ -0,0 +1,160 @@
+"""Ticket number allocation.
+
+Numbers come from a single counter row (ticket_number_counter) that each worker
+advances by a whole block at a time in its own short transaction, then hands
+out from memory. Creating a ticket therefore costs no extra round-trip except
+once per block, numbers never collide across workers, and a rolled-back ticket
+just leaves a gap. The textual form is TICKET_NUMBER_FORMAT, e.g.
+'TKT-{number:06d}' or 'INC{date:%y%m}-{number}'.
+
+The block is reserved on a separate connection. On SQLite that connection has
+to wait for the writer lock, so take numbers before writing in the current
+transaction (e.g. construct the Ticket before flushing other rows), or pass
+the transaction's own connection to reserve().
+
+Numbers can also arrive from outside the counter: imported tickets keep the
+numbers they were exported with. The importer moves the counter past any
+supplied number in TICKET_NUMBER_FORMAT (advance_past), the counter starts
+after the highest such number when it is first created, and models.add_ticket
+draws the next number if one handed out before an import is taken anyway.
+"""
+import os
+import re
+import string
+import threading
+from datetime import datetime
+
+import sqlalchemy as sa
+
+COUNTER_NAME = 'ticket'
+TICKET_NUMBER_LENGTH = 20  # Ticket.ticket_number column size
+
+
+class TicketNumberService:
+    def __init__(self, app=None):
+        self.block_size = 100
+        self.format = 'TKT-{number:06d}'
+        self._lock = threading.Lock()
+        self._next = self._end = 0
+        self._pid = None
+        self._pattern = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.block_size = max(1, app.config.get('TICKET_NUMBER_BLOCK_SIZE', 100))
+        self.format = app.config.get('TICKET_NUMBER_FORMAT', 'TKT-{number:06d}')
+        self._pattern = None
+        # A block reserved for another app's database must not be handed out in this one
+        self._next = self._end = 0
+        sample = self.render(10 ** 9)
+        if sample == self.render(1):
+            raise ValueError('TICKET_NUMBER_FORMAT must include {number}')
+        if len(sample) > TICKET_NUMBER_LENGTH:
+            raise ValueError(f'TICKET_NUMBER_FORMAT renders numbers longer than {TICKET_NUMBER_LENGTH} characters')
+        app.extensions['ticket_numbers'] = self
+
+    def render(self, number):
+        return self.format.format(number=number, date=datetime.utcnow())
+
+    def parse(self, ticket_number):
+        """Counter value of a ticket number in TICKET_NUMBER_FORMAT, None for any other number"""
+        if self._pattern is None:
+            parts, numbered = [], False
+            for literal, field, _, _ in string.Formatter().parse(self.format):
+                parts.append(re.escape(literal))
+                if field == 'number' and not numbered:
+                    parts.append(r'(?P<number>\d+)')
+                    numbered = True
+                elif field is not None:
+                    parts.append(r'.+?')
+            self._pattern = re.compile(''.join(parts) + r'\Z')
+        match = self._pattern.match(ticket_number or '')
+        return int(match.group('number')) if match else None
+
+    def next_number(self):
+        """Next ticket number, reserving a new block when this worker's block is used up"""
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked worker must not reuse its parent's block
+                self._next = self._end = 0
+                self._pid = os.getpid()
+            if self._next >= self._end:
+                self._next = self._reserve(self.block_size)
+                self._end = self._next + self.block_size
+            number = self._next
+            self._next += 1
+        return self.render(number)
+
+    def reserve(self, count, connection=None):
+        """`count` consecutive ticket numbers in one reservation, for bulk inserts. With a connection
+        the counter is advanced in that connection's transaction instead of a separate one.
+        """
+        start = self._reserve(count, connection)
+        return [self.render(number) for number in range(start, start + count)]
+
+    def advance_past(self, numbers, connection):
+        """Move the counter past the supplied ticket numbers that are in TICKET_NUMBER_FORMAT, in the
+        caller's transaction, so that no later block hands them out again
+        """
+        from app.models import TicketNumberCounter
+
+        values = [value for value in map(self.parse, numbers) if value is not None]
+        if not values:
+            return
+        counter = TicketNumberCounter.__table__
+        after = max(values) + 1
+        connection.execute(
+            counter.update().where(counter.c.name == COUNTER_NAME, counter.c.next_value < after)
+            .values(next_value=after)
+        )
+
+    def _highest_number(self, connection):
+        """Highest counter value among the live and archived tickets' numbers (0 when there is none)"""
+        from app.models import Ticket, ArchivedTicket
+
+        prefix = self.format.split('{', 1)[0]
+        highest = 0
+        for model in (Ticket, ArchivedTicket):
+            numbers = connection.execute(
+                sa.select(model.ticket_number).where(model.ticket_number.startswith(prefix, autoescape=True))
+            ).scalars()
+            highest = max([highest, *filter(None, map(self.parse, numbers))])
+        return highest
+
+    def _advance(self, connection, size):
+        from app.models import Ticket, TicketNumberCounter
+
+        counter = TicketNumberCounter.__table__
+        updated = connection.execute(
+            counter.update().where(counter.c.name == COUNTER_NAME)
+            .values(next_value=counter.c.next_value + size)
+        ).rowcount
+        if updated:
+            end = connection.scalar(sa.select(counter.c.next_value).where(counter.c.name == COUNTER_NAME))
+            return end - size
+        # First use on a database created without migrations: start after the highest ticket id and
+        # the highest number already in the configured format
+        start = max(
+            connection.scalar(sa.select(sa.func.coalesce(sa.func.max(Ticket.id), 0))),
+            self._highest_number(connection)
+        ) + 1
+        connection.execute(counter.insert().values(name=COUNTER_NAME, next_value=start + size))
+        return start
+
+    def _reserve(self, size, connection=None):
+        """Advance the counter by size (in its own transaction unless a connection is given);
+        returns the first number of the block
+        """
+        from app import db
+
+        if connection is not None:
+            return self._advance(connection, size)
+        for attempt in range(2):
+            try:
+                with db.engine.begin() as connection:
+                    return self._advance(connection, size)
+            except sa.exc.IntegrityError:
+                # Another worker created the counter row first
+                if attempt:
+                    raise
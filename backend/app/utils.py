@@ -1,13 +1,20 @@
 import re
 import os
+import json
+import base64
 import hashlib
 import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Union, Any
+from typing import Dict, List, Optional, Tuple, Union, Any
 from flask import request, current_app
 from werkzeug.utils import secure_filename
-import bleach
+import sqlalchemy as sa
 from email_validator import validate_email, EmailNotValidError
+from app import db, cache
+from app.sanitizer import HTMLSanitizer
 
 # Security constants
 ALLOWED_EXTENSIONS = {
@@ -33,6 +40,8 @@ ALLOWED_ATTRIBUTES = {
     'th': ['colspan', 'rowspan']
 }
 
+_sanitizer = HTMLSanitizer(ALLOWED_TAGS, ALLOWED_ATTRIBUTES, strip=True)
+
 class ValidationError(Exception):
     """Custom validation error"""
     pass
@@ -43,15 +52,7 @@ class SecurityError(Exception):
 
 def sanitize_html(content: str) -> str:
     """Sanitize HTML content to prevent XSS attacks"""
-    if not content:
-        return ""
-    
-    return bleach.clean(
-        content,
-        tags=ALLOWED_TAGS,
-        attributes=ALLOWED_ATTRIBUTES,
-        strip=True
-    )
+    return _sanitizer.clean(content)
 
 def validate_email_address(email: str) -> bool:
     """Validate email address format and domain"""
@@ -189,6 +190,23 @@ def get_user_agent() -> str:
     """Get user agent from request"""
     return request.headers.get('User-Agent', 'unknown')
 
+def make_etag(*parts: Any) -> str:
+    """Strong ETag value (unquoted) derived from the validator parts"""
+    raw = json.dumps(parts, separators=(',', ':'), default=str).encode('utf-8')
+    return hashlib.sha1(raw).hexdigest()
+
+def etag_matches(etag: str) -> bool:
+    """True when the request's If-None-Match already holds etag"""
+    return request.if_none_match.contains(etag)
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None):
+    """Empty 304 response carrying the validators"""
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    return response
+
 def validate_ticket_data(data: Dict[str, Any]) -> Dict[str, Union[bool, List[str]]]:
     """Validate ticket creation/update data"""
     errors = []
@@ -316,29 +334,135 @@ def format_time_ago(dt: datetime) -> str:
     else:
         return dt.strftime("%Y-%m-%d")
 
-def paginate_query(query, page: int = 1, per_page: int = 20, max_per_page: int = 100):
-    """Paginate SQLAlchemy query with validation"""
+def _fetch(query, rows: bool = False) -> list:
+    """Run a select, returning ORM entities or (for column selects) Row objects"""
+    if rows:
+        return db.session.execute(query).all()
+    return db.session.scalars(query).all()
+
+COUNT_MODES = ('exact', 'estimate', 'none')
+
+def parse_count_param(count: Optional[str]) -> str:
+    """Validate the ?count= pagination mode"""
+    count = (count or 'exact').strip().lower()
+    if count not in COUNT_MODES:
+        raise ValidationError(f"Invalid count mode '{count}'. Allowed: {', '.join(COUNT_MODES)}")
+    return count
+
+# Cached counts outlive COUNT_ESTIMATE_TTL so stale values can be served while they refresh
+COUNT_CACHE_RETENTION = 24 * 3600
+
+_count_refresh_executor = None
+_count_refresh_inflight = set()
+_count_refresh_lock = threading.Lock()
+
+def _count_cache_key(count_query) -> str:
+    compiled = count_query.compile(dialect=db.engine.dialect, compile_kwargs={'render_postcompile': True})
+    digest = hashlib.sha1(f"{compiled}|{sorted(compiled.params.items())!r}".encode('utf-8')).hexdigest()
+    return f"count:{digest}"
+
+def _planner_estimate(query) -> Optional[int]:
+    """Row estimate from the PostgreSQL planner; None on engines without one"""
+    if db.engine.dialect.name != 'postgresql':
+        return None
+    compiled = query.compile(dialect=db.engine.dialect, compile_kwargs={'render_postcompile': True})
+    plan = db.session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+def _refresh_count(app, key: str, count_query):
+    try:
+        with app.app_context():
+            total = db.session.scalar(count_query)
+            cache.set(key, json.dumps({'total': total, 'at': time.time()}), ttl=COUNT_CACHE_RETENTION)
+            db.session.remove()
+    except Exception as e:
+        app.logger.warning(f"Background count refresh failed: {e}")
+    finally:
+        with _count_refresh_lock:
+            _count_refresh_inflight.discard(key)
+
+def _schedule_count_refresh(key: str, count_query):
+    """Recount in the background, at most one refresh per key in flight"""
+    global _count_refresh_executor
+    with _count_refresh_lock:
+        if key in _count_refresh_inflight:
+            return
+        _count_refresh_inflight.add(key)
+        if _count_refresh_executor is None:
+            _count_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='count-refresh')
+    _count_refresh_executor.submit(_refresh_count, current_app._get_current_object(), key, count_query)
+
+def estimate_count(query) -> int:
+    """Approximate row count for a select.
+    
+    Serves a cached count (refreshed in the background once older than
+    COUNT_ESTIMATE_TTL seconds). On a cold cache PostgreSQL answers from the
+    planner and schedules an exact recount; other engines count once inline.
+    """
+    count_query = sa.select(sa.func.count()).select_from(query.order_by(None).subquery())
+    key = _count_cache_key(count_query)
+    ttl = current_app.config.get('COUNT_ESTIMATE_TTL', 60)
+    
+    cached = cache.get(key)
+    if cached is not None:
+        entry = json.loads(cached)
+        if time.time() - entry['at'] > ttl:
+            _schedule_count_refresh(key, count_query)
+        return entry['total']
+    
+    estimate = _planner_estimate(query.order_by(None))
+    if estimate is not None:
+        _schedule_count_refresh(key, count_query)
+        return estimate
+    
+    total = db.session.scalar(count_query)
+    cache.set(key, json.dumps({'total': total, 'at': time.time()}), ttl=COUNT_CACHE_RETENTION)
+    return total
+
+def paginate_query(query, page: int = 1, per_page: int = 20, max_per_page: int = 100, rows: bool = False,
+                   count: str = 'exact'):
+    """Paginate a SQLAlchemy select statement with validation.
+    
+    count='exact' runs COUNT(*) over the filtered set, 'estimate' uses
+    estimate_count(), and 'none' skips the total and probes one extra row
+    to find has_next.
+    """
     # Validate parameters
     page = max(1, int(page))
     per_page = min(max_per_page, max(1, int(per_page)))
+    count = parse_count_param(count)
     
     # Calculate offset
     offset = (page - 1) * per_page
     
-    # Get total count
-    total = query.count()
-    
-    # Get paginated results
-    items = query.offset(offset).limit(per_page).all()
+    if count == 'exact':
+        # Get total count
+        total = db.session.scalar(
+            sa.select(sa.func.count()).select_from(query.order_by(None).subquery())
+        )
+        items = _fetch(query.offset(offset).limit(per_page), rows)
+        has_next = offset + per_page < total
+    else:
+        # LIMIT n+1 probe decides has_next without counting
+        items = _fetch(query.offset(offset).limit(per_page + 1), rows)
+        has_next = len(items) > per_page
+        items = items[:per_page]
+        if count == 'estimate':
+            # Never report fewer rows than we have just seen
+            total = max(estimate_count(query), offset + len(items) + (1 if has_next else 0))
+        else:
+            total = None
     
     # Calculate pagination info
     has_prev = page > 1
-    has_next = offset + per_page < total
-    total_pages = (total + per_page - 1) // per_page
+    total_pages = (total + per_page - 1) // per_page if total is not None else None
     
     return {
         'items': items,
         'total': total,
+        'count': count,
         'page': page,
         'per_page': per_page,
         'total_pages': total_pages,
@@ -348,6 +472,125 @@ def paginate_query(query, page: int = 1, per_page: int = 20, max_per_page: int =
         'next_page': page + 1 if has_next else None
     }
 
+def parse_sort_param(sort: str, allowed: Dict[str, Any]) -> List[Tuple[str, bool]]:
+    """Parse a 'key,-other' sort parameter into (key, descending) pairs"""
+    keys = []
+    for part in (sort or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        descending = part.startswith('-')
+        key = part.lstrip('-+')
+        if key not in allowed:
+            raise ValidationError(f"Invalid sort key '{key}'. Allowed: {', '.join(allowed)}")
+        if any(existing == key for existing, _ in keys):
+            raise ValidationError(f"Duplicate sort key '{key}'")
+        keys.append((key, descending))
+    
+    if not keys:
+        raise ValidationError("Sort parameter is empty")
+    
+    return keys
+
+def format_sort_param(keys: List[Tuple[str, bool]]) -> str:
+    """Inverse of parse_sort_param"""
+    return ','.join(f"{'-' if descending else ''}{key}" for key, descending in keys)
+
+def encode_cursor(sort: str, values: List[Any]) -> str:
+    """Encode the sort spec and last-row key values into an opaque cursor"""
+    payload = {
+        's': sort,
+        'v': [{'dt': v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[str, List[Any]]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [
+            datetime.fromisoformat(v['dt']) if isinstance(v, dict) else v
+            for v in payload['v']
+        ]
+        return payload['s'], values
+    except (ValueError, TypeError, KeyError):
+        raise ValidationError("Invalid cursor")
+
+def _keyset_after(column, value, descending: bool, nullable: bool):
+    """Predicate for rows strictly after value in (column, descending) order, NULLs last"""
+    if value is None:
+        # Nothing sorts after NULL except other NULLs, which are ties
+        return None
+    condition = column < value if descending else column > value
+    if nullable:
+        condition = sa.or_(condition, column.is_(None))
+    return condition
+
+def keyset_columns(order: List[Tuple[Any, bool]], tiebreaker) -> List[Tuple[Any, bool, bool]]:
+    """Expand (column, descending) pairs into (column, descending, nullable) with a unique tiebreaker"""
+    columns = [(column, descending, bool(column.expression.nullable)) for column, descending in order]
+    columns.append((tiebreaker, order[-1][1] if order else False, False))
+    return columns
+
+def keyset_order_by(columns: List[Tuple[Any, bool, bool]]) -> list:
+    """ORDER BY clauses matching keyset_columns, NULLs last"""
+    order_by = []
+    for column, descending, nullable in columns:
+        clause = column.desc() if descending else column.asc()
+        order_by.append(clause.nulls_last() if nullable else clause)
+    return order_by
+
+def keyset_cursor(item, sort: str, columns: List[Tuple[Any, bool, bool]]) -> str:
+    """Cursor pointing just past item"""
+    return encode_cursor(sort, [getattr(item, column.key) for column, _, _ in columns])
+
+def keyset_paginate(query, order: List[Tuple[Any, bool]], tiebreaker, sort: str,
+                    cursor: Optional[str] = None, per_page: int = 20, max_per_page: int = 100,
+                    rows: bool = False):
+    """Seek-based pagination on (order columns..., tiebreaker).
+    
+    Page cost depends only on per_page: there is no OFFSET and no COUNT, the
+    cursor carries the last row's key values and the next page seeks past them.
+    With rows=True the query is a column select that must include the order
+    and tiebreaker columns under their attribute keys.
+    """
+    per_page = min(max_per_page, max(1, int(per_page)))
+    columns = keyset_columns(order, tiebreaker)
+    
+    if cursor:
+        cursor_sort, values = decode_cursor(cursor)
+        if cursor_sort != sort or len(values) != len(columns):
+            raise ValidationError("Cursor does not match the requested sort")
+        
+        uniform = len({descending for _, descending, _ in columns}) == 1
+        if uniform and not any(nullable for _, _, nullable in columns) and None not in values:
+            # Row-value comparison lets the planner seek straight into the composite index
+            row = sa.tuple_(*[column for column, _, _ in columns])
+            bound = sa.tuple_(*[sa.literal(v, column.type) for (column, _, _), v in zip(columns, values)])
+            query = query.where(row < bound if columns[0][1] else row > bound)
+        else:
+            terms = []
+            equal = []
+            for (column, descending, nullable), value in zip(columns, values):
+                after = _keyset_after(column, value, descending, nullable)
+                if after is not None:
+                    terms.append(sa.and_(*equal, after))
+                equal.append(column.is_(None) if value is None else column == value)
+            query = query.where(sa.or_(*terms) if terms else sa.false())
+    
+    items = _fetch(query.order_by(*keyset_order_by(columns)).limit(per_page + 1), rows)
+    has_next = len(items) > per_page
+    items = items[:per_page]
+    
+    return {
+        'items': items,
+        'per_page': per_page,
+        'has_next': has_next,
+        'next_cursor': keyset_cursor(items[-1], sort, columns) if has_next else None
+    }
+
 def clean_search_term(term: str) -> str:
     """Clean and sanitize search terms"""
     if not term:
@@ -373,9 +616,3 @@ def mask_sensitive_data(data: str, mask_char: str = '*', visible_chars: int = 4)
         return f"{masked_username}@{domain}"
     else:  # Phone or other
         return data[:visible_chars] + mask_char * (len(data) - visible_chars)
-
-def generate_ticket_number() -> str:
-    """Generate a unique ticket number"""
-    timestamp = datetime.utcnow().strftime("%Y%m%d")
-    random_part = secrets.token_hex(3).upper()
-    return f"TKT-{timestamp}-{random_part}"
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Benchmark GET /api/reports/dashboard against the previous one-query-per-number version.
+
+Seeds a SQLite database with 1,000,000 tickets (bulk inserts, so it takes a minute),
+then times the current endpoint and the old eleven-query implementation, mounted on
+the same app, end to end through the test client. Both must return the same numbers.
+Then times the single grouped pass, and a batch of status updates, with and without the
+covering ix_ticket_live_dashboard index, to show what the index buys and what it costs.
+Run from the backend directory: python benchmarks/dashboard.py [--tickets N] [--db PATH]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy as sa
+from flask import jsonify
+
+from config import Config
+
+STATUSES = ('Open', 'In Progress', 'Pending', 'Resolved', 'Closed')
+PRIORITIES = ('Low', 'Medium', 'High', 'Critical')
+
+
+def seed(db, tickets, batch_size=50000):
+    from app.models import User, Ticket, TicketCategory, TicketComment, PRIORITY_RANK
+
+    admin = User(username='admin', email='admin@example.com', is_admin=True)
+    admin.set_password('password')
+    categories = [TicketCategory(name=f'Category {i}') for i in range(8)]
+    db.session.add_all([admin, *categories])
+    db.session.commit()
+
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    category_ids = [None] + [category.id for category in categories]
+    for start in range(0, tickets, batch_size):
+        rows = []
+        for i in range(start, min(start + batch_size, tickets)):
+            priority = rng.choice(PRIORITIES)
+            created_at = now - timedelta(minutes=rng.randrange(365 * 24 * 60))
+            rows.append({
+                'title': f'Ticket {i}',
+                'description': 'Benchmark ticket',
+                'status': rng.choice(STATUSES),
+                'priority': priority,
+                'priority_rank': PRIORITY_RANK[priority],
+                'ticket_number': f'BEN-{i:09d}',
+                'created_at': created_at,
+                'updated_at': created_at,
+                'is_deleted': rng.random() < 0.02,
+                'sla_response_due': created_at + timedelta(hours=8),
+                'sla_resolution_due': created_at + timedelta(hours=72),
+                'sla_response_breached': rng.random() < 0.1,
+                'sla_resolution_breached': rng.random() < 0.1,
+                'created_by_id': admin.id,
+                'category_id': rng.choice(category_ids)
+            })
+        db.session.execute(sa.insert(Ticket), rows)
+        db.session.execute(sa.insert(TicketComment), [
+            {'content': 'Looking into it', 'ticket_id': start + 1, 'author_id': admin.id,
+             'created_at': now - timedelta(days=rng.randrange(60))}
+            for _ in range(batch_size // 100)
+        ])
+        db.session.commit()
+        print(f'  seeded {min(start + batch_size, tickets):,} tickets', end='\r', flush=True)
+    print()
+    db.session.execute(sa.text('ANALYZE'))
+    return admin
+
+
+def legacy_dashboard():
+    """The dashboard as it was before the single-pass rewrite: one round-trip per number"""
+    from app import db
+    from app.models import User, Ticket, TicketCategory, TicketComment
+
+    days = 30
+    start_date = datetime.utcnow() - timedelta(days=days)
+    count = lambda *criteria: db.session.scalar(
+        sa.select(sa.func.count(Ticket.id)).where(Ticket.is_deleted == False, *criteria)
+    )
+    total_tickets = count()
+    open_tickets = count(Ticket.status == 'Open')
+    in_progress_tickets = count(Ticket.status == 'In Progress')
+    resolved_tickets = count(Ticket.status.in_(['Resolved', 'Closed']))
+    recent_tickets = count(Ticket.created_at >= start_date)
+    sla_breached = count(sa.or_(Ticket.sla_response_breached == True, Ticket.sla_resolution_breached == True))
+    approaching_sla = count(
+        Ticket.status.in_(['Open', 'In Progress']),
+        sa.or_(
+            Ticket.sla_response_due <= datetime.utcnow() + timedelta(hours=4),
+            Ticket.sla_resolution_due <= datetime.utcnow() + timedelta(hours=4)
+        )
+    )
+    total_users = db.session.scalar(sa.select(sa.func.count(User.id)).where(User.is_active == True))
+    active_users = db.session.scalar(
+        sa.select(sa.func.count(User.id)).where(User.is_active == True, User.last_seen >= start_date)
+    )
+    category_stats = db.session.execute(
+        sa.select(TicketCategory.name, TicketCategory.color, sa.func.count(Ticket.id).label('count'))
+        .select_from(TicketCategory)
+        .outerjoin(Ticket, sa.and_(Ticket.category_id == TicketCategory.id, Ticket.is_deleted == False))
+        .where(TicketCategory.is_active == True)
+        .group_by(TicketCategory.id, TicketCategory.name, TicketCategory.color)
+    ).all()
+    priority_stats = db.session.execute(
+        sa.select(Ticket.priority, sa.func.count(Ticket.id).label('count'))
+        .where(Ticket.is_deleted == False).group_by(Ticket.priority)
+    ).all()
+    recent_comments = db.session.scalar(
+        sa.select(sa.func.count(TicketComment.id)).where(
+            TicketComment.is_deleted == False, TicketComment.created_at >= start_date
+        )
+    )
+    percentage = lambda n: round((n / total_tickets * 100) if total_tickets > 0 else 0, 1)
+    return jsonify({
+        'overview': {
+            'total_tickets': total_tickets,
+            'open_tickets': open_tickets,
+            'in_progress_tickets': in_progress_tickets,
+            'resolved_tickets': resolved_tickets,
+            'recent_tickets': recent_tickets,
+            'resolution_rate': percentage(resolved_tickets)
+        },
+        'sla_metrics': {
+            'breached': sla_breached,
+            'approaching': approaching_sla,
+            'compliance_rate': round(((total_tickets - sla_breached) / total_tickets * 100) if total_tickets > 0 else 100, 1)
+        },
+        'user_metrics': {
+            'total_users': total_users,
+            'active_users': active_users,
+            'activity_rate': round((active_users / total_users * 100) if total_users > 0 else 0, 1)
+        },
+        'category_distribution': [
+            {'name': s.name, 'color': s.color, 'count': s.count, 'percentage': percentage(s.count)}
+            for s in category_stats
+        ],
+        'priority_distribution': [
+            {'priority': s.priority, 'count': s.count, 'percentage': percentage(s.count)} for s in priority_stats
+        ],
+        'activity': {'recent_comments': recent_comments, 'date_range_days': days}
+    })
+
+
+def compare_index(db, repeat, updates):
+    """Time the dashboard's grouped pass and `updates` status changes with and without its covering index"""
+    from app.api.reports import dashboard_report
+    from app.models import Ticket
+
+    index = next(index for index in Ticket.__table__.indexes if index.name == 'ix_ticket_live_dashboard')
+    rng = random.Random(7)
+    ticket_count = db.session.scalar(sa.select(sa.func.count(Ticket.id)))
+    changes = [{'ticket_id': rng.randint(1, ticket_count), 'status': rng.choice(STATUSES)} for _ in range(updates)]
+    update = sa.update(Ticket).where(Ticket.id == sa.bindparam('ticket_id')).values(status=sa.bindparam('status'))
+
+    results = {}
+    for label in ('with index', 'without'):
+        if label == 'without':
+            index.drop(db.engine)
+        db.session.execute(sa.text('ANALYZE'))
+        db.session.commit()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            dashboard_report(30)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        started = time.perf_counter()
+        db.session.connection().execute(update, changes)
+        written = time.perf_counter() - started
+        db.session.rollback()
+        results[label] = (timings[0], timings[len(timings) // 2], written)
+    index.create(db.engine)
+
+    print(f"{'':12}{'pass best ms':>14}{'pass median ms':>16}{f'{updates:,} updates ms':>20}")
+    for label, (best, median, written) in results.items():
+        print(f'{label:12}{best * 1000:>14.1f}{median * 1000:>16.1f}{written * 1000:>20.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--updates', type=int, default=20000, help='status updates timed per index variant')
+    parser.add_argument('--db', help='SQLite file to seed (default: a temporary file)')
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), 'dashboard.db')
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}'
+        TESTING = True
+        CACHE_BACKEND = 'none'
+        AUDIT_MODE = 'sync'
+
+    from app import create_app, db
+    from flask_jwt_extended import create_access_token, jwt_required
+
+    app = create_app(BenchmarkConfig)
+    app.add_url_rule('/benchmark/legacy-dashboard', 'legacy_dashboard', jwt_required()(legacy_dashboard))
+    with app.app_context():
+        db.create_all()
+        print(f'Seeding {args.tickets:,} tickets into {path}')
+        admin = seed(db, args.tickets)
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin.id))}'}
+        client = app.test_client()
+
+        statements = []
+        sa.event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+
+        results = {}
+        for label, url in (('before', '/benchmark/legacy-dashboard'), ('after', '/api/reports/dashboard')):
+            timings = []
+            for _ in range(args.repeat):
+                statements.clear()
+                started = time.perf_counter()
+                response = client.get(url, headers=headers)
+                timings.append(time.perf_counter() - started)
+                assert response.status_code == 200, response.get_json()
+            results[label] = (response.get_json(), len(statements), timings)
+
+        # Query counts include the user and token-blocklist lookups of every authenticated request
+        print(f"{'':8}{'queries':>10}{'best ms':>12}{'median ms':>12}")
+        for label, (_, queries, timings) in results.items():
+            timings.sort()
+            print(f'{label:8}{queries:>10}{timings[0] * 1000:>12.1f}{timings[len(timings) // 2] * 1000:>12.1f}')
+        # 'approaching' moves with the clock between the two runs
+        before, after = results['before'][0], results['after'][0]
+        before['sla_metrics'].pop('approaching'), after['sla_metrics'].pop('approaching')
+        assert before == after, 'dashboard bodies differ'
+
+        print()
+        compare_index(db, args.repeat, args.updates)
+
+
+if __name__ == '__main__':
+    main()
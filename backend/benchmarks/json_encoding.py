@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark the orjson and stdlib JSON providers on a 1,000-ticket export.
+
+Seeds an in-memory SQLite database, then times both the encoding step alone and
+the full GET /api/reports/export?type=tickets request under each provider.
+Run from the backend directory: python benchmarks/json_encoding.py [--tickets N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+
+class BenchmarkConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+    CACHE_BACKEND = 'none'
+
+
+def seed(db, tickets):
+    from app.models import User, Ticket, TicketCategory
+
+    admin = User(username='admin', email='admin@example.com', is_admin=True)
+    admin.set_password('password')
+    category = TicketCategory(name='Hardware')
+    db.session.add_all([admin, category])
+    db.session.flush()
+
+    now = datetime.utcnow()
+    for i in range(tickets):
+        db.session.add(Ticket(
+            title=f'Printer {i} is jammed',
+            description='Paper stuck in tray two, error code E-{}'.format(i),
+            status=('Open', 'In Progress', 'Resolved')[i % 3],
+            priority=('Low', 'Medium', 'High', 'Critical')[i % 4],
+            ticket_number=f'TKT-{i:06d}',
+            created_at=now - timedelta(minutes=i),
+            resolved_at=now if i % 3 == 2 else None,
+            created_by_id=admin.id,
+            assigned_to_id=admin.id,
+            category_id=category.id
+        ))
+    db.session.commit()
+    return admin
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    from app import create_app, db
+    from app.jsonprovider import OrjsonProvider, StdlibJSONProvider, orjson
+    from flask_jwt_extended import create_access_token
+
+    providers = [('stdlib', StdlibJSONProvider)]
+    if orjson is not None:
+        providers.append(('orjson', OrjsonProvider))
+    else:
+        print('orjson is not installed; only the stdlib provider is measured')
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        db.create_all()
+        admin = seed(db, args.tickets)
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin.id))}'}
+        client = app.test_client()
+        url = f'/api/reports/export?type=tickets&start_date={(datetime.utcnow() - timedelta(days=365)).date()}'
+
+        payload = client.get(url, headers=headers).get_json()
+        assert payload['total_records'] == args.tickets, payload
+
+        print(f"{'provider':<8} {'encode (ms)':>12} {'request (ms)':>13}")
+        results = {}
+        for name, provider in providers:
+            app.json = provider(app)
+            encode = min(timeit.repeat(lambda: app.json.response(payload), number=1, repeat=args.repeat))
+            request = min(timeit.repeat(lambda: client.get(url, headers=headers), number=1, repeat=args.repeat))
+            results[name] = (encode, request)
+            print(f'{name:<8} {encode * 1000:>12.2f} {request * 1000:>13.2f}')
+
+        if len(results) == 2:
+            print(f"encode speedup: {results['stdlib'][0] / results['orjson'][0]:.1f}x, "
+                  f"request speedup: {results['stdlib'][1] / results['orjson'][1]:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
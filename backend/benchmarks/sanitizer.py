@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark utils.sanitize_html's engine against calling bleach.clean() directly.
+
+Cleans 5,000-character comments of three kinds (plain text, light markup, and
+markup with disallowed tags) with bleach.clean(), with HTMLSanitizer's reused
+Cleaner and no cache (every comment distinct), and with the cache warm
+(identical content seen before). Run from the backend directory:
+python benchmarks/sanitizer.py [--comments N] [--length N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bleach
+
+from app.sanitizer import HTMLSanitizer
+from app.utils import ALLOWED_TAGS, ALLOWED_ATTRIBUTES
+
+WORDS = ('printer', 'network', 'the', 'error', 'restart', 'ticket', 'user', 'cannot', 'login', 'after',
+         'update', 'screen', 'is', 'blank', 'and', 'VPN', 'drops', 'every', 'few', 'minutes')
+
+
+def sentence(rng):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))).capitalize() + '.'
+
+
+def comment(rng, kind, length):
+    parts = []
+    size = 0
+    while size < length:
+        text = sentence(rng)
+        if kind == 'markup':
+            text = rng.choice(('<p>{}</p>', '<strong>{}</strong> ', '{}<br>', '<a href="https://example.com">{}</a> ',
+                               '<li>{}</li>')).format(text)
+        elif kind == 'hostile':
+            text = rng.choice(('<p>{}</p>', '<script>alert(1)</script>{}', '<img src=x onerror=alert(1)>{}',
+                               '<div style="x">{}</div>')).format(text)
+        else:
+            text += rng.choice((' ', ' ', '\n\n'))
+        parts.append(text)
+        size += len(text)
+    return ''.join(parts)[:length]
+
+
+def throughput(clean, comments):
+    start = time.perf_counter()
+    for content in comments:
+        clean(content)
+    return len(comments) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--comments', type=int, default=500)
+    parser.add_argument('--length', type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+
+    def baseline(content):
+        return bleach.clean(content, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, strip=True)
+
+    print(f"{'comments':<10} {'bleach.clean/s':>15} {'reused/s':>10} {'cached/s':>10} {'reused':>7} {'cached':>7}")
+    for kind in ('plain', 'markup', 'hostile'):
+        comments = [comment(rng, kind, args.length) for _ in range(args.comments)]
+        uncached = HTMLSanitizer(ALLOWED_TAGS, ALLOWED_ATTRIBUTES, cache_size=0)
+        cached = HTMLSanitizer(ALLOWED_TAGS, ALLOWED_ATTRIBUTES)
+        assert all(uncached.clean(c) == baseline(c) for c in comments[:50]), 'sanitizer output differs from bleach'
+
+        before = throughput(baseline, comments)
+        reused = throughput(uncached.clean, comments)
+        # Warm cache: the same comment set again (e.g. a bulk edit or re-import)
+        repeated = comments[:min(len(comments), 500)]
+        throughput(cached.clean, repeated)
+        warm = throughput(cached.clean, repeated)
+        print(f'{kind:<10} {before:>15,.0f} {reused:>10,.0f} {warm:>10,.0f} '
+              f'{reused / before:>6.1f}x {warm / before:>6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
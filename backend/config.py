@@ -27,3 +27,48 @@ class Config:
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-string-please-change'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+
+    # Response cache (ticket lists): 'memory' (per-worker LRU), 'redis' (shared) or 'null'
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND') or 'memory'
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL') or 'redis://localhost:6379/0'
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES') or 1024)
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL') or 30)
+
+    # Report results (dashboard, trends, performance): fresh for REPORT_CACHE_TTL seconds, then served
+    # stale for up to REPORT_CACHE_STALE_TTL more while one background refresh recomputes them
+    REPORT_CACHE_TTL = int(os.environ.get('REPORT_CACHE_TTL') or 60)
+    REPORT_CACHE_STALE_TTL = int(os.environ.get('REPORT_CACHE_STALE_TTL') or 600)
+
+    # Seconds before a cached ?count=estimate total is recounted in the background
+    COUNT_ESTIMATE_TTL = int(os.environ.get('COUNT_ESTIMATE_TTL') or 60)
+
+    # Bulk ticket import: rows per executemany batch, and rows per commit/checkpoint
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE') or 1000)
+    IMPORT_COMMIT_EVERY = int(os.environ.get('IMPORT_COMMIT_EVERY') or 10000)
+
+    # Ticket numbers: format ({number}, optionally {date:...}) and numbers reserved per worker at a time
+    TICKET_NUMBER_FORMAT = os.environ.get('TICKET_NUMBER_FORMAT') or 'TKT-{number:06d}'
+    TICKET_NUMBER_BLOCK_SIZE = int(os.environ.get('TICKET_NUMBER_BLOCK_SIZE') or 100)
+
+    # Audit log: 'async' (queued, batch-inserted by a background flusher) or 'sync' (written in the
+    # request's transaction); set AUDIT_SPOOL_DIR to spool queued events to disk for crash safety.
+    # Events the database rejects (rather than fails to reach) are appended to AUDIT_DEAD_LETTER_FILE
+    AUDIT_MODE = os.environ.get('AUDIT_MODE') or 'async'
+    AUDIT_SPOOL_DIR = os.environ.get('AUDIT_SPOOL_DIR')
+    AUDIT_DEAD_LETTER_FILE = os.environ.get('AUDIT_DEAD_LETTER_FILE') or \
+        os.path.join(basedir, 'logs', 'audit_dead_letter.ndjson')
+    AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE') or 500)
+    AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL') or 1.0)
+    AUDIT_QUEUE_MAX = int(os.environ.get('AUDIT_QUEUE_MAX') or 10000)
+
+    # Background report jobs (POST /api/reports/jobs): pool processes per web worker (0 runs jobs on a
+    # thread in the web worker), where results are written, seconds without progress before a running
+    # job is presumed dead and resubmitted, and attempts before it is failed
+    REPORT_JOB_WORKERS = int(os.environ.get('REPORT_JOB_WORKERS') or 2)
+    REPORT_JOB_DIR = os.environ.get('REPORT_JOB_DIR') or os.path.join(basedir, 'report_jobs')
+    REPORT_JOB_STALE_SECONDS = int(os.environ.get('REPORT_JOB_STALE_SECONDS') or 900)
+    REPORT_JOB_MAX_ATTEMPTS = int(os.environ.get('REPORT_JOB_MAX_ATTEMPTS') or 3)
+
+    # Archival (flask tickets archive): age in days of closed/soft-deleted tickets, tickets per transaction
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS') or 365)
+    ARCHIVE_CHUNK_SIZE = int(os.environ.get('ARCHIVE_CHUNK_SIZE') or 500)
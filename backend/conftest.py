@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Shared pytest fixtures for the backend tests.
+
+`app` builds the application on a fresh database from the `config` fixture (an
+in-memory SQLite TestingConfig unless a module overrides `config`) and, inside
+its app context, calls the test module's seed(db) function if it has one. seed
+returns {name: id} for the rows it created, which is kept in
+app.config['TEST_IDS']; `token`, `get`, `post` and `patch` authenticate as
+those names.
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+
+import pytest
+import sqlalchemy as sa
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+
+
+class TestingConfig(Config):
+    __test__ = False
+
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    TESTING = True
+    CACHE_BACKEND = 'none'
+    AUDIT_MODE = 'sync'
+
+
+@pytest.fixture
+def config():
+    return TestingConfig
+
+
+@pytest.fixture
+def app(request, config):
+    from app import create_app, db
+
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        seed = getattr(request.module, 'seed', None)
+        app.config['TEST_IDS'] = seed(db) if seed else {}
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def token(app):
+    from flask_jwt_extended import create_access_token
+
+    def token(user='admin'):
+        with app.app_context():
+            return create_access_token(identity=str(app.config['TEST_IDS'][user]))
+    return token
+
+
+@pytest.fixture
+def get(client, token):
+    def get(url, as_user='admin', **headers):
+        return client.get(url, headers={'Authorization': f'Bearer {token(as_user)}', **headers})
+    return get
+
+
+@pytest.fixture
+def post(client, token):
+    def post(url, body, as_user='admin', **headers):
+        return client.post(url, json=body, headers={'Authorization': f'Bearer {token(as_user)}', **headers})
+    return post
+
+
+@pytest.fixture
+def patch(client, token):
+    def patch(url, body, as_user='admin', **headers):
+        return client.patch(url, json=body, headers={'Authorization': f'Bearer {token(as_user)}', **headers})
+    return patch
+
+
+@pytest.fixture
+def capture_selects(app):
+    """`with capture_selects() as statements:` collects the (statement, parameters) of every SELECT run inside"""
+    from app import db
+
+    @contextmanager
+    def capture_selects():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append((statement, parameters))
+
+        with app.app_context():
+            engine = db.engine
+        sa.event.listen(engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            sa.event.remove(engine, 'before_cursor_execute', record)
+    return capture_selects
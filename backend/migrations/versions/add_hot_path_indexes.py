@@ -0,0 +1,64 @@
+"""add composite and partial indexes for hot ticket, report and category queries
+
+Replaces the low-selectivity ix_ticket_is_deleted index with partial indexes
+over live tickets, and adds the comment, client ticket and audit log composites
+that the old models.create_indexes() helper never managed to create. Drops
+ix_ticket_sla_response_due, which no query uses: every index on ticket is paid
+for by each insert and update.
+
+Revision ID: add_hot_path_indexes
+Revises: add_ticket_search_index
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_hot_path_indexes'
+down_revision = 'add_ticket_search_index'
+branch_labels = None
+depends_on = None
+
+# Must match models.LIVE_ROWS
+LIVE_ROWS = {
+    'sqlite_where': sa.text('is_deleted = 0'),
+    'postgresql_where': sa.text('is_deleted = false'),
+}
+
+LIVE_TICKET_INDEXES = [
+    ('ix_ticket_live_status', ['status', 'created_at', 'id']),
+    ('ix_ticket_live_priority', ['priority', 'created_at', 'id']),
+]
+
+# Full indexes: SQLite cannot use a partial index for one branch of an OR
+TICKET_INDEXES = [
+    ('ix_ticket_assignee_created', ['assigned_to_id', 'created_at', 'id']),
+    ('ix_ticket_creator_created', ['created_by_id', 'created_at', 'id']),
+]
+
+def upgrade():
+    for name, columns in LIVE_TICKET_INDEXES:
+        op.create_index(name, 'ticket', columns, **LIVE_ROWS)
+    for name, columns in TICKET_INDEXES:
+        op.create_index(name, 'ticket', columns)
+    op.drop_index('ix_ticket_is_deleted', table_name='ticket')
+    op.drop_index('ix_ticket_sla_response_due', table_name='ticket')
+
+    op.create_index('ix_ticket_comment_ticket_created', 'ticket_comment', ['ticket_id', 'created_at'])
+    op.create_index('ix_ticket_comment_live_created_at', 'ticket_comment', ['created_at'], **LIVE_ROWS)
+    op.create_index('ix_client_ticket_ticket_id', 'client_ticket', ['ticket_id'])
+    op.create_index('ix_audit_log_user_created', 'audit_log', ['user_id', 'created_at'])
+    op.create_index('ix_audit_log_ticket_created', 'audit_log', ['ticket_id', 'created_at'])
+
+def downgrade():
+    op.drop_index('ix_audit_log_ticket_created', table_name='audit_log')
+    op.drop_index('ix_audit_log_user_created', table_name='audit_log')
+    op.drop_index('ix_client_ticket_ticket_id', table_name='client_ticket')
+    op.drop_index('ix_ticket_comment_live_created_at', table_name='ticket_comment')
+    op.drop_index('ix_ticket_comment_ticket_created', table_name='ticket_comment')
+
+    op.create_index('ix_ticket_sla_response_due', 'ticket', ['sla_response_due'])
+    op.create_index('ix_ticket_is_deleted', 'ticket', ['is_deleted'])
+    for name, columns in reversed(TICKET_INDEXES + LIVE_TICKET_INDEXES):
+        op.drop_index(name, table_name='ticket')
@@ -0,0 +1,41 @@
+"""add import_job table for resumable bulk ticket imports
+
+Revision ID: add_import_job
+Revises: add_hot_path_indexes
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_import_job'
+down_revision = 'add_hot_path_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('import_job',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('source', sa.String(length=255), nullable=True),
+        sa.Column('format', sa.String(length=10), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('rows_read', sa.Integer(), nullable=False),
+        sa.Column('imported', sa.Integer(), nullable=False),
+        sa.Column('failed', sa.Integer(), nullable=False),
+        sa.Column('errors', sa.Text(), nullable=True),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('created_by_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['created_by_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('import_job', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_import_job_status'), ['status'], unique=False)
+
+def downgrade():
+    with op.batch_alter_table('import_job', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_import_job_status'))
+    op.drop_table('import_job')
@@ -0,0 +1,47 @@
+"""add report_job table for background report jobs
+
+Revision ID: add_report_job
+Revises: add_ticket_durations
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_report_job'
+down_revision = 'add_ticket_durations'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('report_job',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('report', sa.String(length=20), nullable=False),
+        sa.Column('format', sa.String(length=10), nullable=False),
+        sa.Column('params', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('rows_written', sa.Integer(), nullable=False),
+        sa.Column('total_rows', sa.Integer(), nullable=True),
+        sa.Column('result_size', sa.BigInteger(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('worker', sa.String(length=100), nullable=True),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('created_by_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['created_by_id'], ['user.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('report_job', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_report_job_status'), ['status'], unique=False)
+        batch_op.create_index(batch_op.f('ix_report_job_created_by_id'), ['created_by_id'], unique=False)
+
+def downgrade():
+    with op.batch_alter_table('report_job', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_report_job_created_by_id'))
+        batch_op.drop_index(batch_op.f('ix_report_job_status'))
+
+    op.drop_table('report_job')
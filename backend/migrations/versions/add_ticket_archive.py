@@ -0,0 +1,44 @@
+"""add archived_* tables for the ticket archive tier
+
+Each archive table copies the live table's columns (reflected, so it matches
+whatever the live schema is at this point) without foreign keys or defaults,
+plus archived_at. Must stay in step with models.archive_table().
+
+Revision ID: add_ticket_archive
+Revises: add_ticket_number_counter
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_ticket_archive'
+down_revision = 'add_ticket_number_counter'
+branch_labels = None
+depends_on = None
+
+ARCHIVED_TABLES = ['ticket', 'ticket_comment', 'ticket_attachment', 'ticket_watcher', 'client_ticket', 'audit_log']
+
+def upgrade():
+    bind = op.get_bind()
+    for name in ARCHIVED_TABLES:
+        table = sa.Table(name, sa.MetaData(), autoload_with=bind)
+        columns = [
+            sa.Column(column.name, column.type, primary_key=column.primary_key,
+                      nullable=column.nullable, autoincrement=False)
+            for column in table.columns
+        ]
+        op.create_table(f'archived_{name}', *columns, sa.Column('archived_at', sa.DateTime(), nullable=False))
+        if 'ticket_id' in table.columns:
+            op.create_index(f'ix_archived_{name}_ticket_id', f'archived_{name}', ['ticket_id'])
+        if 'ticket_number' in table.columns:
+            op.create_index(f'ix_archived_{name}_ticket_number', f'archived_{name}', ['ticket_number'])
+
+def downgrade():
+    for name in reversed(ARCHIVED_TABLES):
+        if name != 'ticket':
+            op.drop_index(f'ix_archived_{name}_ticket_id', table_name=f'archived_{name}')
+        else:
+            op.drop_index(f'ix_archived_{name}_ticket_number', table_name=f'archived_{name}')
+        op.drop_table(f'archived_{name}')
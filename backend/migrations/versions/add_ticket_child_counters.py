@@ -0,0 +1,38 @@
+"""add denormalized comment and attachment counters to ticket
+
+Revision ID: add_ticket_child_counters
+Revises: add_ticket_keyset_indexes
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_ticket_child_counters'
+down_revision = 'add_ticket_keyset_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('comment_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('attachment_count', sa.Integer(), nullable=False, server_default='0'))
+    
+    # Backfill from the child tables (same as `flask tickets recount`)
+    op.execute("""
+        UPDATE ticket SET
+            comment_count = (
+                SELECT COUNT(*) FROM ticket_comment
+                WHERE ticket_comment.ticket_id = ticket.id AND ticket_comment.is_deleted = false
+            ),
+            attachment_count = (
+                SELECT COUNT(*) FROM ticket_attachment
+                WHERE ticket_attachment.ticket_id = ticket.id
+            )
+    """)
+
+def downgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.drop_column('attachment_count')
+        batch_op.drop_column('comment_count')
@@ -0,0 +1,81 @@
+"""add ticket_daily_stats rollup for the trend and performance reports
+
+Revision ID: add_ticket_daily_stats
+Revises: add_ticket_dashboard_index
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from collections import defaultdict
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_ticket_daily_stats'
+down_revision = 'add_ticket_dashboard_index'
+branch_labels = None
+depends_on = None
+
+COUNTERS = (
+    'created', 'resolved', 'closed', 'response_breached', 'resolution_breached',
+    'responded', 'response_seconds', 'resolution_seconds'
+)
+
+def _seconds(start, end):
+    return max(0, int((end - start).total_seconds()))
+
+def _backfill(bind):
+    """Same counting rules as models.daily_stats_contribution, over live and archived tickets"""
+    metadata = sa.MetaData()
+    stats = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for name in ('ticket', 'archived_ticket'):
+        table = sa.Table(name, metadata, autoload_with=bind)
+        rows = bind.execute(sa.select(
+            table.c.created_at, table.c.resolved_at, table.c.closed_at, table.c.first_response_at,
+            table.c.category_id, table.c.priority, table.c.assigned_to_id,
+            table.c.sla_response_breached, table.c.sla_resolution_breached
+        ).where(table.c.is_deleted == False, table.c.created_at.is_not(None)))
+        for row in rows:
+            dimensions = (row.category_id or 0, row.priority or 'Medium', row.assigned_to_id or 0)
+            created = stats[(row.created_at.date(),) + dimensions]
+            created['created'] += 1
+            created['response_breached'] += 1 if row.sla_response_breached else 0
+            created['resolution_breached'] += 1 if row.sla_resolution_breached else 0
+            if row.first_response_at is not None:
+                created['responded'] += 1
+                created['response_seconds'] += _seconds(row.created_at, row.first_response_at)
+            if row.resolved_at is not None:
+                resolved = stats[(row.resolved_at.date(),) + dimensions]
+                resolved['resolved'] += 1
+                resolved['resolution_seconds'] += _seconds(row.created_at, row.resolved_at)
+            if row.closed_at is not None:
+                stats[(row.closed_at.date(),) + dimensions]['closed'] += 1
+    return [
+        {'day': key[0], 'category_id': key[1], 'priority': key[2], 'assignee_id': key[3], **counters}
+        for key, counters in stats.items()
+    ]
+
+def upgrade():
+    stats = op.create_table('ticket_daily_stats',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('priority', sa.String(length=50), nullable=False),
+        sa.Column('assignee_id', sa.Integer(), nullable=False),
+        sa.Column('created', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('resolved', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('closed', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('response_breached', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('resolution_breached', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('responded', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('response_seconds', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('resolution_seconds', sa.BigInteger(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('day', 'category_id', 'priority', 'assignee_id')
+    )
+
+    # Durations are computed in Python: there is no portable SQL for timestamp differences
+    rows = _backfill(op.get_bind())
+    for start in range(0, len(rows), 1000):
+        op.bulk_insert(stats, rows[start:start + 1000])
+
+def downgrade():
+    op.drop_table('ticket_daily_stats')
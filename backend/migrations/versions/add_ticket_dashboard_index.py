@@ -0,0 +1,30 @@
+"""add covering partial index for the single-pass dashboard aggregate
+
+Revision ID: add_ticket_dashboard_index
+Revises: add_ticket_queues
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_ticket_dashboard_index'
+down_revision = 'add_ticket_queues'
+branch_labels = None
+depends_on = None
+
+# Must match models.LIVE_ROWS
+LIVE_ROWS = {
+    'sqlite_where': sa.text('is_deleted = 0'),
+    'postgresql_where': sa.text('is_deleted = false'),
+}
+
+def upgrade():
+    op.create_index('ix_ticket_live_dashboard', 'ticket', [
+        'category_id', 'priority', 'status', 'created_at',
+        'sla_response_breached', 'sla_resolution_breached', 'sla_response_due', 'sla_resolution_due'
+    ], **LIVE_ROWS)
+
+def downgrade():
+    op.drop_index('ix_ticket_live_dashboard', table_name='ticket')
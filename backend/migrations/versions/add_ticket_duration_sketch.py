@@ -0,0 +1,65 @@
+"""add ticket_duration_sketch quantile sketches for response and resolution percentiles
+
+Revision ID: add_ticket_duration_sketch
+Revises: add_report_job
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+import math
+from collections import defaultdict
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_ticket_duration_sketch'
+down_revision = 'add_report_job'
+branch_labels = None
+depends_on = None
+
+# Bucket mapping of app.sketches at the time of this revision; the two must match
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+ZERO_BUCKET = -1
+
+def _bucket(value):
+    return ZERO_BUCKET if value < 1 else math.ceil(math.log(value) / math.log(GAMMA))
+
+def _backfill(bind):
+    """Same counting rules as models.duration_sketch_contribution, over live and archived tickets"""
+    metadata = sa.MetaData()
+    counts = defaultdict(int)
+    for name in ('ticket', 'archived_ticket'):
+        table = sa.Table(name, metadata, autoload_with=bind)
+        rows = bind.execute(sa.select(
+            table.c.created_at, table.c.resolved_at, table.c.category_id, table.c.assigned_to_id,
+            table.c.response_seconds, table.c.resolution_seconds
+        ).where(table.c.is_deleted == False, table.c.created_at.is_not(None)))
+        for row in rows:
+            dimensions = (row.category_id or 0, row.assigned_to_id or 0)
+            if row.response_seconds is not None:
+                counts[(row.created_at.date(),) + dimensions + ('response', _bucket(row.response_seconds))] += 1
+            if row.resolution_seconds is not None and row.resolved_at is not None:
+                counts[(row.resolved_at.date(),) + dimensions + ('resolution', _bucket(row.resolution_seconds))] += 1
+    return [
+        {'day': key[0], 'category_id': key[1], 'assignee_id': key[2], 'metric': key[3], 'bucket': key[4], 'count': count}
+        for key, count in counts.items()
+    ]
+
+def upgrade():
+    sketch = op.create_table('ticket_duration_sketch',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('assignee_id', sa.Integer(), nullable=False),
+        sa.Column('metric', sa.String(length=10), nullable=False),
+        sa.Column('bucket', sa.SmallInteger(), nullable=False),
+        sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('day', 'category_id', 'assignee_id', 'metric', 'bucket')
+    )
+
+    rows = _backfill(op.get_bind())
+    for start in range(0, len(rows), 1000):
+        op.bulk_insert(sketch, rows[start:start + 1000])
+
+def downgrade():
+    op.drop_table('ticket_duration_sketch')
@@ -0,0 +1,56 @@
+"""add priority_rank and keyset pagination indexes to ticket
+
+The (column, id) composites replace the single-column indexes on the same
+leading column, which would only add write cost to the ticket table.
+
+Revision ID: add_ticket_keyset_indexes
+Revises: add_enhanced_models
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_ticket_keyset_indexes'
+down_revision = 'add_enhanced_models'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('priority_rank', sa.SmallInteger(), nullable=True))
+    
+    # Backfill rank from the existing priority strings
+    op.execute("""
+        UPDATE ticket SET priority_rank = CASE priority
+            WHEN 'Low' THEN 1
+            WHEN 'High' THEN 3
+            WHEN 'Critical' THEN 4
+            ELSE 2
+        END
+    """)
+    
+    # Only ix_ticket_sla_resolution_due came from a migration; databases created
+    # with db.create_all() also have single-column created_at/updated_at indexes
+    existing = {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('ticket')}
+    redundant = [name for name in ('ix_ticket_created_at', 'ix_ticket_updated_at', 'ix_ticket_sla_resolution_due')
+                 if name in existing]
+    
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.alter_column('priority_rank', existing_type=sa.SmallInteger(), nullable=False)
+        for name in redundant:
+            batch_op.drop_index(name)
+        batch_op.create_index('ix_ticket_created_at_id', ['created_at', 'id'])
+        batch_op.create_index('ix_ticket_updated_at_id', ['updated_at', 'id'])
+        batch_op.create_index('ix_ticket_priority_rank_id', ['priority_rank', 'id'])
+        batch_op.create_index('ix_ticket_sla_resolution_due_id', ['sla_resolution_due', 'id'])
+
+def downgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.drop_index('ix_ticket_sla_resolution_due_id')
+        batch_op.drop_index('ix_ticket_priority_rank_id')
+        batch_op.drop_index('ix_ticket_updated_at_id')
+        batch_op.drop_index('ix_ticket_created_at_id')
+        batch_op.create_index('ix_ticket_sla_resolution_due', ['sla_resolution_due'])
+        batch_op.drop_column('priority_rank')
@@ -0,0 +1,31 @@
+"""add ticket_number_counter for block-reserved ticket numbers
+
+Seeds the ticket counter after the highest existing ticket id.
+
+Revision ID: add_ticket_number_counter
+Revises: add_import_job
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_ticket_number_counter'
+down_revision = 'add_import_job'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('ticket_number_counter',
+        sa.Column('name', sa.String(length=20), nullable=False),
+        sa.Column('next_value', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.execute(
+        "INSERT INTO ticket_number_counter (name, next_value) "
+        "SELECT 'ticket', COALESCE(MAX(id), 0) + 1 FROM ticket"
+    )
+
+def downgrade():
+    op.drop_table('ticket_number_counter')
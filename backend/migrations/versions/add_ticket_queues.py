@@ -0,0 +1,51 @@
+"""add ticket_queue_entry backing the work queue endpoints
+
+Revision ID: add_ticket_queues
+Revises: add_ticket_archive
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_ticket_queues'
+down_revision = 'add_ticket_archive'
+branch_labels = None
+depends_on = None
+
+QUEUE_STATUSES = "('Open', 'In Progress', 'Pending')"
+NO_DUE = "'9999-12-31 00:00:00.000000'"
+
+def upgrade():
+    op.create_table('ticket_queue_entry',
+        sa.Column('kind', sa.String(length=10), nullable=False),
+        sa.Column('key', sa.Integer(), nullable=False),
+        sa.Column('ticket_id', sa.Integer(), nullable=False),
+        sa.Column('due_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['ticket_id'], ['ticket.id'], ),
+        sa.PrimaryKeyConstraint('kind', 'key', 'ticket_id')
+    )
+    with op.batch_alter_table('ticket_queue_entry', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_ticket_queue_entry_ticket_id'), ['ticket_id'], unique=False)
+        batch_op.create_index('ix_ticket_queue_entry_head', ['kind', 'key', 'due_at', 'ticket_id'], unique=False)
+
+    # Backfill (same as `flask tickets requeue`)
+    for kind, key, criterion in (
+        ('open', '0', ''),
+        ('assignee', 'COALESCE(assigned_to_id, 0)', ''),
+        ('category', 'category_id', 'AND category_id IS NOT NULL'),
+    ):
+        op.execute(f"""
+            INSERT INTO ticket_queue_entry (kind, key, ticket_id, due_at)
+            SELECT '{kind}', {key}, id, COALESCE(sla_resolution_due, {NO_DUE})
+            FROM ticket
+            WHERE is_deleted = false AND status IN {QUEUE_STATUSES} {criterion}
+        """)
+
+def downgrade():
+    with op.batch_alter_table('ticket_queue_entry', schema=None) as batch_op:
+        batch_op.drop_index('ix_ticket_queue_entry_head')
+        batch_op.drop_index(batch_op.f('ix_ticket_queue_entry_ticket_id'))
+
+    op.drop_table('ticket_queue_entry')
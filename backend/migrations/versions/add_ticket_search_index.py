@@ -0,0 +1,25 @@
+"""add full-text search index over tickets, comments and client tickets
+
+Revision ID: add_ticket_search_index
+Revises: add_ticket_child_counters
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+
+from app import fulltext
+
+# revision identifiers, used by Alembic.
+revision = 'add_ticket_search_index'
+down_revision = 'add_ticket_child_counters'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # FTS5 table on SQLite, tsvector + GIN on PostgreSQL, both trigger-maintained
+    bind = op.get_bind()
+    fulltext.install(bind)
+    fulltext.rebuild(bind)
+
+def downgrade():
+    fulltext.uninstall(op.get_bind())
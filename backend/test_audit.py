@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests for the async audit log writer: batching, rejected events, retries and read-your-writes.
+
+Run with: python -m pytest test_audit.py
+"""
+
+import json
+from datetime import datetime
+
+import pytest
+import sqlalchemy as sa
+
+
+@pytest.fixture
+def config(config, tmp_path):
+    class AuditConfig(config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'audit.db'}"
+        AUDIT_MODE = 'async'
+        AUDIT_FLUSH_INTERVAL = 3600  # flushes are driven by the tests
+        AUDIT_QUEUE_MAX = 4
+        AUDIT_DEAD_LETTER_FILE = str(tmp_path / 'dead_letter.ndjson')
+    return AuditConfig
+
+
+def seed(db):
+    from app.models import User
+
+    admin = User(username='admin', email='admin@example.com', is_admin=True)
+    admin.set_password('password')
+    db.session.add(admin)
+    db.session.commit()
+    return {'admin': admin.id}
+
+
+def event(action, details=None):
+    return {
+        'action': action, 'details': details, 'user_id': None, 'ticket_id': None,
+        'ip_address': None, 'user_agent': None, 'created_at': datetime.utcnow()
+    }
+
+
+def audit_actions():
+    from app import db
+    from app.models import AuditLog
+
+    return db.session.scalars(sa.select(AuditLog.action).order_by(AuditLog.id)).all()
+
+
+def test_rejected_event_is_dead_lettered_without_blocking_the_queue(app):
+    from app import audit
+
+    audit.enqueue([event('LOGIN', 'first'), event(None), event('LOGIN', 'second')])
+    assert audit.flush() == 2
+    assert audit.flush() == 0
+
+    assert audit_actions() == ['LOGIN', 'LOGIN']
+    metrics = audit.metrics()
+    assert metrics['queue_depth'] == 0
+    assert metrics['dead_lettered_total'] == 1
+    with open(app.config['AUDIT_DEAD_LETTER_FILE']) as f:
+        dead = [json.loads(line) for line in f]
+    assert len(dead) == 1 and dead[0]['event']['action'] is None and dead[0]['error']
+
+
+def test_back_pressure_flush_never_raises(app, monkeypatch):
+    from app import audit
+
+    def unreachable(rows):
+        raise sa.exc.OperationalError('INSERT', {}, Exception('database is locked'))
+
+    monkeypatch.setattr(app.extensions['audit'], '_insert', unreachable)
+    # Reaching AUDIT_QUEUE_MAX flushes in the caller; the failure is logged and the events kept
+    audit.enqueue([event('LOGIN'), event('LOGOUT'), event('LOGIN'), event('LOGOUT')])
+    assert audit.metrics()['queue_depth'] == 4
+    assert audit.metrics()['failed_flushes'] == 1
+
+    monkeypatch.undo()
+    assert audit.flush() == 4
+    assert audit_actions() == ['LOGIN', 'LOGOUT', 'LOGIN', 'LOGOUT']
+
+
+def test_transient_error_requeues_only_unwritten_events(app, monkeypatch):
+    from app import audit
+
+    insert = app.extensions['audit']._insert
+    calls = []
+
+    def flaky(rows):
+        calls.append(len(rows))
+        # [bad, a, b, c] and [bad, a] are rejected, [bad] is dead-lettered, [a] is written,
+        # then the database goes away before [b, c]
+        if len(calls) == 5:
+            raise sa.exc.OperationalError('INSERT', {}, Exception('database is locked'))
+        insert(rows)
+
+    monkeypatch.setattr(app.extensions['audit'], '_insert', flaky)
+    audit.enqueue([event(None), event('LOGIN', 'a')])
+    audit.enqueue([event('LOGIN', 'b'), event('LOGIN', 'c')])  # depth 4 >= AUDIT_QUEUE_MAX: flushed quietly
+    assert audit.metrics()['queue_depth'] == 2
+    assert audit.metrics()['dead_lettered_total'] == 1
+    assert audit_actions() == ['LOGIN']
+
+    monkeypatch.setattr(app.extensions['audit'], '_insert', insert)
+    assert audit.flush() == 2
+    assert audit_actions() == ['LOGIN', 'LOGIN', 'LOGIN']
+
+
+def test_archive_proceeds_after_a_rejected_event(app):
+    from app import audit
+    from app.archive import archive_tickets
+
+    audit.enqueue([event(None)])
+    audit.enqueue([event('LOGIN')])
+    assert archive_tickets(365) == 0
+    assert audit.metrics()['queue_depth'] == 0
+
+
+def test_audit_reads_include_events_still_queued_by_this_worker(app, post, get):
+    from app import audit
+
+    response = post('/api/tickets', {'title': 'Printer is jammed', 'description': 'Paper stuck in tray'})
+    assert response.status_code == 201, response.get_json()
+    ticket_id = response.get_json()['ticket']['id']
+    assert audit.metrics()['queue_depth'] == 1
+
+    detail = get(f'/api/tickets/{ticket_id}?include=audit').get_json()
+    assert [log['action'] for log in detail['audit']] == ['CREATED']
+    assert audit.metrics()['queue_depth'] == 0
+
+    response = post('/api/tickets', {'title': 'Monitor flickers', 'description': 'Since this morning'})
+    ticket_id = response.get_json()['ticket']['id']
+    timeline = get(f'/api/tickets/{ticket_id}/timeline?types=audit').get_json()
+    assert [entry['type'] for entry in timeline['timeline']] == ['audit']
+
+
+def test_each_app_keeps_its_own_queue(app, config):
+    from app import audit, create_app
+
+    other = create_app(config)
+    assert app.extensions['audit'] is not other.extensions['audit']
+    with other.app_context():
+        audit.enqueue([event('LOGIN')])
+        assert audit.metrics()['queue_depth'] == 1
+    assert audit.metrics()['queue_depth'] == 0
+    # Flushing happens on the app the queue belongs to, whichever was initialized last
+    assert audit.flush() == 0
+    assert other.extensions['audit'].flush() == 1
+    assert audit_actions() == ['LOGIN']
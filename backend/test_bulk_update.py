@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for PATCH /api/tickets/bulk: selection, per-id results and input validation.
+
+Run with: python -m pytest test_bulk_update.py
+"""
+
+import pytest
+import sqlalchemy as sa
+
+
+BULK_URL = '/api/tickets/bulk'
+
+
+def seed(db):
+    from app.models import User, Ticket
+
+    users = {}
+    for name, is_admin in (('admin', True), ('agent', False)):
+        users[name] = User(username=name, email=f'{name}@example.com', is_admin=is_admin)
+        users[name].set_password('password')
+        db.session.add(users[name])
+    db.session.flush()
+    for i in range(6):
+        db.session.add(Ticket(
+            title=f'Printer {i} is jammed', description='Paper stuck in tray',
+            priority=('Low', 'High')[i % 2], created_by_id=users['admin'].id,
+            assigned_to_id=users['agent'].id if i < 2 else None
+        ))
+    db.session.commit()
+    return {name: user.id for name, user in users.items()}
+
+
+def ticket_statuses(app):
+    from app import db
+    from app.models import Ticket
+
+    with app.app_context():
+        return dict(db.session.execute(sa.select(Ticket.id, Ticket.status).order_by(Ticket.id)).all())
+
+
+def test_filter_updates_matching_tickets(app, patch):
+    response = patch(BULK_URL, {'filter': {'priority': 'High'}, 'changes': {'status': 'In Progress'}})
+    assert response.status_code == 200, response.get_json()
+    results = response.get_json()['results']
+    assert [r['result'] for r in results] == ['updated'] * 3
+    statuses = ticket_statuses(app)
+    assert [statuses[r['id']] for r in results] == ['In Progress'] * 3
+    assert list(statuses.values()).count('Open') == 3
+
+
+def test_ids_report_per_ticket_results(app, patch):
+    response = patch(BULK_URL, {'ids': [1, 2, 3, 999], 'changes': {'status': 'Resolved'}}, as_user='agent')
+    assert response.status_code == 200, response.get_json()
+    assert [r['result'] for r in response.get_json()['results']] == ['updated', 'updated', 'forbidden', 'not_found']
+    assert patch(BULK_URL, {'ids': [1, 2], 'changes': {'status': 'Resolved'}}).get_json()['results'][0]['result'] == 'unchanged'
+
+
+@pytest.mark.parametrize('body', [
+    {'filter': {'status': {'a': 1}}, 'changes': {'status': 'Closed'}},
+    {'filter': {'status': ['Open', ['Pending']]}, 'changes': {'status': 'Closed'}},
+    {'filter': {'category_id': '1'}, 'changes': {'status': 'Closed'}},
+    {'filter': {'assigned_to_id': True}, 'changes': {'status': 'Closed'}},
+    {'filter': {'owner': 1}, 'changes': {'status': 'Closed'}},
+    {'filter': [], 'changes': {'status': 'Closed'}},
+    {'ids': [1], 'changes': {'priority': {'a': 1}}},
+    {'ids': [1], 'changes': {'assigned_to_id': {'a': 1}}},
+    {'ids': [1], 'changes': ['status']},
+    {'ids': ['x'], 'changes': {'status': 'Closed'}},
+    {'ids': [1.5], 'changes': {'status': 'Closed'}},
+    {'ids': [True], 'changes': {'status': 'Closed'}},
+    {'ids': ['1'], 'changes': {'status': 'Closed'}},
+    ['status'],
+])
+def test_malformed_requests_are_rejected(app, patch, body):
+    response = patch(BULK_URL, body)
+    assert response.status_code == 400, response.get_json()
+    assert set(ticket_statuses(app).values()) == {'Open'}
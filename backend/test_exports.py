@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for GET /api/reports/export streaming.
+
+Run with: python -m pytest test_exports.py
+"""
+
+import pytest
+
+
+def seed(db):
+    from app.models import User, Ticket
+
+    admin = User(username='admin', email='admin@example.com', is_admin=True)
+    admin.set_password('password')
+    db.session.add(admin)
+    db.session.flush()
+    for i in range(3):
+        db.session.add(Ticket(title=f'Printer {i} is jammed', description='Paper stuck in tray',
+                              created_by_id=admin.id))
+    db.session.commit()
+    return {'admin': admin.id}
+
+
+def test_export_streams_every_row(get):
+    response = get('/api/reports/export?type=tickets&format=ndjson')
+    assert response.status_code == 200
+    assert len(response.get_data(as_text=True).splitlines()) == 3
+
+
+def test_sla_breached_is_exported_as_a_boolean(get):
+    import json
+
+    lines = get('/api/reports/export?type=tickets&format=ndjson').get_data(as_text=True).splitlines()
+    assert all(json.loads(line)['sla_breached'] is False for line in lines)
+
+
+def test_failure_mid_stream_breaks_the_transfer(get, monkeypatch):
+    from app.api import reports
+
+    def failing_rows(*args, **kwargs):
+        yield {'id': 1, 'ticket_number': 'TKT-000001'}
+        raise RuntimeError('connection lost')
+
+    monkeypatch.setattr(reports, 'export_rows', failing_rows)
+    # The error reaches the WSGI server, which drops the connection instead of ending the body
+    with pytest.raises(RuntimeError):
+        get('/api/reports/export?type=tickets&format=ndjson').get_data()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming ticket importer: numbering, commit windows and resuming.
+
+Run with: python -m pytest test_import.py
+"""
+
+import io
+
+import pytest
+import sqlalchemy as sa
+
+from test_ticket_numbers import create_ticket, insert_numbered
+
+
+@pytest.fixture
+def config(config, tmp_path):
+    class ImportConfig(config):
+        # File-backed, so that a second connection really waits for the import's write lock
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'import.db'}"
+        TICKET_NUMBER_BLOCK_SIZE = 1
+    return ImportConfig
+
+
+def seed(db):
+    from app.models import User
+
+    admin = User(username='admin', email='admin@example.com', is_admin=True)
+    admin.set_password('password')
+    db.session.add(admin)
+    db.session.commit()
+    return {'admin': admin.id}
+
+
+def csv_records(*numbers):
+    from app.importer import iter_records
+
+    lines = ['ticket_number,title,description,priority']
+    lines += [f'{number or ""},Ticket {i},Imported from the old helpdesk,High' for i, number in enumerate(numbers)]
+    return iter_records(io.StringIO('\n'.join(lines) + '\n'), 'csv')
+
+
+def ticket_numbers():
+    from app import db
+    from app.models import Ticket
+
+    return db.session.scalars(sa.select(Ticket.ticket_number).order_by(Ticket.id)).all()
+
+
+def ticket_titles():
+    from app import db
+    from app.models import Ticket
+
+    return db.session.scalars(sa.select(Ticket.title).order_by(Ticket.id)).all()
+
+
+def test_reserved_numbers_taken_mid_window_are_topped_up(app):
+    from app.importer import TicketImporter
+
+    assert create_ticket(app) == 'TKT-000001'
+    # The next window's reserved numbers are already used
+    insert_numbered('TKT-000002', 'TKT-000003', 'TKT-000004')
+
+    importer = TicketImporter.start('csv', batch_size=1, commit_every=3)
+    job = importer.run(csv_records('TKT-000099', None))
+
+    assert job.status == 'completed' and job.imported == 2 and job.failed == 0
+    assert ticket_numbers()[-2:] == ['TKT-000099', 'TKT-000100']
+    # Supplied numbers moved the counter past them
+    assert create_ticket(app) == 'TKT-000101'
+
+
+def test_supplied_numbers_are_never_handed_out_again(app):
+    from app.importer import TicketImporter
+
+    importer = TicketImporter.start('csv', batch_size=1, commit_every=3)
+    job = importer.run(csv_records('TKT-000004', 'TKT-000005', 'TKT-000006', 'TKT-000099', None))
+
+    assert job.status == 'completed' and job.imported == 5
+    assert len(set(ticket_numbers())) == 5
+    assert create_ticket(app) not in ticket_numbers()[:-1]
+
+
+def test_overlong_and_archived_numbers_are_rejected_per_row(app):
+    from datetime import datetime
+    from app import db
+    from app.importer import TicketImporter
+    from app.models import ArchivedTicket
+
+    now = datetime.utcnow()
+    db.session.execute(sa.insert(ArchivedTicket), [{
+        'id': 1000, 'title': 'Archived', 'description': 'Archived', 'status': 'Closed', 'priority': 'Medium',
+        'priority_rank': 1, 'ticket_number': 'OLD-1', 'created_at': now, 'updated_at': now,
+        'is_deleted': False, 'sla_response_breached': False, 'sla_resolution_breached': False,
+        'comment_count': 0, 'attachment_count': 0, 'archived_at': now
+    }])
+    db.session.commit()
+
+    importer = TicketImporter.start('csv', batch_size=10, commit_every=10)
+    job = importer.run(csv_records('X' * 21, 'OLD-1', 'OLD-2'))
+
+    assert job.status == 'completed' and job.imported == 1 and job.failed == 2
+    assert [error['row'] for error in importer.errors] == [1, 2]
+    assert 'longer than 20' in importer.errors[0]['errors'][0]
+    assert ticket_numbers() == ['OLD-2']
+
+
+def test_failed_import_resumes_after_its_last_checkpoint(app):
+    from app.importer import TicketImporter
+
+    records = list(csv_records(*[None] * 7))
+
+    def interrupted():
+        yield from records[:5]
+        raise RuntimeError('upload connection reset')
+
+    importer = TicketImporter.start('csv', job_id='resume-test', batch_size=1, commit_every=3)
+    with pytest.raises(RuntimeError):
+        importer.run(interrupted())
+    job = importer.job
+    # Rows 4 and 5 were rolled back with the open window
+    assert job.status == 'failed' and job.rows_read == 3 and job.imported == 3
+    assert len(ticket_numbers()) == 3
+
+    job = TicketImporter.start('csv', job_id='resume-test', batch_size=1, commit_every=3).run(iter(records))
+    assert job.status == 'completed' and job.rows_read == 7 and job.imported == 7
+    assert ticket_titles() == [f'Ticket {i}' for i in range(7)]
+    assert len(set(ticket_numbers())) == 7
+
+    with pytest.raises(Exception, match='already completed'):
+        TicketImporter.start('csv', job_id='resume-test')
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Query plan regression tests for the hot ticket, report and category queries.
+
+Every SELECT issued by the endpoints below is replayed under EXPLAIN QUERY PLAN
+against a seeded SQLite database; a full scan of one of the large tables fails
+the test. Run with: python -m pytest test_query_plans.py
+"""
+
+import re
+from datetime import datetime, timedelta
+
+import pytest
+import sqlalchemy as sa
+
+# Tables that grow with ticket volume; small lookup tables may be scanned
+LARGE_TABLES = {'ticket', 'ticket_comment', 'ticket_attachment', 'audit_log', 'client_ticket', 'ticket_queue_entry',
+                'ticket_daily_stats', 'ticket_duration_sketch'}
+
+# SQLite reports aliased tables as <table>_<n>
+PLAN_TABLE = re.compile(r'^(?:SCAN|SEARCH) (\w+?)(?:_\d+)?\b')
+
+# Index a plan step reads, as (table, index)
+PLAN_INDEX = re.compile(r'^(?:SCAN|SEARCH) (\w+?)(?:_\d+)? USING (?:COVERING )?INDEX (\w+)')
+
+# Plans that read every row: a bare table scan, a transient automatic index, or
+# an index whose only constraint is the soft-delete flag
+FULL_SCAN = re.compile(r'^SCAN \S+(?: LEFT-JOIN)?$|USING AUTOMATIC|INDEX \w+ \(is_deleted=\?\)')
+
+
+def seed(db):
+    from app.models import User, Ticket, TicketCategory, TicketComment, AuditLog
+
+    admin = User(username='admin', email='admin@example.com', is_admin=True)
+    agent = User(username='agent', email='agent@example.com')
+    for user in (admin, agent):
+        user.set_password('password')
+        db.session.add(user)
+    category = TicketCategory(name='Hardware')
+    # No tickets, so it can be deleted
+    empty_category = TicketCategory(name='Network')
+    db.session.add_all([category, empty_category])
+    db.session.flush()
+
+    now = datetime.utcnow()
+    for i in range(50):
+        ticket = Ticket(
+            title=f'Printer {i} is jammed',
+            description='Paper stuck in tray',
+            status=('Open', 'In Progress', 'Resolved')[i % 3],
+            priority=('Low', 'Medium', 'High', 'Critical')[i % 4],
+            ticket_number=f'TKT-{i:06d}',
+            created_at=now - timedelta(hours=i),
+            resolved_at=now - timedelta(minutes=i) if i % 3 == 2 else None,
+            created_by_id=admin.id,
+            assigned_to_id=agent.id if i % 2 else None,
+            category_id=category.id
+        )
+        db.session.add(ticket)
+        db.session.flush()
+        db.session.add(TicketComment(content='Looking into it', ticket_id=ticket.id, author_id=agent.id))
+        db.session.add(AuditLog(action='CREATED', user_id=admin.id, ticket_id=ticket.id))
+    db.session.commit()
+
+    return {
+        'admin': admin.id, 'agent': agent.id, 'category': category.id, 'ticket': ticket.id,
+        'empty_category': empty_category.id
+    }
+
+
+@pytest.fixture
+def run_requests(client, token, capture_selects):
+    """run_requests(requests) issues (user, url, method) requests, which must succeed, and returns every SELECT they executed"""
+    def run_requests(requests):
+        with capture_selects() as statements:
+            for user, url, method in requests:
+                response = client.open(url, method=method, headers={'Authorization': f'Bearer {token(user)}'})
+                # Streamed bodies (exports) only run their queries as they are read
+                body = response.get_data(as_text=True)
+                response.close()
+                # A failing endpoint may have run only part of its queries
+                assert 200 <= response.status_code < 300 or response.status_code == 304, \
+                    f'{method} {url}: {response.status_code} {body[:200]}'
+        return statements
+    return run_requests
+
+
+def full_scans(app, statements):
+    """Return (plan step, statement) pairs that read a whole large table"""
+    from app import db
+
+    scans = []
+    with app.app_context():
+        with db.engine.connect() as conn:
+            for statement, parameters in statements:
+                plan = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+                for row in plan:
+                    detail = row[-1]
+                    table = PLAN_TABLE.match(detail)
+                    if table and table.group(1) in LARGE_TABLES and FULL_SCAN.search(detail):
+                        scans.append((detail, ' '.join(statement.split())))
+    return scans
+
+
+def assert_indexed(app, statements):
+    assert statements, 'no queries were captured'
+    scans = full_scans(app, statements)
+    assert not scans, 'full table scans:\n' + '\n'.join(f'  {step}: {sql}' for step, sql in scans)
+
+
+def ticket_requests(ids):
+    return [
+        ('admin', '/api/tickets', 'GET'),
+        ('admin', '/api/tickets?status=Open', 'GET'),
+        ('admin', '/api/tickets?priority=High', 'GET'),
+        ('admin', f"/api/tickets?category={ids['category']}", 'GET'),
+        ('admin', f"/api/tickets?assigned_to={ids['agent']}", 'GET'),
+        ('admin', '/api/tickets?status=Open&sort=-priority', 'GET'),
+        ('admin', '/api/tickets?sort=priority&count=none', 'GET'),
+        ('admin', '/api/tickets?sort=-updated_at&count=none', 'GET'),
+        ('admin', '/api/tickets?sort=sla_resolution_due', 'GET'),
+        ('admin', '/api/tickets?search=printer', 'GET'),
+        ('agent', '/api/tickets', 'GET'),
+        ('agent', '/api/tickets?status=Open', 'GET'),
+        ('admin', f"/api/tickets/{ids['ticket']}", 'GET'),
+        ('admin', f"/api/tickets/{ids['ticket']}?include=comments,attachments,watchers,audit", 'GET'),
+        ('admin', f"/api/tickets/{ids['ticket']}/comments", 'GET'),
+        ('admin', f"/api/tickets/{ids['ticket']}/timeline", 'GET'),
+        ('agent', f"/api/tickets/{ids['ticket']}/timeline?order=desc", 'GET'),
+    ]
+
+
+def report_requests(ids):
+    return [
+        ('admin', '/api/reports/dashboard', 'GET'),
+        ('admin', '/api/reports/trends', 'GET'),
+        ('admin', '/api/reports/performance', 'GET'),
+        ('admin', '/api/reports/export?type=tickets', 'GET'),
+        ('admin', '/api/reports/export?type=audit', 'GET'),
+    ]
+
+
+def queue_requests(ids):
+    return [
+        ('agent', '/api/queues/my-open', 'GET'),
+        ('agent', '/api/queues/breaching-soon', 'GET'),
+        ('admin', '/api/queues/unassigned', 'GET'),
+        ('admin', '/api/queues/breaching-soon', 'GET'),
+        ('admin', f"/api/queues/category/{ids['category']}", 'GET'),
+    ]
+
+
+def category_requests(ids):
+    return [
+        ('admin', '/api/categories', 'GET'),
+        ('admin', f"/api/categories/{ids['category']}", 'GET'),
+        ('admin', f"/api/categories/{ids['empty_category']}", 'DELETE'),
+    ]
+
+
+def test_ticket_queries_use_indexes(app, run_requests):
+    assert_indexed(app, run_requests(ticket_requests(app.config['TEST_IDS'])))
+
+
+def test_ticket_bundle_query_count_is_bounded(app, run_requests):
+    ids = app.config['TEST_IDS']
+    statements = run_requests([
+        ('admin', f"/api/tickets/{ids['ticket']}?include=comments,attachments,watchers,audit", 'GET'),
+    ])
+    # User and token-blocklist lookups, the ticket with its to-one relationships, and two per include
+    assert len(statements) <= 2 + 1 + 2 * 4, '\n'.join(sql for sql, _ in statements)
+
+
+def test_report_queries_use_indexes(app, run_requests):
+    assert_indexed(app, run_requests(report_requests(app.config['TEST_IDS'])))
+
+
+def test_queue_heads_are_read_in_index_order(app, run_requests):
+    from app import db
+
+    statements = run_requests(queue_requests(app.config['TEST_IDS']))
+    assert_indexed(app, statements)
+
+    # The page is the first rows of the head index, not a sorted scan of the whole queue
+    with app.app_context(), db.engine.connect() as conn:
+        for statement, parameters in statements:
+            if 'ticket_queue_entry' not in statement:
+                continue
+            plan = [row[-1] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+            assert any('ix_ticket_queue_entry_head' in step for step in plan), plan
+            assert not any('TEMP B-TREE' in step for step in plan), plan
+
+
+def test_category_queries_use_indexes(app, run_requests):
+    assert_indexed(app, run_requests(category_requests(app.config['TEST_IDS'])))
+
+
+def test_every_ticket_index_serves_a_query(app, run_requests):
+    """ticket is the write-hot table: an index none of the queries above reads is pure write cost"""
+    from app import db
+
+    ids = app.config['TEST_IDS']
+    requests = ticket_requests(ids) + report_requests(ids) + queue_requests(ids) + category_requests(ids)
+    used = set()
+    with app.app_context(), db.engine.connect() as conn:
+        for statement, parameters in run_requests(requests):
+            for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters):
+                step = PLAN_INDEX.match(row[-1])
+                if step and step.group(1) == 'ticket':
+                    used.add(step.group(2))
+        # Unique indexes enforce their constraint whether or not a query reads them
+        indexes = {index['name'] for index in sa.inspect(conn).get_indexes('ticket') if not index['unique']}
+    assert indexes <= used, f'unused ticket indexes: {sorted(indexes - used)}'
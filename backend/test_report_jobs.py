@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for background report jobs run on a thread (REPORT_JOB_WORKERS=0): results, takeovers and retries.
+
+Run with: python -m pytest test_report_jobs.py
+"""
+
+import csv
+import gzip
+import io
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import sqlalchemy as sa
+
+
+@pytest.fixture
+def config(config, tmp_path):
+    class ReportJobConfig(config):
+        # File-backed, so that the job thread's connection sees the tests' rows
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'report_jobs.db'}"
+        REPORT_JOB_WORKERS = 0
+        REPORT_JOB_DIR = str(tmp_path / 'results')
+        REPORT_JOB_MAX_ATTEMPTS = 2
+    return ReportJobConfig
+
+
+def seed(db):
+    from app.models import User, Ticket
+
+    admin = User(username='admin', email='admin@example.com', is_admin=True)
+    admin.set_password('password')
+    db.session.add(admin)
+    # Ticket numbers are reserved on a connection of their own, which must not wait on this one
+    db.session.commit()
+    for i in range(5):
+        db.session.add(Ticket(title=f'Printer {i} is jammed', description='Paper stuck in tray',
+                              created_by_id=admin.id))
+    db.session.commit()
+    return {'admin': admin.id}
+
+
+def wait_for(get, job_id, timeout=10):
+    """Poll the job until it leaves queued/running"""
+    from app import db
+
+    deadline = time.monotonic() + timeout
+    while True:
+        # The requests share the test's session; drop what it read last time
+        db.session.rollback()
+        job = get(f'/api/reports/jobs/{job_id}').get_json()['job']
+        if job['status'] not in ('queued', 'running') or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
+
+
+def queued_job(app):
+    from app import db, report_jobs
+    from app.models import User
+
+    job = report_jobs.create_job(db.session.get(User, app.config['TEST_IDS']['admin']), 'dashboard')
+    db.session.commit()
+    return job.id
+
+
+def test_job_runs_to_done_and_downloads_with_and_without_gzip(post, get):
+    response = post('/api/reports/jobs', {'report': 'tickets', 'format': 'csv'})
+    assert response.status_code == 202, response.get_json()
+    job_id = response.get_json()['job']['id']
+    assert response.headers['Location'].endswith(f'/api/reports/jobs/{job_id}')
+
+    job = wait_for(get, job_id)
+    assert job['status'] == 'done', job
+    assert job['rows_written'] == job['total_rows'] == 5
+
+    url = f'/api/reports/jobs/{job_id}?download=1'
+    plain = get(url)
+    assert plain.status_code == 200 and 'Content-Encoding' not in plain.headers
+    rows = list(csv.DictReader(io.StringIO(plain.get_data(as_text=True))))
+    assert sorted(row['title'] for row in rows) == [f'Printer {i} is jammed' for i in range(5)]
+
+    compressed = get(url, **{'Accept-Encoding': 'gzip'})
+    assert compressed.status_code == 200 and compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+
+
+def test_superseded_claim_stops_writing(app):
+    from app import db, report_jobs
+    from app.models import ReportJob
+
+    job_id = queued_job(app)
+    assert report_jobs._claim(job_id, 0)
+    # A second claim on the same attempt loses the race
+    assert not report_jobs._claim(job_id, 0)
+    # Another process presumed the first run dead and took over
+    assert report_jobs._claim(job_id, 1)
+    with pytest.raises(report_jobs.JobSuperseded):
+        report_jobs._update((job_id, 1), rows_written=10)
+
+    # A stale run_job neither claims the job nor writes a result
+    report_jobs.run_job(job_id, 0)
+    db.session.expire_all()
+    job = db.session.get(ReportJob, job_id)
+    assert job.status == 'running' and job.attempts == 2 and job.rows_written == 0
+    assert not os.path.exists(report_jobs.result_path(job))
+
+
+def test_resumable_jobs_fails_a_job_after_max_attempts(app):
+    from app import db, report_jobs
+    from app.models import ReportJob
+
+    stale = datetime.utcnow() - timedelta(seconds=app.config['REPORT_JOB_STALE_SECONDS'] + 60)
+    exhausted, retried, queued = queued_job(app), queued_job(app), queued_job(app)
+    # Both ran on another host and stopped reporting progress
+    for job_id, attempts in ((exhausted, 2), (retried, 1)):
+        db.session.execute(sa.update(ReportJob).where(ReportJob.id == job_id).values(
+            status='running', attempts=attempts, worker='elsewhere:1', updated_at=stale
+        ))
+    db.session.commit()
+
+    assert {job.id for job in report_jobs.resumable_jobs()} == {retried, queued}
+    job = db.session.get(ReportJob, exhausted)
+    assert job.status == 'failed' and job.message == 'Gave up after 2 attempts' and job.finished_at
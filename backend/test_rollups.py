@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for the report rollups: per-write maintenance against a full recompute, and DDSketch accuracy.
+
+Run with: python -m pytest test_rollups.py
+"""
+
+import io
+import random
+from datetime import datetime, timedelta
+
+import pytest
+import sqlalchemy as sa
+
+
+def seed(db):
+    from app.models import User, TicketCategory
+
+    users = {}
+    for name, is_admin in (('admin', True), ('agent', False)):
+        users[name] = User(username=name, email=f'{name}@example.com', is_admin=is_admin)
+        users[name].set_password('password')
+        db.session.add(users[name])
+    category = TicketCategory(name='Hardware', sla_response_hours=4, sla_resolution_hours=24)
+    db.session.add(category)
+    db.session.commit()
+    return {**{name: user.id for name, user in users.items()}, 'category': category.id}
+
+
+def test_rollups_match_a_recompute_after_orm_bulk_and_import_writes(app, patch):
+    from app import db, rollups
+    from app.importer import TicketImporter, iter_records
+    from app.models import Ticket, TicketDailyStats, TicketDurationSketch
+
+    ids = app.config['TEST_IDS']
+    now = datetime.utcnow()
+
+    # ORM writes go through the mapper events
+    tickets = []
+    for i in range(8):
+        ticket = Ticket(title=f'Printer {i} is jammed', description='Paper stuck in tray',
+                        priority=('Low', 'High')[i % 2], created_by_id=ids['admin'],
+                        category_id=ids['category'] if i % 3 else None)
+        ticket.created_at = now - timedelta(days=i, hours=5)
+        db.session.add(ticket)
+        tickets.append(ticket)
+    db.session.commit()
+    tickets[0].assigned_to_id = ids['agent']
+    tickets[0].first_response_at = tickets[0].created_at + timedelta(hours=1)
+    tickets[1].status, tickets[1].resolved_at = 'Resolved', now - timedelta(hours=2)
+    tickets[2].status, tickets[2].closed_at = 'Closed', now
+    tickets[3].priority = 'Critical'
+    tickets[4].is_deleted = True
+    db.session.commit()
+
+    # Set-based writes diff the contributions around themselves
+    response = patch('/api/tickets/bulk', {
+        'filter': {'priority': 'High'}, 'changes': {'status': 'Resolved', 'assigned_to_id': ids['agent']}
+    })
+    assert response.status_code == 200, response.get_json()
+    response = patch('/api/tickets/bulk', {'ids': [tickets[5].id], 'changes': {'is_deleted': True}})
+    assert response.status_code == 200, response.get_json()
+
+    lines = ['title,description,priority,status,category,assigned_to,created_at,first_response_at,resolved_at']
+    for i in range(4):
+        created = now - timedelta(days=10 + i)
+        lines.append(','.join([
+            f'Imported {i}', 'From the old helpdesk', 'Medium', 'Resolved' if i % 2 else 'Open',
+            'Hardware' if i % 2 else '', 'agent', created.isoformat(),
+            (created + timedelta(hours=3)).isoformat(), (created + timedelta(days=1)).isoformat() if i % 2 else ''
+        ]))
+    job = TicketImporter.start('csv', batch_size=2, commit_every=2).run(
+        iter_records(io.StringIO('\n'.join(lines) + '\n'), 'csv')
+    )
+    assert job.status == 'completed' and job.imported == 4, job.to_dict()
+
+    assert db.session.scalar(sa.select(sa.func.count()).select_from(TicketDailyStats))
+    assert db.session.scalar(sa.select(sa.func.count()).select_from(TicketDurationSketch))
+    assert rollups.reconcile() == 0
+
+    # A write around both the events and the diffs is what reconcile corrects
+    db.session.execute(sa.text("UPDATE ticket SET priority = 'Low' WHERE priority = 'Critical'"))
+    assert rollups.reconcile() > 0
+    db.session.commit()
+    assert rollups.reconcile() == 0
+
+
+@pytest.mark.parametrize('distribution', ['lognormal', 'uniform', 'constant'])
+def test_sketch_quantiles_are_within_the_relative_accuracy(distribution):
+    from app.sketches import DDSketch, RELATIVE_ACCURACY
+
+    rng = random.Random(42)
+    generate = {
+        'lognormal': lambda: rng.lognormvariate(9, 2),
+        'uniform': lambda: rng.uniform(1, 30 * 86400),
+        'constant': lambda: 3600.0,
+    }[distribution]
+    values = sorted(max(1.0, generate()) for _ in range(5000))
+
+    sketch, halves = DDSketch(), (DDSketch(), DDSketch())
+    for i, value in enumerate(values):
+        sketch.add(value)
+        halves[i % 2].add(value)
+    merged = halves[0].merge(halves[1])
+
+    for q in (0, 0.01, 0.25, 0.5, 0.9, 0.99, 0.999, 1):
+        exact = values[int(q * (len(values) - 1))]
+        estimate = sketch.quantile(q)
+        assert abs(estimate - exact) <= RELATIVE_ACCURACY * exact, (q, estimate, exact)
+        assert merged.quantile(q) == estimate
+    assert DDSketch().quantile(0.5) is None
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Tests for GET /api/tickets and /api/tickets/<id>: conditional requests and paging.
+
+Run with: python -m pytest test_ticket_list.py
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+import sqlalchemy as sa
+
+
+def seed(db):
+    from app.models import User, Ticket
+
+    admin = User(username='admin', email='admin@example.com', is_admin=True)
+    admin.set_password('password')
+    db.session.add(admin)
+    db.session.flush()
+    now = datetime.utcnow()
+    for i in range(25):
+        db.session.add(Ticket(
+            title=f'Printer {i} is jammed', description='Paper stuck in tray',
+            priority=('Low', 'Medium', 'High', 'Critical')[i % 4], created_by_id=admin.id,
+            created_at=now - timedelta(hours=i), updated_at=now - timedelta(hours=i)
+        ))
+    db.session.commit()
+    return {'admin': admin.id}
+
+
+def test_unchanged_page_is_not_modified_until_a_ticket_on_it_changes(app, get):
+    from app import db
+    from app.models import Ticket
+
+    first = get('/api/tickets?per_page=5')
+    assert first.status_code == 200
+    assert get('/api/tickets?per_page=5', **{'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    ticket_id = first.get_json()['tickets'][0]['id']
+    with app.app_context():
+        db.session.get(Ticket, ticket_id).status = 'In Progress'
+        db.session.commit()
+    changed = get('/api/tickets?per_page=5', **{'If-None-Match': first.headers['ETag']})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != first.headers['ETag']
+
+
+def test_page_is_modified_when_a_joined_name_changes(app, get):
+    from app import db
+    from app.models import User, Ticket, TicketCategory
+
+    # Changed through the app context's session, which the requests share
+    category = TicketCategory(name='Hardware')
+    db.session.add(category)
+    db.session.flush()
+    db.session.execute(sa.update(Ticket).values(category_id=category.id, updated_at=Ticket.updated_at))
+    db.session.commit()
+    admin = db.session.get(User, app.config['TEST_IDS']['admin'])
+
+    for url in ('/api/tickets?per_page=5', '/api/tickets?per_page=5&fields=title,category,created_by'):
+        etag = get(url).headers['ETag']
+        category.name = 'Printers'
+        db.session.commit()
+        renamed = get(url, **{'If-None-Match': etag})
+        assert renamed.status_code == 200
+        assert renamed.get_json()['tickets'][0]['category']['name'] == 'Printers'
+
+        admin.username = 'helpdesk'
+        db.session.commit()
+        assert get(url, **{'If-None-Match': renamed.headers['ETag']}).status_code == 200
+
+        category.name, admin.username = 'Hardware', 'admin'
+        db.session.commit()
+
+
+def test_cached_lists_are_dropped_when_a_category_or_username_changes(app, client, token, get, monkeypatch):
+    from app import db, cache
+    from app.caching import LRUCache
+    from app.models import Ticket, TicketCategory
+
+    monkeypatch.setattr(cache, 'backend', LRUCache())
+    category = TicketCategory(name='Hardware')
+    db.session.add(category)
+    db.session.flush()
+    db.session.execute(sa.update(Ticket).values(category_id=category.id))
+    db.session.commit()
+    headers = {'Authorization': f'Bearer {token()}'}
+
+    assert get('/api/tickets?per_page=5').headers['X-Cache'] == 'MISS'
+    assert get('/api/tickets?per_page=5').headers['X-Cache'] == 'HIT'
+    assert client.put(f'/api/categories/{category.id}', json={'name': 'Printers'}, headers=headers).status_code == 200
+    renamed = get('/api/tickets?per_page=5')
+    assert renamed.headers['X-Cache'] == 'MISS'
+    assert renamed.get_json()['tickets'][0]['category']['name'] == 'Printers'
+
+    assert client.put('/api/users/profile', json={'username': 'helpdesk'}, headers=headers).status_code == 200
+    renamed = get('/api/tickets?per_page=5')
+    assert renamed.headers['X-Cache'] == 'MISS'
+    assert renamed.get_json()['tickets'][0]['created_by']['username'] == 'helpdesk'
+
+
+def test_archived_ticket_detail_is_modified(app, get):
+    from app import db
+    from app.archive import archive_tickets
+    from app.models import Ticket
+
+    with app.app_context():
+        ticket = db.session.scalar(sa.select(Ticket).order_by(Ticket.id).limit(1))
+        ticket.status = 'Closed'
+        ticket.closed_at = datetime.utcnow() - timedelta(days=400)
+        db.session.commit()
+        url = f'/api/tickets/{ticket.id}'
+
+    live = get(url)
+    assert live.status_code == 200 and 'archived' not in live.get_json()
+    with app.app_context():
+        assert archive_tickets(365) == 1
+    archived = get(url, **{'If-None-Match': live.headers['ETag']})
+    assert archived.status_code == 200 and archived.get_json()['archived'] is True
+
+
+def test_attachment_count_is_current_in_the_session(app, get):
+    from app import db
+    from app.models import Ticket, TicketAttachment
+
+    # Loaded into the app context's session, which the requests share
+    ticket = db.session.scalar(sa.select(Ticket).order_by(Ticket.id).limit(1))
+    assert ticket.attachment_count == 0
+    attachment = TicketAttachment(filename='log.txt', original_filename='log.txt', file_size=10,
+                                  mime_type='text/plain', file_path='/tmp/log.txt', ticket_id=ticket.id,
+                                  uploaded_by_id=app.config['TEST_IDS']['admin'])
+    db.session.add(attachment)
+    db.session.flush()
+    assert ticket.attachment_count == 1
+    db.session.commit()
+    listed = get('/api/tickets?per_page=25&fields=attachment_count').get_json()['tickets']
+    assert {t['id']: t['attachment_count'] for t in listed}[ticket.id] == 1
+
+    db.session.delete(attachment)
+    db.session.flush()
+    assert ticket.attachment_count == 0
+    db.session.commit()
+
+
+def test_cursor_and_uncounted_pages_do_not_aggregate_the_filtered_set(get, capture_selects):
+    cursor = get('/api/tickets?per_page=5&sort=-created_at').get_json()['pagination']['next_cursor']
+    with capture_selects() as statements:
+        for url in (f'/api/tickets?per_page=5&cursor={cursor}', '/api/tickets?per_page=5&count=none'):
+            response = get(url)
+            assert response.status_code == 200
+            assert get(url, **{'If-None-Match': response.headers['ETag']}).status_code == 304
+    ticket_queries = [' '.join(sql.split()) for sql, _ in statements if 'FROM ticket' in sql]
+    assert ticket_queries
+    assert not [sql for sql in ticket_queries if 'count(' in sql.lower() or 'max(' in sql.lower()], ticket_queries
+
+
+def test_ticket_detail_is_not_modified_without_serializing_includes(app, get, monkeypatch):
+    from app import db
+    from app.models import Ticket, TicketComment
+
+    with app.app_context():
+        ticket = db.session.scalar(sa.select(Ticket).limit(1))
+        db.session.add(TicketComment(content='Looking into it', ticket_id=ticket.id, author_id=app.config['TEST_IDS']['admin']))
+        db.session.commit()
+        url = f'/api/tickets/{ticket.id}?include=comments,attachments,watchers,audit'
+
+    first = get(url)
+    assert first.status_code == 200 and len(first.get_json()['comments']) == 1
+
+    def unexpected(self):
+        raise AssertionError('serialized for a 304')
+
+    monkeypatch.setattr(TicketComment, 'to_dict', unexpected)
+    assert get(url, **{'If-None-Match': first.headers['ETag']}).status_code == 304
+
+
+def walk_pages(get, url):
+    tickets, cursor = [], None
+    while True:
+        response = get(f'{url}&cursor={cursor}' if cursor else url)
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        tickets += body['tickets']
+        cursor = body['pagination']['next_cursor']
+        if not cursor:
+            return tickets
+
+
+@pytest.mark.parametrize('sort', ['-created_at', 'priority', '-priority,created_at'])
+def test_cursor_pages_cover_every_ticket_once_in_order(app, get, sort):
+    from app.models import PRIORITY_RANK
+
+    tickets = walk_pages(get, f'/api/tickets?per_page=4&sort={sort}&fields=priority,created_at')
+    assert len(tickets) == 25 and len({t['id'] for t in tickets}) == 25
+
+    def sort_key(ticket):
+        key = []
+        for field in sort.split(','):
+            name = field.lstrip('-')
+            if name == 'priority':
+                value = PRIORITY_RANK[ticket[name]]
+            else:
+                value = datetime.fromisoformat(ticket[name]).timestamp()
+            key.append(-value if field.startswith('-') else value)
+        return key
+    keys = [sort_key(t) for t in tickets]
+    assert keys == sorted(keys)
+
+
+def test_cursor_pages_do_not_shift_when_tickets_are_added(app, get):
+    from app import db
+    from app.models import Ticket
+
+    first = get('/api/tickets?per_page=5&sort=-created_at').get_json()
+    seen = [t['id'] for t in first['tickets']]
+    with app.app_context():
+        # Newest of all, so it sorts before the cursor
+        db.session.add(Ticket(title='Monitor flickers', description='Since this morning',
+                              created_by_id=app.config['TEST_IDS']['admin']))
+        db.session.commit()
+    second = get(f"/api/tickets?per_page=5&cursor={first['pagination']['next_cursor']}").get_json()
+    assert second['pagination']['sort'] == '-created_at'
+    assert not set(seen) & {t['id'] for t in second['tickets']}
+    assert len(second['tickets']) == 5
+
+
+def test_malformed_cursor_is_rejected(get):
+    assert get('/api/tickets?cursor=not-a-cursor').status_code == 400
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for ticket number allocation alongside numbers that did not come from the counter.
+
+Run with: python -m pytest test_ticket_numbers.py
+"""
+
+from datetime import datetime
+
+import pytest
+import sqlalchemy as sa
+
+
+@pytest.fixture
+def config(config, tmp_path):
+    class TicketNumberConfig(config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'numbers.db'}"
+        TICKET_NUMBER_BLOCK_SIZE = 1
+    return TicketNumberConfig
+
+
+def seed(db):
+    from app.models import User
+
+    admin = User(username='admin', email='admin@example.com', is_admin=True)
+    admin.set_password('password')
+    db.session.add(admin)
+    db.session.commit()
+    return {'admin': admin.id}
+
+
+def create_ticket(app):
+    from flask_jwt_extended import create_access_token
+
+    token = create_access_token(identity=str(app.config['TEST_IDS']['admin']))
+    response = app.test_client().post('/api/tickets', json={
+        'title': 'Printer is jammed', 'description': 'Paper stuck in tray', 'priority': 'High'
+    }, headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['ticket']['ticket_number']
+
+
+def insert_numbered(*numbers):
+    """Tickets written around the counter, as raw SQL or an older import would"""
+    from app import db
+    from app.models import Ticket
+
+    now = datetime.utcnow()
+    db.session.execute(sa.insert(Ticket), [
+        {'title': 'Imported', 'description': 'Imported', 'status': 'Open', 'priority': 'Medium',
+         'priority_rank': 1, 'ticket_number': number, 'created_at': now, 'updated_at': now, 'is_deleted': False}
+        for number in numbers
+    ])
+    db.session.commit()
+
+
+def test_parse_matches_only_the_configured_format(app):
+    from app import ticket_numbers
+
+    assert ticket_numbers.parse('TKT-000042') == 42
+    assert ticket_numbers.parse('TKT-1234567') == 1234567
+    assert ticket_numbers.parse('INC-000042') is None
+    assert ticket_numbers.parse('TKT-00004x') is None
+
+
+def test_new_counter_starts_after_existing_numbers(app):
+    insert_numbered('TKT-000002')
+    assert create_ticket(app) == 'TKT-000003'
+
+
+def test_taken_number_is_skipped_on_insert(app):
+    assert create_ticket(app) == 'TKT-000001'
+    insert_numbered('TKT-000002', 'TKT-000003')
+    assert create_ticket(app) == 'TKT-000004'